@@ -1,8 +1,43 @@
-from .core import (
-    add_launch_config,
-    edit_launch_config,
-    add_auto_scaling_group,
-    edit_auto_scaling_group,
-)
-
-from .exceptions import AutoScalerException
+import importlib
+import sys
+import types
+
+# Public names and the module each comes from. They are imported on first
+# use so that importing the package (and so every console script, even for
+# --help) doesn't load boto.
+_EXPORTS = {
+    'add_launch_config': 'core',
+    'edit_launch_config': 'core',
+    'add_auto_scaling_group': 'core',
+    'edit_auto_scaling_group': 'core',
+    'AutoScalerException': 'exceptions',
+    'GroupUpdateError': 'exceptions',
+    'HealthCheckError': 'exceptions',
+    'Session': 'session',
+    'get_session': 'session',
+    'set_default_session': 'session',
+    'Throttler': 'throttle',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+class _LazyModule(types.ModuleType):
+    def __getattr__(self, name):
+        module_name = _EXPORTS.get(name)
+        if module_name is None:
+            raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+        value = getattr(importlib.import_module('.' + module_name, __name__), name)
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(_EXPORTS))
+
+
+_module = _LazyModule(__name__)
+_module.__dict__.update(sys.modules[__name__].__dict__)
+# Python 2 clears the globals of a module once it's garbage collected, and
+# _LazyModule still needs them
+_module._original_module = sys.modules[__name__]
+sys.modules[__name__] = _module
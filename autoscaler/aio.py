@@ -0,0 +1,102 @@
+import functools
+import threading
+
+from . import core
+from .exceptions import AutoScalerException
+from .stats import current_phase, use_phase
+
+try:
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:  # pragma: no cover
+    asyncio = None
+
+# Workers are only started as they are needed, and the session's throttler
+# paces the API calls however many operations are in flight
+DEFAULT_EXECUTOR_SIZE = 200
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Return the process-wide executor for asyncio callers (Python 3 only),
+    creating it with DEFAULT_EXECUTOR_SIZE workers the first time
+    """
+    global _executor
+    if asyncio is None:
+        raise AutoScalerException("autoscaler.aio requires Python 3")
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=DEFAULT_EXECUTOR_SIZE)
+        return _executor
+
+
+def set_executor(executor):
+    """
+    Replace the process-wide executor, shutting down the old one. This is
+    how to bound the operations in flight to something other than
+    DEFAULT_EXECUTOR_SIZE. None creates a default one on next use.
+    """
+    global _executor
+    with _executor_lock:
+        old_executor, _executor = _executor, executor
+    if old_executor is not None and old_executor is not executor:
+        old_executor.shutdown(wait=False)
+
+
+# Each function runs its blocking counterpart on the executor and returns an
+# asyncio future. The executor's workers bound how many operations are in
+# flight, however many are awaited at once.
+def _run(func, *args, **kwargs):
+    executor = kwargs.pop('executor', None) or get_executor()
+    call = functools.partial(func, *args, **kwargs)
+    phase = current_phase()
+
+    def run():
+        with use_phase(phase):
+            return call()
+    return asyncio.get_event_loop().run_in_executor(executor, run)
+
+
+def add_launch_config(name, executor=None, **kwargs):
+    return _run(core.add_launch_config, name, executor=executor, **kwargs)
+
+
+def edit_launch_config(name, executor=None, **kwargs):
+    return _run(core.edit_launch_config, name, executor=executor, **kwargs)
+
+
+def add_auto_scaling_group(name, executor=None, **kwargs):
+    return _run(core.add_auto_scaling_group, name, executor=executor, **kwargs)
+
+
+def edit_auto_scaling_group(name, executor=None, **kwargs):
+    return _run(core.edit_auto_scaling_group, name, executor=executor, **kwargs)
+
+
+def get_config_values_many(names, executor=None, **kwargs):
+    return _run(core.get_config_values_many, names, executor=executor, **kwargs)
+
+
+def get_groups_many(names, executor=None, **kwargs):
+    return _run(core.get_groups_many, names, executor=executor, **kwargs)
+
+
+def get_all_groups(session=None, page_size=None, executor=None):
+    """
+    Return a list of every group, fetching the next page while the current
+    one is being read
+    """
+    return _run(_list, core.iter_groups, session=session, page_size=page_size,
+                prefetch=True, executor=executor)
+
+
+def get_all_launch_configs(session=None, page_size=None, executor=None):
+    return _run(_list, core.iter_launch_configs, session=session, page_size=page_size,
+                prefetch=True, executor=executor)
+
+
+def _list(iterate, **kwargs):
+    return list(iterate(**kwargs))
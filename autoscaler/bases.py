@@ -0,0 +1,93 @@
+import copy
+import threading
+from collections import OrderedDict
+
+from .exceptions import AutoScalerException
+
+DEFAULT_BASE_CACHE_SIZE = 64
+
+
+class BaseConfigResolver(object):
+    """
+    Bounded LRU cache of the attributes new launch configs are built from.
+
+    A base that doesn't exist (yet) can be declared with `register()` as
+    deriving from another base plus some attributes, so chains of bases
+    resolve without each link having been created first. Each chain is
+    resolved once and kept until one of its links is invalidated. Bases that
+    don't exist and weren't registered are looked up every time.
+    """
+
+    def __init__(self, maxsize=DEFAULT_BASE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._parents = {}
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def register(self, name, parent, attributes):
+        with self._lock:
+            self._parents[name] = (parent, OrderedDict(attributes))
+        self.invalidate(name)
+
+    def unregister(self, *names):
+        """
+        Forget how `names` were declared, for bases that won't be created
+        after all
+        """
+        with self._lock:
+            for name in names:
+                self._parents.pop(name, None)
+        self.invalidate(*names)
+
+    def resolve(self, name, describe):
+        """
+        Return a copy of the attributes of base `name`. `describe(name)`
+        returns the attributes of an existing launch config, or empty
+        attributes if there is none.
+        """
+        return copy.copy(self._resolve(name, describe, ())[1])
+
+    def _resolve(self, name, describe, seen):
+        # Return the names in the chain from `name` to the base that exists,
+        # and the attributes the chain resolves to
+        if name in seen:
+            raise AutoScalerException("Launch config bases form a cycle: {}".format(
+                " -> ".join(seen + (name,))))
+        with self._lock:
+            if name in self._cache:
+                entry = self._cache.pop(name)
+                self._cache[name] = entry
+                return entry
+            parent = self._parents.get(name)
+
+        chain = (name,)
+        attributes = describe(name)
+        if not any(attributes.values()):
+            if parent is None:
+                # It may be created behind our back, so don't remember it's missing
+                return chain, attributes
+            parent_name, overrides = parent
+            parent_chain, parent_attributes = self._resolve(parent_name, describe, seen + (name,))
+            chain += parent_chain
+            attributes = copy.copy(parent_attributes)
+            attributes.update(overrides)
+
+        with self._lock:
+            self._cache[name] = (chain, attributes)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return chain, attributes
+
+    def invalidate(self, *names):
+        """
+        Drop the cached bases that are, or derive from, any of `names`
+        """
+        names = set(names)
+        with self._lock:
+            for cached_name, (chain, _) in list(self._cache.items()):
+                if names.intersection(chain):
+                    del self._cache[cached_name]
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
@@ -0,0 +1,138 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from boto.ec2.autoscale.launchconfig import InstanceMonitoring
+from boto.ec2.blockdevicemapping import BlockDeviceMapping, BlockDeviceType
+
+DEFAULT_CACHE_PATH = os.path.join('~', '.cache', 'autoscaler', 'inventory.sqlite')
+DEFAULT_TTL = 300
+CACHE_TTL_ENV = 'AUTOSCALER_CACHE_TTL'
+
+LAUNCH_CONFIG = 'launch_config'
+GROUP = 'group'
+
+# Stored for names that were described and did not exist
+MISSING = object()
+_MISSING_MARKER = b'missing'
+
+
+def _detach(value):
+    """
+    Copy boto objects without their connections so they can be pickled
+    """
+    if isinstance(value, InstanceMonitoring):
+        return InstanceMonitoring(enabled=value.enabled)
+    if isinstance(value, BlockDeviceMapping):
+        mapping = BlockDeviceMapping()
+        for device_name, device in value.items():
+            device_copy = BlockDeviceType()
+            device_copy.__dict__.update(device.__dict__)
+            device_copy.connection = None
+            mapping[device_name] = device_copy
+        return mapping
+    if isinstance(value, list):
+        return [_detach(item) for item in value]
+    return value
+
+
+class Inventory(object):
+    """
+    SQLite cache of launch config and group attributes, keyed by
+    `namespace` (for instance a region) so different targets never mix.
+
+    Entries older than `ttl` seconds are ignored. Core functions invalidate
+    the names they create, edit or delete.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, namespace='default',
+                 clock=time.time):
+        self.path = os.path.expanduser(path)
+        self.ttl = ttl
+        self.namespace = namespace
+        self._clock = clock
+        self._lock = threading.Lock()
+        # (kind, name) -> when it was last invalidated, for `put(described_at=)`
+        self._invalidated = {}
+        if self.path != ':memory:':
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.isdir(directory):
+                os.makedirs(directory)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS inventory ("
+                "namespace TEXT, kind TEXT, name TEXT, data BLOB, fetched REAL, "
+                "PRIMARY KEY (namespace, kind, name))"
+            )
+
+    def get(self, kind, name):
+        """
+        Return the cached attributes, `MISSING` for a cached miss, or None
+        if there's no fresh entry.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT data, fetched FROM inventory WHERE namespace=? AND kind=? AND name=?",
+                (self.namespace, kind, name),
+            ).fetchone()
+        if row is None or self._clock() - row[1] > self.ttl:
+            return None
+        data = bytes(row[0])
+        if data == _MISSING_MARKER:
+            return MISSING
+        return pickle.loads(data)
+
+    def now(self):
+        return self._clock()
+
+    def put(self, kind, name, attributes, described_at=None):
+        """
+        Cache `attributes`. When `described_at` is given, a name invalidated
+        since then is left alone, as the attributes may predate the change.
+        """
+        if attributes is MISSING:
+            data = _MISSING_MARKER
+        else:
+            data = pickle.dumps(
+                type(attributes)((key, _detach(value)) for key, value in attributes.items()),
+                protocol=2,
+            )
+        with self._lock, self._db:
+            invalidated = self._invalidated.get((kind, name))
+            if described_at is not None and invalidated is not None and invalidated >= described_at:
+                return
+            self._db.execute(
+                "INSERT OR REPLACE INTO inventory VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, kind, name, sqlite3.Binary(data), self._clock()),
+            )
+
+    def invalidate(self, kind, *names):
+        now = self._clock()
+        with self._lock, self._db:
+            self._invalidated = dict((key, when) for key, when in self._invalidated.items()
+                                     if now - when <= self.ttl)
+            self._invalidated.update(((kind, name), now) for name in names)
+            self._db.executemany(
+                "DELETE FROM inventory WHERE namespace=? AND kind=? AND name=?",
+                [(self.namespace, kind, name) for name in names],
+            )
+
+    def clear(self):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM inventory WHERE namespace=?", (self.namespace,))
+
+    def close(self):
+        self._db.close()
+
+
+def inventory_from_environment(namespace='default'):
+    """
+    Return an `Inventory` if AUTOSCALER_CACHE_TTL is set, otherwise None
+    """
+    ttl = os.environ.get(CACHE_TTL_ENV)
+    if not ttl:
+        return None
+    return Inventory(ttl=float(ttl), namespace=namespace)
@@ -0,0 +1,128 @@
+import fnmatch
+import json
+import os
+import tempfile
+from collections import OrderedDict
+
+from .concurrency import DEFAULT_CONCURRENCY, run_concurrently
+from .core import edit_auto_scaling_group, iter_groups
+from .exceptions import AutoScalerException
+from .plan import DryRunSession
+from .session import get_session
+from .stats import phase
+
+CAPACITY_ATTRS = ['min_size', 'max_size', 'desired_capacity']
+DEFAULT_STATE_PATH = os.path.join('~', '.cache', 'autoscaler', 'capacity.json')
+
+
+def select_groups(pattern=None, tags=None, session=None, page_size=None):
+    """
+    Describe every group once and return those whose name matches the
+    shell-style `pattern` and that carry every tag in `tags`, a dict of key
+    -> value (None for any value)
+    """
+    selected = []
+    with phase('describe'):
+        for group in iter_groups(session=session, page_size=page_size, prefetch=True):
+            if pattern is not None and not fnmatch.fnmatchcase(group.name, pattern):
+                continue
+            group_tags = dict((tag.key, tag.value) for tag in group.tags or [])
+            if all(key in group_tags and value in (None, group_tags[key])
+                   for key, value in (tags or {}).items()):
+                selected.append(group)
+    return selected
+
+
+def load_state(path=None):
+    """
+    Read the capacity recorded in the state file at `path`, as an
+    OrderedDict of group name -> attributes
+    """
+    path = os.path.expanduser(path or DEFAULT_STATE_PATH)
+    if not os.path.exists(path):
+        return OrderedDict()
+    with open(path) as state_file:
+        return json.load(state_file, object_pairs_hook=OrderedDict)
+
+
+def save_state(state, path=None):
+    path = os.path.expanduser(path or DEFAULT_STATE_PATH)
+    directory = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    # Write to a temporary file and rename it so a crash never leaves a
+    # partial file behind
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'w') as temp_file:
+        json.dump(state, temp_file, indent=2)
+    os.rename(temp_path, path)
+
+
+def _check_capacity(capacity):
+    unknown = sorted(set(capacity) - set(CAPACITY_ATTRS))
+    if unknown:
+        raise AutoScalerException("Unknown capacity attributes {}, use {}".format(
+            ", ".join(unknown), ", ".join(CAPACITY_ATTRS)))
+    if not capacity:
+        raise AutoScalerException("No capacity to set, use {}".format(", ".join(CAPACITY_ATTRS)))
+
+
+def set_capacity(groups, state_path=None, session=None, concurrency=DEFAULT_CONCURRENCY,
+                 **capacity):
+    """
+    Record the capacity of every group in `groups` in the state file, then
+    set `capacity` (any of min_size, max_size and desired_capacity) on all
+    of them concurrently. Returns a `BatchResult` keyed by group name.
+
+    Groups that are already recorded keep their recorded capacity, so
+    scaling down twice still restores the original values.
+    """
+    _check_capacity(capacity)
+    session = get_session(session)
+    # A dry run leaves the state file alone, like the journal
+    if not isinstance(session, DryRunSession):
+        state = load_state(state_path)
+        for group in groups:
+            if group.name not in state:
+                state[group.name] = OrderedDict(
+                    (attr_name, getattr(group, attr_name)) for attr_name in CAPACITY_ATTRS)
+        save_state(state, state_path)
+
+    def update(group):
+        return edit_auto_scaling_group(group.name, session=session, group=group, **capacity)
+
+    with phase('update'):
+        return run_concurrently(update, groups, key=lambda group: group.name,
+                                concurrency=concurrency)
+
+
+def restore_capacity(state_path=None, pattern=None, session=None,
+                     concurrency=DEFAULT_CONCURRENCY):
+    """
+    Put the capacity recorded in the state file back on its groups (those
+    matching `pattern`), concurrently, and forget the groups that were
+    restored. Returns a `BatchResult` keyed by group name.
+    """
+    session = get_session(session)
+    state = load_state(state_path)
+    names = [name for name in state
+             if pattern is None or fnmatch.fnmatchcase(name, pattern)]
+    groups = {}
+    if names:
+        with phase('describe'):
+            for group in iter_groups(session=session, prefetch=True):
+                if group.name in state:
+                    groups[group.name] = group
+
+    def update(name):
+        # Groups that are gone fail to describe in edit_auto_scaling_group
+        capacity = dict((str(attr_name), value) for attr_name, value in state[name].items())
+        return edit_auto_scaling_group(name, session=session, group=groups.get(name), **capacity)
+
+    with phase('update'):
+        result = run_concurrently(update, names, concurrency=concurrency)
+    if not isinstance(session, DryRunSession):
+        for name in result.succeeded:
+            del state[name]
+        save_state(state, state_path)
+    return result
@@ -1,23 +1,21 @@
 from __future__ import print_function
 
-import readline
+import json
+import os
 import sys
-from docopt import docopt
-from boto.ec2.blockdevicemapping import BlockDeviceType, BlockDeviceMapping
+from collections import OrderedDict
 
-from . import (
-    add_launch_config,
-    edit_launch_config,
-    add_auto_scaling_group,
-    edit_auto_scaling_group,
-)
-from .core import get_config_attributes_or_defaults, get_group_attributes_or_defaults
+from .compat import string_types
+
+# Everything that loads boto (and readline) is imported inside the commands
+# that need it, so `--help` starts quickly
 
 # This makes mocking easier
 get_input = raw_input
 
 
 def read_input(prompt, prefill=''):
+    import readline
     if prefill:
         # We need to cast text since insert_text only takes strings
         prefill = unicode(prefill)
@@ -28,188 +26,832 @@ def read_input(prompt, prefill=''):
         readline.set_startup_hook()
 
 
+def _docopt(docstring, argv):
+    from docopt import docopt
+    return docopt(docstring, argv=argv)
+
+
 def launch_config():
+    # Alias of `autoscaler launch-config`
+    _launch_config_command(['launch-config'] + sys.argv[1:])
+
+
+def autoscaling_group():
+    # Alias of `autoscaler auto-scaling-group`
+    _autoscaling_group_command(['auto-scaling-group'] + sys.argv[1:])
+
+
+def _launch_config_command(argv):
     docstring = """AutoScaler
 
     Usage:
-        autoscaler_launch_config add <config_name>
-        autoscaler_launch_config edit <config_name>
+        autoscaler launch-config add <config_name> [--set=<attr=value>]... [--dry-run] [--stats] [--region=<region>]... [--profile=<profile>]...
+        autoscaler launch-config edit <config_name> [--set=<attr=value>]... [--waves=<sizes>] [--health-check=<function>] [--concurrency=<n>] [--dry-run] [--stats] [--region=<region>]... [--profile=<profile>]...
+        autoscaler launch-config (add|edit) --batch [--concurrency=<n>] [--dry-run] [--stats] [--region=<region>]... [--profile=<profile>]...
 
     Options:
-        -h --help     Show this screen.
+        -h --help            Show this screen.
+        --set=<attr=value>   Set an attribute instead of asking for each one, repeat for several.
+        --batch              Read launch configs from standard input, one JSON object with a
+                             "name" and attributes per line, and add or edit them concurrently.
+        --waves=<sizes>      Move the groups onto the edit in waves, like 1,10% for one group,
+                             then a tenth of them, then the rest.
+        --health-check=<function>
+                             module:function to call with the names of the groups in each wave
+                             before the next one. Unless it returns true, the groups are moved
+                             back and the edit is dropped.
+        --concurrency=<n>    Maximum number of concurrent API operations [default: 10].
+        --dry-run            Show the API calls that would be made without making changes.
+        --stats              Print API call counts and latencies when done.
+        --region=<region>    Region to work in, repeat to work in several at once.
+        --profile=<profile>  boto credentials profile to use, repeat to use several at once.
     """
-    arguments = docopt(docstring, argv=sys.argv[1:])
+    arguments = _docopt(docstring, argv)
+    from .core import (
+        add_launch_config,
+        edit_launch_config,
+        get_config_attributes_or_defaults,
+        launch_config_attrs,
+    )
+    from .targets import get_target_session
+
     config_name = arguments['<config_name>']
+    stats_sink = _add_stats_sink(arguments)
+    targets = _targets(arguments)
 
-    # Get current attributes or default
-    attributes = get_config_attributes_or_defaults(config_name)
+    if arguments['add']:
+        operation = add_launch_config
+        message = "Launch config {} created"
+        # New configs may name the config they are based on
+        attr_names = launch_config_attrs + ['base']
+    elif arguments['edit']:
+        operation = edit_launch_config
+        message = "Launch config {} updated"
+        attr_names = launch_config_attrs
+
+    if arguments['--batch']:
+        objects = _read_batch(sys.stdin, attr_names, _parse_config_value)
+        failed = _run_batch(arguments, targets, operation, objects, message)
+        _print_stats(stats_sink)
+        if failed:
+            sys.exit(1)
+        return
+
+    if arguments['--set']:
+        new_attributes = _parse_settings(arguments['--set'], attr_names, _parse_config_value)
+    else:
+        # Get current attributes or default, from the first target
+        attributes = get_config_attributes_or_defaults(config_name, session=get_target_session(targets[0]))
+
+        # Loop through all attributes asking for input and adding to `attributes`
+        new_attributes = {}
+        for attr_name, attr_value in attributes.items():
+            if attr_name == 'name':
+                # Don't ask for name since we already have it
+                continue
+            if attr_name == 'security_groups':
+                attr_value = ",".join(attr_value)
+            if attr_name == 'instance_monitoring':
+                if attr_value and attr_value.enabled == 'true':
+                    attr_value = 'yes'
+                else:
+                    attr_value = 'no'
+            if attr_name == 'ebs_optimized':
+                if attr_value:
+                    attr_value = 'yes'
+                else:
+                    attr_value = 'no'
+
+            user_input = read_input("What {}?".format(attr_name), attr_value)
+            new_attributes[attr_name] = _parse_config_value(attr_name, user_input)
+
+    options = {}
+    if arguments['edit']:
+        options['concurrency'] = int(arguments['--concurrency'])
+        if arguments['--waves']:
+            options['waves'] = arguments['--waves'].split(",")
+        if arguments['--health-check']:
+            options['health_check'] = _load_function(arguments['--health-check'])
+
+    def run(target, session):
+        dry_run_session = _dry_run_session(arguments, session)
+        operation(config_name, session=dry_run_session or session, **dict(new_attributes, **options))
+        return dry_run_session
+
+    results, failed = _run_on_targets(targets, run)
+    for target, session in results.items():
+        _print_target(target, targets)
+        _print_result(message.format(config_name), session)
+    _print_stats(stats_sink)
+    if failed:
+        sys.exit(1)
+
+
+def _autoscaling_group_command(argv):
+    docstring = """AutoScaler
 
-    # Loop through all attributes asking for input and adding to `attributes`
-    new_attributes = {}
-    for attr_name, attr_value in attributes.items():
-        if attr_name == 'name':
-            # Don't ask for name since we already have it
-            continue
-        if attr_name == 'security_groups':
-            attr_value = ",".join(attr_value)
-        if attr_name == 'instance_monitoring':
-            if attr_value and attr_value.enabled == 'true':
-                attr_value = 'yes'
-            else:
-                attr_value = 'no'
-        if attr_name == 'ebs_optimized':
-            if attr_value:
-                attr_value = 'yes'
-            else:
-                attr_value = 'no'
-
-        user_input = read_input("What {}?".format(attr_name), attr_value)
-
-        if attr_name == 'security_groups':
-            user_input = [x.strip() for x in user_input.split(",")]
-        if attr_name in ['instance_monitoring', 'ebs_optimized', 'associate_public_ip_address']:
-            if user_input.lower() in ['yes', 'y']:
-                user_input = True
-            elif user_input.lower() in ['no', 'n']:
-                user_input = False
-        if attr_name == 'block_device_mappings':
-            if user_input:
-                user_input = [_parse_block_device_mappings(user_input)]
-        user_input = None if user_input == "" else user_input
-        new_attributes[attr_name] = user_input
+    Usage:
+        autoscaler auto-scaling-group add <group_name> [--set=<attr=value>]... [--dry-run] [--stats] [--region=<region>]... [--profile=<profile>]...
+        autoscaler auto-scaling-group edit <group_name> [--set=<attr=value>]... [--dry-run] [--stats] [--region=<region>]... [--profile=<profile>]...
+        autoscaler auto-scaling-group (add|edit) --batch [--concurrency=<n>] [--dry-run] [--stats] [--region=<region>]... [--profile=<profile>]...
+
+    Options:
+        -h --help            Show this screen.
+        --set=<attr=value>   Set an attribute instead of asking for each one, repeat for several.
+        --batch              Read groups from standard input, one JSON object with a "name"
+                             and attributes per line, and add or edit them concurrently.
+        --concurrency=<n>    Maximum number of concurrent API operations [default: 10].
+        --dry-run            Show the API calls that would be made without making changes.
+        --stats              Print API call counts and latencies when done.
+        --region=<region>    Region to work in, repeat to work in several at once.
+        --profile=<profile>  boto credentials profile to use, repeat to use several at once.
+    """
+    arguments = _docopt(docstring, argv)
+    from .core import (
+        add_auto_scaling_group,
+        edit_auto_scaling_group,
+        empty_group_attrs,
+        get_group_attributes_or_defaults,
+        get_groups_many,
+    )
+    from .targets import get_target_session
 
+    group_name = arguments['<group_name>']
+    stats_sink = _add_stats_sink(arguments)
+    targets = _targets(arguments)
+
+    prefetch = None
     if arguments['add']:
-        add_launch_config(config_name, **new_attributes)
-        print("Launch config {} created".format(config_name))
+        operation = add_auto_scaling_group
+        message = "AutoScaling group {} created"
     elif arguments['edit']:
-        edit_launch_config(config_name, **new_attributes)
-        print("Launch config {} updated".format(config_name))
+        operation = edit_auto_scaling_group
+        message = "AutoScaling group {} updated"
+
+        def prefetch(names, session, concurrency):
+            # Describe the groups of a batch together rather than one per
+            # line. Missing groups get empty attributes, so leave those to
+            # fail describing themselves.
+            groups = get_groups_many(names, session=session, concurrency=concurrency)
+            return dict((name, {'current': attributes}) for name, attributes in groups.items()
+                        if attributes != empty_group_attrs)
+    attr_names = list(empty_group_attrs)
+
+    if arguments['--batch']:
+        objects = _read_batch(sys.stdin, attr_names, _parse_group_value)
+        failed = _run_batch(arguments, targets, operation, objects, message, prefetch)
+        _print_stats(stats_sink)
+        if failed:
+            sys.exit(1)
+        return
+
+    if arguments['--set']:
+        new_attributes = _parse_settings(arguments['--set'], attr_names, _parse_group_value)
+    else:
+        # Get current attributes or default, from the first target
+        attributes = get_group_attributes_or_defaults(group_name, session=get_target_session(targets[0]))
+
+        # Loop through all attributes asking for input and adding to `attributes`
+        new_attributes = {}
+        for attr_name, attr_value in attributes.items():
+            if attr_name == 'availability_zones':
+                attr_value = ",".join(attr_value)
+            user_input = read_input("What {}?".format(attr_name), attr_value)
+            new_attributes[attr_name] = _parse_group_value(attr_name, user_input)
+
+    def run(target, session):
+        dry_run_session = _dry_run_session(arguments, session)
+        operation(group_name, session=dry_run_session or session, **new_attributes)
+        return dry_run_session
+
+    results, failed = _run_on_targets(targets, run)
+    for target, session in results.items():
+        _print_target(target, targets)
+        _print_result(message.format(group_name), session)
+    _print_stats(stats_sink)
+    if failed:
+        sys.exit(1)
+
+
+def _apply_command(argv):
+    docstring = """AutoScaler
 
+    Usage:
+        autoscaler apply <manifest> [--concurrency=<n>] [--dry-run] [--stats] [--region=<region>]... [--profile=<profile>]...
 
-def autoscaling_group():
+    Options:
+        -h --help            Show this screen.
+        --concurrency=<n>    Maximum number of concurrent API operations [default: 10].
+        --dry-run            Show the API calls that would be made without making changes.
+        --stats              Print API call counts and latencies when done.
+        --region=<region>    Region to work in, repeat to work in several at once.
+        --profile=<profile>  boto credentials profile to use, repeat to use several at once.
+    """
+    arguments = _docopt(docstring, argv)
+    from .manifest import apply_manifest, load_manifest
+
+    stats_sink = _add_stats_sink(arguments)
+    manifest = load_manifest(arguments['<manifest>'])
+    targets = _targets(arguments)
+
+    def run(target, session):
+        dry_run_session = _dry_run_session(arguments, session)
+        phases = apply_manifest(manifest, session=dry_run_session or session,
+                                concurrency=int(arguments['--concurrency']))
+        return dry_run_session, phases
+
+    results, failed = _run_on_targets(targets, run)
+    for target, (session, phases) in results.items():
+        _print_target(target, targets)
+        failed = _print_phases(phases) or failed
+        if session is not None:
+            _print_result(None, session)
+    _print_stats(stats_sink)
+    if failed:
+        sys.exit(1)
+
+
+def _resume_command(argv):
     docstring = """AutoScaler
 
     Usage:
-        autoscaler_auto_scaling_group add <group_name>
-        autoscaler_auto_scaling_group edit <group_name>
+        autoscaler resume [<config_name>] [--concurrency=<n>] [--stats] [--region=<region>]... [--profile=<profile>]...
 
     Options:
-        -h --help     Show this screen.
+        -h --help            Show this screen.
+        --concurrency=<n>    Maximum number of concurrent API operations [default: 10].
+        --stats              Print API call counts and latencies when done.
+        --region=<region>    Region to work in, repeat to work in several at once.
+        --profile=<profile>  boto credentials profile to use, repeat to use several at once.
     """
-    arguments = docopt(docstring, argv=sys.argv[1:])
-    group_name = arguments['<group_name>']
+    arguments = _docopt(docstring, argv)
+    from .core import resume_edit
+
+    stats_sink = _add_stats_sink(arguments)
+    targets = _targets(arguments)
+
+    def run(target, session):
+        if session.journal is None:
+            return ["Launch config edits aren't journaled, there is nothing to resume"]
+        messages = []
+        logs = session.journal.pending(arguments['<config_name>'])
+        if not logs:
+            messages.append("No unfinished launch config edits")
+        for log in logs:
+            if resume_edit(log, session=session, concurrency=int(arguments['--concurrency'])):
+                messages.append("Finished editing launch config {}".format(log.name))
+            else:
+                messages.append("Edit of launch config {} stopped before making changes, "
+                                "run it again".format(log.name))
+        return messages
 
-    # Get current attributes or default
-    attributes = get_group_attributes_or_defaults(group_name)
-
-    # Loop through all attributes asking for input and adding to `attributes`
-    new_attributes = {}
-    for attr_name, attr_value in attributes.items():
-        if attr_name == 'availability_zones':
-            attr_value = ",".join(attr_value)
-        user_input = read_input("What {}?".format(attr_name), attr_value)
-        if attr_name == 'availability_zones':
-            user_input = [x.strip() for x in user_input.split(",")]
-        if attr_name == 'default_cooldown':
-            user_input = int(user_input)
-        user_input = None if user_input == "" else user_input
-        new_attributes[attr_name] = user_input
+    results, failed = _run_on_targets(targets, run)
+    for target, messages in results.items():
+        _print_target(target, targets)
+        for message in messages:
+            print(message)
+    _print_stats(stats_sink)
+    if failed:
+        sys.exit(1)
 
-    if arguments['add']:
-        add_auto_scaling_group(group_name, **new_attributes)
-        print("AutoScaling group {} created".format(group_name))
-    elif arguments['edit']:
-        edit_auto_scaling_group(group_name, **new_attributes)
-        print("AutoScaling group {} updated".format(group_name))
 
-def _parse_block_device_mappings(user_input):
+def _export_command(argv):
+    docstring = """AutoScaler
+
+    Usage:
+        autoscaler export [--format=<format>] [--output=<path>] [--gzip] [--stats] [--region=<region>]... [--profile=<profile>]...
+
+    Options:
+        -h --help            Show this screen.
+        --format=<format>    jsonl or csv [default: jsonl].
+        --output=<path>      File to write to instead of standard output. Compressed if it ends with .gz.
+                             With several regions or profiles, each is written to its own file
+                             named after it, like inventory.us-west-2.jsonl.
+        --gzip               Compress the output with gzip.
+        --stats              Print API call counts and latencies when done.
+        --region=<region>    Region to work in, repeat to work in several at once.
+        --profile=<profile>  boto credentials profile to use, repeat to use several at once.
     """
-    Parse block device mappings per AWS CLI tools syntax (modified to add IOPS)
+    arguments = _docopt(docstring, argv)
+    from .export import export_inventory, open_output
+
+    targets = _targets(arguments)
+    if len(targets) > 1 and not arguments['--output']:
+        sys.exit("Exporting several regions or profiles needs --output")
+    stats_sink = _add_stats_sink(arguments)
+
+    def run(target, session):
+        path = arguments['--output']
+        if len(targets) > 1:
+            path = _target_path(path, target)
+        stream = open_output(path, compress=arguments['--gzip'])
+        try:
+            return export_inventory(stream, format=arguments['--format'], session=session)
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+
+    _, failed = _run_on_targets(targets, run)
+    if stats_sink is not None:
+        from .stats import remove_sink
+        remove_sink(stats_sink)
+        # Keep the summary out of an export written to standard output
+        sys.stderr.write(stats_sink.summary() + "\n")
+    if failed:
+        sys.exit(1)
+
+
+def _restore_command(argv):
+    docstring = """AutoScaler
+
+    Usage:
+        autoscaler restore <snapshot> [--concurrency=<n>] [--dry-run] [--stats] [--region=<region>]... [--profile=<profile>]...
 
-    http://docs.aws.amazon.com/AWSEC2/latest/UserGuide/block-device-mapping-concepts.html
+    Options:
+        -h --help            Show this screen.
+        --concurrency=<n>    Maximum number of concurrent API operations [default: 10].
+        --dry-run            Show the API calls that would be made without making changes.
+        --stats              Print API call counts and latencies when done.
+        --region=<region>    Region to work in, repeat to work in several at once.
+        --profile=<profile>  boto credentials profile to use, repeat to use several at once.
+    """
+    arguments = _docopt(docstring, argv)
+    import threading
+    from .snapshot import load_snapshot, restore_snapshot
+
+    stats_sink = _add_stats_sink(arguments)
+    records = load_snapshot(arguments['<snapshot>'])
+    targets = _targets(arguments)
+    lock = threading.Lock()
+    done = [0]
+    past_tense = {'create': 'created', 'edit': 'edited'}
+
+    def run(target, session):
+        dry_run_session = _dry_run_session(arguments, session)
+        prefix = "{} ".format(target.label) if len(targets) > 1 else ""
+
+        def progress(phase_name, action, name, error):
+            with lock:
+                done[0] += 1
+                outcome = "failed to {}".format(action) if error else past_tense[action]
+                print("[{}] {}{}: {} {}".format(done[0], prefix, phase_name, outcome, name))
+
+        phases = restore_snapshot(records, session=dry_run_session or session,
+                                  concurrency=int(arguments['--concurrency']), progress=progress)
+        return dry_run_session, phases
+
+    results, failed = _run_on_targets(targets, run)
+    for target, (session, phases) in results.items():
+        _print_target(target, targets)
+        failed = _print_phases(phases) or failed
+        if session is not None:
+            _print_result(None, session)
+    _print_stats(stats_sink)
+    if failed:
+        sys.exit(1)
+
+
+def _rollout_ami_command(argv):
+    docstring = """AutoScaler
 
-    Syntax:
-    /dev/xvd[a-z]=[snapshot-id|ephemeral]:[size in GB]:[Delete on Term]:[IOPS]
-    - Leave inapplicable fields blank
-    - Delete on Termination defaults to True
-    - IOPS limits are not validated
-    - EBS sizing is not validated
+    Usage:
+        autoscaler rollout-ami --from=<image_id> --to=<image_id> [--versioned] [--concurrency=<n>] [--dry-run] [--stats] [--region=<region>]... [--profile=<profile>]...
 
-    Mount an Ephemeral Drive:
-    /dev/xvdb1=ephemeral0
+    Options:
+        -h --help            Show this screen.
+        --from=<image_id>    AMI to replace.
+        --to=<image_id>      AMI to replace it with.
+        --versioned          Move groups to the next version of each config, like web-v2,
+                             instead of keeping the config names.
+        --concurrency=<n>    Maximum number of concurrent API operations [default: 10].
+        --dry-run            Show the API calls that would be made without making changes.
+        --stats              Print API call counts and latencies when done.
+        --region=<region>    Region to work in, repeat to work in several at once.
+        --profile=<profile>  boto credentials profile to use, repeat to use several at once.
+    """
+    arguments = _docopt(docstring, argv)
+    from .core import rollout_ami
+
+    stats_sink = _add_stats_sink(arguments)
+    targets = _targets(arguments)
+
+    def run(target, session):
+        dry_run_session = _dry_run_session(arguments, session)
+        outcome = rollout_ami(arguments['--from'], arguments['--to'],
+                              session=dry_run_session or session,
+                              concurrency=int(arguments['--concurrency']),
+                              versioned=arguments['--versioned'])
+        return dry_run_session, outcome
+
+    results, failed = _run_on_targets(targets, run)
+    for target, (session, outcome) in results.items():
+        _print_target(target, targets)
+        failed = _print_outcome(outcome, "Launch config {} updated", session) or failed
+    _print_stats(stats_sink)
+    if failed:
+        sys.exit(1)
+
+
+def _capacity_command(argv):
+    docstring = """AutoScaler
 
-    Mount multiple Ephemeral Drives:
-    /dev/xvdb1=ephemeral0,/dev/xvdb2=ephemeral1
+    Usage:
+        autoscaler capacity set [<pattern>] [--tag=<key=value>]... [--min=<n>] [--max=<n>] [--desired=<n>] [--state=<path>] [--concurrency=<n>] [--dry-run] [--stats] [--region=<region>]... [--profile=<profile>]...
+        autoscaler capacity restore [<pattern>] [--state=<path>] [--concurrency=<n>] [--dry-run] [--stats] [--region=<region>]... [--profile=<profile>]...
 
-    Mount a Snapshot:
-    /dev/xvdp=snap-1234abcd
+    Options:
+        -h --help            Show this screen.
+        <pattern>            Only groups whose names match this shell pattern, like 'staging-*'.
+        --tag=<key=value>    Only groups with this tag, or with tag key whatever its value.
+                             Repeat to require several.
+        --min=<n>            Minimum size to set.
+        --max=<n>            Maximum size to set.
+        --desired=<n>        Desired capacity to set.
+        --state=<path>       File that the capacity of each group is recorded in before it's
+                             changed [default: ~/.cache/autoscaler/capacity.json]. Other
+                             regions and profiles get their own file, named after them.
+        --concurrency=<n>    Maximum number of concurrent API operations [default: 10].
+        --dry-run            Show the API calls that would be made without making changes.
+        --stats              Print API call counts and latencies when done.
+        --region=<region>    Region to work in, repeat to work in several at once.
+        --profile=<profile>  boto credentials profile to use, repeat to use several at once.
+    """
+    arguments = _docopt(docstring, argv)
+    from .capacity import restore_capacity, select_groups, set_capacity
+    from .targets import DEFAULT_TARGET
+
+    pattern = arguments['<pattern>']
+    capacity = OrderedDict()
+    for option, attr_name in [('--min', 'min_size'), ('--max', 'max_size'),
+                              ('--desired', 'desired_capacity')]:
+        if arguments[option] is not None:
+            capacity[attr_name] = int(arguments[option])
+    if arguments['set']:
+        if pattern is None and not arguments['--tag']:
+            sys.exit("Select groups with a name pattern or --tag")
+        if not capacity:
+            sys.exit("Set at least one of --min, --max and --desired")
+    tags = {}
+    for tag in arguments['--tag']:
+        key, equals, value = tag.partition("=")
+        tags[key] = value if equals else None
+    stats_sink = _add_stats_sink(arguments)
+    targets = _targets(arguments)
+
+    def run(target, session):
+        dry_run_session = _dry_run_session(arguments, session)
+        session = dry_run_session or session
+        state_path = arguments['--state']
+        if target != DEFAULT_TARGET:
+            state_path = _target_path(os.path.expanduser(state_path), target)
+        concurrency = int(arguments['--concurrency'])
+        if arguments['set']:
+            groups = select_groups(pattern, tags, session=session)
+            outcome = set_capacity(groups, state_path=state_path, session=session,
+                                   concurrency=concurrency, **capacity)
+        else:
+            outcome = restore_capacity(state_path=state_path, pattern=pattern, session=session,
+                                       concurrency=concurrency)
+        return dry_run_session, outcome
 
-    Mount a Snapshot to a 100GB drive:
-    /dev/xvdp=snap-1234abcd:100
+    results, failed = _run_on_targets(targets, run)
+    for target, (session, outcome) in results.items():
+        _print_target(target, targets)
+        failed = _print_outcome(outcome, "AutoScaling group {} updated", session) or failed
+    _print_stats(stats_sink)
+    if failed:
+        sys.exit(1)
 
-    Mount a Snapshot to a 100GB drive and do not delete on termination:
-    /dev/xvdp=snap-1234abcd:100:false
 
-    Mount a Fresh 100GB EBS device
-    /dev/xvdp=:100
+def _serve_command(argv):
+    docstring = """AutoScaler
 
-    Mount a Fresh 100GB EBS Device and do not delete on termination:
-    /dev/xvdp=:100:false
+    Usage:
+        autoscaler serve [--socket=<path>] [--refresh=<seconds>]
 
-    Mount a Fresh 100GB EBS Device with 1000 IOPS
-    /dev/xvdp=:100::1000
+    Options:
+        -h --help              Show this screen.
+        --socket=<path>        Unix socket to listen on, instead of $AUTOSCALER_SOCKET or
+                               ~/.cache/autoscaler/daemon.sock.
+        --refresh=<seconds>    How often to describe everything into the inventory [default: 60].
     """
-    block_device_map = BlockDeviceMapping()
-    mappings = user_input.split(",")
-    for mapping in mappings:
-        block_type = BlockDeviceType()
-        mount_point, drive_type, size, delete, iops = _parse_drive_mapping(mapping)
-        if 'ephemeral' in drive_type:
-            block_type.ephemeral_name = drive_type
-        elif 'snap' in drive_type:
-            block_type.snapshot_id = drive_type
-            block_type.volume_type = "standard"
-        else:
-            block_type.volume_type = "standard"
-        block_type.size = size
-        block_type.delete_on_termination = delete
+    arguments = _docopt(docstring, argv)
+    from .daemon import Daemon
 
-        if iops:
-            block_type.iops = iops
-            block_type.volume_type = "io1"
+    daemon = Daemon(arguments['--socket'], refresh_interval=float(arguments['--refresh']))
+    print("Listening on {}".format(daemon.path))
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
 
-        block_device_map[mount_point] = block_type
-    return block_device_map
 
-def _parse_drive_mapping(mapping):
-    mount_point, drive = mapping.split("=")
-    drive_details = drive.split(":")
+COMMANDS = OrderedDict([
+    ('launch-config', _launch_config_command),
+    ('auto-scaling-group', _autoscaling_group_command),
+    ('apply', _apply_command),
+    ('resume', _resume_command),
+    ('export', _export_command),
+    ('restore', _restore_command),
+    ('rollout-ami', _rollout_ami_command),
+    ('capacity', _capacity_command),
+    ('serve', _serve_command),
+])
 
-    drive_type = safe_list_get(drive_details, 0, '')
-    size = safe_list_get(drive_details, 1, None)
-    delete = safe_list_get(drive_details, 2, "true")
-    iops = safe_list_get(drive_details, 3, None)
 
-    if size:
-        size = int(size)
-    else:
-        size = None
+def dispatch(argv):
+    """
+    Run the `autoscaler` command in `argv`, which doesn't include the
+    program name
+    """
+    docstring = """AutoScaler
 
-    if delete.lower() == 'false':
-        delete = False
-    else:
-        delete = True
+    Usage:
+        autoscaler <command> [<args>...]
+
+    Commands:
+        launch-config        Add or edit a launch configuration
+        auto-scaling-group   Add or edit an AutoScaling group
+        apply                Bring launch configs and groups in line with a manifest
+        resume               Finish launch config edits that were interrupted
+        export               Write every launch config and group as JSON Lines or CSV
+        restore              Recreate the launch configs and groups of an export
+        rollout-ami          Replace an AMI in every launch config that uses it
+        capacity             Scale groups to new sizes and back again
+        serve                Keep connections and the inventory warm for other commands
 
-    if iops:
-        iops = int(iops)
-    else:
-        iops = None
+    Options:
+        -h --help     Show this screen.
 
-    return mount_point, drive_type, size, delete, iops
+    See 'autoscaler <command> --help' for the options of each command.
+    """
+    from docopt import docopt
+    arguments = docopt(docstring, argv=argv, options_first=True)
+    command = COMMANDS.get(arguments['<command>'])
+    if command is not None:
+        command([arguments['<command>']] + arguments['<args>'])
+    else:
+        sys.exit("Unknown command {}, see 'autoscaler --help'".format(arguments['<command>']))
+
+
+def main():
+    argv = sys.argv[1:]
+    if not _forward(argv):
+        dispatch(argv)
+
+
+def _forwardable(argv):
+    # Commands that need a terminal (the prompts), binary standard output
+    # (a gzipped export) or a health check function importable from the
+    # caller's environment rather than the daemon's run in-process
+    command = argv[0] if argv else None
+    if any(arg.startswith('--health-check') for arg in argv):
+        return False
+    if command in ('launch-config', 'auto-scaling-group'):
+        return any(arg == '--batch' or arg.startswith('--set') for arg in argv)
+    if command == 'export':
+        return any(arg.startswith('--output') for arg in argv)
+    return command in ('apply', 'resume', 'restore', 'rollout-ami', 'capacity')
+
+
+def _forward(argv):
+    # Hand the command to a running `autoscaler serve`. Returns whether it
+    # did.
+    from .daemon import NO_DAEMON_ENV, Client
+
+    if os.environ.get(NO_DAEMON_ENV) or not _forwardable(argv):
+        return False
+    client = Client()
+    if not client.available():
+        return False
+    stdin = sys.stdin.read() if '--batch' in argv else None
+    status, output = client.run(argv, stdin=stdin)
+    sys.stdout.write(output)
+    if status:
+        sys.exit(status)
+    return True
+
+
+def _add_stats_sink(arguments):
+    if not arguments['--stats']:
+        return None
+    from .stats import MemorySink, add_sink
+    return add_sink(MemorySink())
+
+
+def _parse_config_value(attr_name, value):
+    # Convert a launch config attribute typed at a prompt, given with --set
+    # or read from a batch
+    if not isinstance(value, string_types):
+        if attr_name == 'block_device_mappings' and isinstance(value, dict):
+            # As written by `autoscaler export`
+            from .export import deserialize_block_device_mappings
+            return [deserialize_block_device_mappings(value)]
+        return value
+    if attr_name == 'security_groups':
+        value = [x.strip() for x in value.split(",")]
+    if attr_name in ['instance_monitoring', 'ebs_optimized', 'associate_public_ip_address']:
+        if value.lower() in ['yes', 'y', 'true']:
+            value = True
+        elif value.lower() in ['no', 'n', 'false']:
+            value = False
+    if attr_name == 'block_device_mappings':
+        if value:
+            from .parsers import parse_block_device_mappings
+            value = [parse_block_device_mappings(value)]
+    return None if value == "" else value
+
+
+def _parse_group_value(attr_name, value):
+    # Convert a group attribute typed at a prompt, given with --set or read
+    # from a batch
+    if not isinstance(value, string_types):
+        return value
+    if attr_name == 'availability_zones':
+        value = [x.strip() for x in value.split(",")]
+    if attr_name in ['load_balancers', 'termination_policies']:
+        value = [x.strip() for x in value.split(",") if x.strip()]
+    if attr_name == 'default_cooldown':
+        value = int(value)
+    return None if value == "" else value
+
+
+def _parse_attributes(attributes, attr_names, parse_value):
+    unknown = sorted(set(attributes) - set(attr_names))
+    if unknown:
+        from .exceptions import AutoScalerException
+        raise AutoScalerException("Unknown attributes {}, use {}".format(
+            ", ".join(unknown), ", ".join(attr_names)))
+    return dict((attr_name, parse_value(attr_name, value)) for attr_name, value in attributes.items())
+
+
+def _parse_settings(settings, attr_names, parse_value):
+    # Turn --set attr=value options into attributes
+    attributes = OrderedDict()
+    for setting in settings:
+        attr_name, equals, value = setting.partition("=")
+        if not equals:
+            from .exceptions import AutoScalerException
+            raise AutoScalerException("--set takes attr=value, not {}".format(setting))
+        attributes[attr_name.strip()] = value
+    return _parse_attributes(attributes, attr_names, parse_value)
+
+
+def _read_batch(stream, attr_names, parse_value):
+    """
+    Read one JSON object per line of `stream` and return its (name,
+    attributes) pairs
+    """
+    from .exceptions import AutoScalerException
 
+    objects = []
+    names = set()
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            attributes = json.loads(line)
+        except ValueError:
+            raise AutoScalerException("Line {} of the batch isn't a JSON object".format(number))
+        name = attributes.pop('name', None)
+        if not name:
+            raise AutoScalerException("Line {} of the batch has no name".format(number))
+        if name in names:
+            raise AutoScalerException("{} is in the batch more than once".format(name))
+        names.add(name)
+        objects.append((name, _parse_attributes(attributes, attr_names, parse_value)))
+    return objects
+
+
+def _run_batch(arguments, targets, operation, objects, message, prefetch=None):
+    """
+    Call `operation` for every (name, attributes) of a batch, concurrently
+    within each target, and print the outcomes. Returns whether any failed.
 
-def safe_list_get(l, idx, default):
+    `prefetch`, if given, is called as prefetch(names, session, concurrency)
+    before the batch runs and returns a dict of name -> extra keyword
+    arguments for `operation`.
+    """
+    from .concurrency import run_concurrently
+    concurrency = int(arguments['--concurrency'])
+
+    def run(target, session):
+        dry_run_session = _dry_run_session(arguments, session)
+        session = dry_run_session or session
+        extra = {}
+        if prefetch is not None:
+            extra = prefetch([name for name, _ in objects], session, concurrency)
+
+        def call(item):
+            name, attributes = item
+            operation(name, session=session, **dict(attributes, **extra.get(name, {})))
+
+        outcome = run_concurrently(call, objects, key=lambda item: item[0],
+                                   concurrency=concurrency)
+        return dry_run_session, outcome
+
+    results, failed = _run_on_targets(targets, run)
+    for target, (session, outcome) in results.items():
+        _print_target(target, targets)
+        failed = _print_outcome(outcome, message, session) or failed
+    return failed
+
+
+def _load_function(spec):
+    # Import `function` from `module` for a module:function option
+    import importlib
+    from .exceptions import AutoScalerException
+
+    module_name, colon, function_name = spec.partition(":")
+    if not colon or not module_name or not function_name:
+        raise AutoScalerException("Expected module:function, not {}".format(spec))
     try:
-        return l[idx]
-    except IndexError:
-        return default
+        return getattr(importlib.import_module(module_name), function_name)
+    except (ImportError, AttributeError) as exc:
+        raise AutoScalerException("Can't load {}: {}".format(spec, exc))
+
+
+def _targets(arguments):
+    from .targets import parse_targets
+    return parse_targets(arguments['--region'], arguments['--profile'])
+
+
+def _dry_run_session(arguments, session):
+    # A DryRunSession over `session` for --dry-run, otherwise None
+    if not arguments['--dry-run']:
+        return None
+    from .plan import DryRunSession
+    return DryRunSession(session)
+
+
+def _run_on_targets(targets, func):
+    """
+    Call `func(target, session)` for every target at once. Returns the
+    results by target and whether any target failed, printing the failures.
+    A single target's error is raised instead.
+    """
+    from .concurrency import run_concurrently
+    from .targets import get_target_session
+
+    if len(targets) == 1:
+        target = targets[0]
+        return OrderedDict([(target, func(target, get_target_session(target)))]), False
+    outcome = run_concurrently(lambda target: func(target, get_target_session(target)),
+                               targets, concurrency=len(targets))
+    for target, error in outcome.failed.items():
+        print("{} failed: {}".format(target.label, error))
+    return outcome.succeeded, bool(outcome.failed)
+
+
+def _print_target(target, targets):
+    if len(targets) > 1:
+        print("{}:".format(target.label))
+
+
+def _target_path(path, target):
+    # inventory.jsonl.gz becomes inventory.us-west-2.jsonl.gz
+    directory, file_name = os.path.split(path)
+    stem, dot, extensions = file_name.partition('.')
+    return os.path.join(directory, "{}.{}{}{}".format(stem, target.slug, dot, extensions))
+
+
+def _print_outcome(outcome, message, session):
+    # Print what happened to each item of a BatchResult, or the plan of a
+    # dry run. Returns whether anything failed.
+    if session is None:
+        for name in outcome.succeeded:
+            print(message.format(name))
+    for name, error in outcome.failed.items():
+        print("{} failed: {}".format(name, error))
+    print("{} succeeded, {} failed".format(len(outcome.succeeded), len(outcome.failed)))
+    if session is not None:
+        _print_result(None, session)
+    return bool(outcome.failed)
+
+
+def _print_phases(phases):
+    # Returns whether anything failed
+    failed = False
+    for phase in phases:
+        print(phase.summary())
+        for name, error in phase.failed.items():
+            failed = True
+            print("  {} failed: {}".format(name, error))
+    return failed
+
+
+def _print_result(message, session):
+    if session is None:
+        print(message)
+        return
+    print("Dry run, no changes were made")
+    print(session.plan.report(session.throttler.max_rate))
+
+
+def _print_stats(sink):
+    if sink is None:
+        return
+    from .stats import remove_sink
+    remove_sink(sink)
+    print(sink.summary())
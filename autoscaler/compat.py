@@ -0,0 +1,8 @@
+import sys
+
+try:
+    string_types = basestring
+except NameError:  # pragma: no cover
+    string_types = str
+
+PY2 = sys.version_info[0] == 2
@@ -0,0 +1,56 @@
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+
+from .stats import current_phase, use_phase
+
+DEFAULT_CONCURRENCY = 10
+
+
+class BatchResult(object):
+    """
+    Outcome of running an operation over many items. `succeeded` maps each
+    item's key to its return value and `failed` maps it to the exception.
+    """
+
+    def __init__(self):
+        self.succeeded = OrderedDict()
+        self.failed = OrderedDict()
+
+    def __repr__(self):
+        return "<BatchResult succeeded={} failed={}>".format(len(self.succeeded), len(self.failed))
+
+
+def run_concurrently(func, items, key=None, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Call `func` on every item with at most `concurrency` calls in flight and
+    return once all of them have finished.
+    """
+    items = list(items)
+    if key is None:
+        key = lambda item: item  # noqa
+    result = BatchResult()
+    phase = current_phase()
+
+    def call(item):
+        try:
+            with use_phase(phase):
+                return True, func(item)
+        except Exception as exc:
+            return False, exc
+
+    if concurrency <= 1 or len(items) <= 1:
+        outcomes = [call(item) for item in items]
+    else:
+        pool = ThreadPool(processes=min(concurrency, len(items)))
+        try:
+            outcomes = pool.map(call, items)
+        finally:
+            pool.close()
+            pool.join()
+
+    for item, (succeeded, value) in zip(items, outcomes):
+        if succeeded:
+            result.succeeded[key(item)] = value
+        else:
+            result.failed[key(item)] = value
+    return result
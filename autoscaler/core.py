@@ -1,13 +1,29 @@
 import copy
+import math
+import re
+import threading
+
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from multiprocessing.pool import ThreadPool
 
-from collections import OrderedDict
-import boto
 from boto.ec2.autoscale.group import AutoScalingGroup
 from boto.ec2.autoscale.launchconfig import LaunchConfiguration
 
-from .exceptions import AutoScalerException
+from .cache import GROUP, LAUNCH_CONFIG, MISSING
+from .compat import string_types
+from .concurrency import DEFAULT_CONCURRENCY, run_concurrently
+from .diff import diff_attributes, diff_group, update_group
+from .exceptions import AutoScalerException, GroupUpdateError, HealthCheckError
+from .journal import create_step, delete_step, reassign_step
+from .session import get_session
+from .stats import phase
 
 DEFAULT_CONFIG_NAME = 'autoscaler_default'
+VERSION_SEPARATOR = '-v'
+VERSIONED_NAME_RE = re.compile(r'^(.+){}(\d+)$'.format(re.escape(VERSION_SEPARATOR)))
+# Most names the Describe APIs accept in one request
+DESCRIBE_BATCH_SIZE = 50
 launch_config_attrs = [
     "image_id", "key_name", "security_groups", "user_data", "instance_type",
     "kernel_id", "ramdisk_id", "block_device_mappings", "instance_monitoring",
@@ -32,23 +48,195 @@ for attr_name in autoscaling_group_attrs:
     empty_group_attrs[attr_name] = ""
 
 
-def update_all_groups(old_name, new_name):
-    groups = groups_for_token(token=None)
-    for group in groups:
-        if group.launch_config_name == old_name:
+class LaunchConfigIndex(object):
+    """
+    AutoScaling groups keyed by the name of the launch configuration they
+    use, built from a single paginated pass over every group.
+    """
+
+    def __init__(self, groups=()):
+        self._groups = defaultdict(OrderedDict)
+        self._lock = threading.RLock()
+        for group in groups:
+            self.add(group)
+
+    @classmethod
+    def build(cls, session=None, **kwargs):
+        return cls(iter_groups(session=session, **kwargs))
+
+    def add(self, group):
+        with self._lock:
+            self._groups[group.launch_config_name][group.name] = group
+
+    def groups_for(self, config_name):
+        with self._lock:
+            return list(self._groups.get(config_name, {}).values())
+
+    def config_names(self):
+        with self._lock:
+            return [name for name, groups in self._groups.items() if groups]
+
+    def move(self, group, new_name):
+        with self._lock:
+            old_groups = self._groups.get(group.launch_config_name)
+            if old_groups is not None:
+                old_groups.pop(group.name, None)
             group.launch_config_name = new_name
-            group.update()
+            self.add(group)
 
 
-def groups_for_token(token):
-    groups = []
+def update_all_groups(old_name, new_name, session=None, index=None,
+                      concurrency=DEFAULT_CONCURRENCY):
+    session = get_session(session)
+    if index is None:
+        index = LaunchConfigIndex.build(session=session)
+    return _move_groups(index.groups_for(old_name), old_name, new_name, session, index,
+                        concurrency)
 
-    conn = boto.connect_autoscale(use_block_device_types=True)
-    groups_iter = conn.get_all_groups(next_token=token)
-    groups.extend(groups_iter)
-    if groups_iter.next_token:
-        groups.extend(groups_for_token(groups_iter.next_token))
-    return groups
+
+def _move_groups(groups, old_name, new_name, session, index, concurrency):
+    for group in groups:
+        index.move(group, new_name)
+    # Only send the launch config. The rest of each group was described
+    # before the edit started and may have changed since (capacity, most of
+    # all), so updating the whole group would put the old values back.
+    changes = OrderedDict([('launch_config_name', (old_name, new_name))])
+
+    def reassign(group):
+        with session.connection() as conn:
+            update_group(conn, group.name, changes)
+
+    result = run_concurrently(reassign, groups, key=lambda group: group.name,
+                              concurrency=concurrency)
+    _invalidate(session, GROUP, *[group.name for group in groups])
+    for group in groups:
+        if group.name in result.failed:
+            index.move(group, old_name)
+    return result
+
+
+def wave_sizes(total, waves):
+    """
+    Split `total` groups into waves. Each of `waves` is a number of groups
+    or a percentage of all of them like '10%', and a last wave takes
+    whatever is left.
+    """
+    sizes = []
+    remaining = total
+    for wave in waves or ():
+        if not remaining:
+            break
+        if isinstance(wave, string_types) and wave.strip().endswith('%'):
+            size = int(math.ceil(total * float(wave.strip()[:-1]) / 100))
+        else:
+            size = int(wave)
+        size = min(max(size, 1), remaining)
+        sizes.append(size)
+        remaining -= size
+    if remaining:
+        sizes.append(remaining)
+    return sizes
+
+
+def _reassign_in_waves(old_name, new_name, session, index, concurrency, waves,
+                       health_check, log):
+    # Moves the groups a wave at a time, calling health_check(group_names)
+    # after each. If it returns something false or raises, every group moved
+    # so far goes back to old_name, new_name is deleted and the edit is over.
+    groups = index.groups_for(old_name)
+    moved = []
+    for size in wave_sizes(len(groups), waves):
+        wave = groups[len(moved):len(moved) + size]
+        result = _move_groups(wave, old_name, new_name, session, index, concurrency)
+        moved.extend(wave)
+        _check_group_updates(result, old_name, new_name)
+        if health_check is None:
+            continue
+        group_names = [group.name for group in wave]
+        try:
+            healthy = health_check(group_names)
+            reason = "returned {}".format(healthy)
+        except Exception as exc:
+            healthy = False
+            reason = "raised {}".format(exc)
+        if healthy:
+            continue
+
+        # Journal the rollback first, so that resuming it doesn't finish
+        # the edit instead
+        if log is not None:
+            log.rewrite([
+                reassign_step(new_name, old_name, [group.name for group in moved]),
+                delete_step(new_name),
+            ])
+        with _step(log, 0):
+            result = _move_groups(moved, new_name, old_name, session, index, concurrency)
+            _check_group_updates(result, new_name, old_name)
+        with _step(log, 1), phase('delete'):
+            _delete_launch_config(session, new_name)
+        _finish_edit(log)
+        raise HealthCheckError(
+            "Health check {} after moving {} to {}, moved {} groups back to {}".format(
+                reason, ", ".join(group_names), new_name, len(moved), old_name),
+            group_names,
+        )
+
+
+def _check_group_updates(result, old_name, new_name):
+    if result.failed:
+        raise GroupUpdateError(
+            "Failed to move groups {} from {} to {}".format(
+                ", ".join(result.failed), old_name, new_name),
+            result,
+        )
+
+
+def iter_pages(fetch, token=None, prefetch=False):
+    """
+    Yield pages from `fetch(next_token)` until there is no next token.
+
+    With `prefetch`, the next page is requested in a background thread while
+    the caller is still working through the current one.
+    """
+    pool = ThreadPool(processes=1) if prefetch else None
+    try:
+        page = fetch(token)
+        while True:
+            token = page.next_token
+            pending = None
+            if pool is not None and token:
+                pending = pool.apply_async(fetch, (token,))
+            yield page
+            if not token:
+                return
+            page = pending.get() if pending is not None else fetch(token)
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+
+def iter_groups(session=None, page_size=None, prefetch=False, token=None):
+    with get_session(session).connection() as conn:
+        def fetch(next_token):
+            return conn.get_all_groups(max_records=page_size, next_token=next_token)
+
+        for page in iter_pages(fetch, token=token, prefetch=prefetch):
+            for group in page:
+                yield group
+
+
+def iter_launch_configs(session=None, page_size=None, prefetch=False, token=None):
+    with get_session(session).connection() as conn:
+        def fetch(next_token):
+            return conn.get_all_launch_configurations(max_records=page_size, next_token=next_token)
+
+        for page in iter_pages(fetch, token=token, prefetch=prefetch):
+            for config in page:
+                yield config
+
+
+def groups_for_token(token, session=None):
+    return list(iter_groups(session=session, token=token))
 
 
 def attrs_from_config(config):
@@ -58,59 +246,361 @@ def attrs_from_config(config):
     return default_attrs
 
 
-def get_config_attributes_or_defaults(config_name):
-    # Get current attributes or default
-    attributes = get_config_values(config_name)
+def get_config_attributes_or_defaults(config_name, session=None):
+    # Get current attributes or default, describing both in one call
+    configs = get_config_values_many([config_name, DEFAULT_CONFIG_NAME], session=session)
+    attributes = configs[config_name]
     if not any(attributes.values()):
-        attributes = get_config_values(DEFAULT_CONFIG_NAME)
+        attributes = configs[DEFAULT_CONFIG_NAME]
     return attributes
 
 
-def get_config_values(name):
-    conn = boto.connect_autoscale(use_block_device_types=True)
-    default_configs = conn.get_all_launch_configurations(names=[name])
-    if not default_configs:
-        return copy.deepcopy(empty_launch_config_attrs)
-    return attrs_from_config(default_configs[0])
-
-
-def add_launch_config(name, base=DEFAULT_CONFIG_NAME, **kwargs):
-    conn = boto.connect_autoscale(use_block_device_types=True)
-    attributes = get_config_values(base)
+def _invalidate(session, kind, *names):
+    inventory = getattr(session, 'inventory', None)
+    if inventory is not None and names:
+        inventory.invalidate(kind, *names)
+    bases = getattr(session, 'bases', None)
+    if bases is not None and kind == LAUNCH_CONFIG:
+        bases.invalidate(*names)
+
+
+def _describe_many(session, kind, names, describe, to_attrs, concurrency=DEFAULT_CONCURRENCY):
+    # Return an OrderedDict of name -> attributes, or None for names that
+    # don't exist, going through the session's inventory when it has one.
+    # Names that aren't cached are described DESCRIBE_BATCH_SIZE at a time.
+    inventory = getattr(session, 'inventory', None)
+    found = OrderedDict((name, None) for name in names)
+    uncached = []
+    for name in found:
+        attributes = inventory.get(kind, name) if inventory is not None else None
+        if attributes is None:
+            uncached.append(name)
+        elif attributes is not MISSING:
+            found[name] = attributes
+
+    def fetch(batch):
+        with session.connection() as conn:
+            return describe(conn, list(batch))
+
+    batches = [tuple(uncached[start:start + DESCRIBE_BATCH_SIZE])
+               for start in range(0, len(uncached), DESCRIBE_BATCH_SIZE)]
+    described_at = inventory.now() if inventory is not None else None
+    result = run_concurrently(fetch, batches, concurrency=concurrency)
+    if result.failed:
+        raise list(result.failed.values())[0]
+    for batch, described in result.succeeded.items():
+        described = dict((item.name, to_attrs(item)) for item in described)
+        for name in batch:
+            found[name] = described.get(name)
+            if inventory is not None:
+                inventory.put(kind, name, MISSING if found[name] is None else found[name],
+                              described_at=described_at)
+    return found
+
+
+# Both APIs return up to DESCRIBE_BATCH_SIZE records per page by default
+def _describe_configs(conn, names):
+    return conn.get_all_launch_configurations(names=names)
+
+
+def _describe_groups(conn, names):
+    return conn.get_all_groups(names=names)
+
+
+def get_config_values(name, session=None):
+    return get_config_values_many([name], session=session)[name]
+
+
+def get_config_values_many(names, session=None, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Return an OrderedDict of name -> launch config attributes for every name
+    in `names`, with blank attributes for the ones that don't exist.
+    """
+    configs = _describe_many(get_session(session), LAUNCH_CONFIG, names,
+                             _describe_configs, attrs_from_config, concurrency)
+    for name, attributes in configs.items():
+        if attributes is None:
+            configs[name] = copy.deepcopy(empty_launch_config_attrs)
+    return configs
+
+
+def resolve_base(base, session=None):
+    """
+    Return the attributes of base launch config `base`, memoized on the
+    session. No base (None) resolves to empty attributes without describing
+    anything.
+    """
+    session = get_session(session)
+
+    def describe(name):
+        if name is None:
+            return copy.deepcopy(empty_launch_config_attrs)
+        return get_config_values(name, session=session)
+
+    bases = getattr(session, 'bases', None)
+    if bases is None:
+        return describe(base)
+    return bases.resolve(base, describe)
+
+
+def add_launch_config(name, base=DEFAULT_CONFIG_NAME, session=None, **kwargs):
+    session = get_session(session)
+    attributes = resolve_base(base, session=session)
     attributes.update(kwargs)
     attributes['name'] = name
     config = LaunchConfiguration(**attributes)
-    conn.create_launch_configuration(config)
+    with session.connection() as conn:
+        conn.create_launch_configuration(config)
+    _invalidate(session, LAUNCH_CONFIG, name)
     return config
 
 
-def edit_launch_config(name, **kwargs):
-    conn = boto.connect_autoscale(use_block_device_types=True)
-    configs = conn.get_all_launch_configurations(names=[name])
+def _delete_launch_config(session, name):
+    with session.connection() as conn:
+        conn.delete_launch_configuration(name)
+    _invalidate(session, LAUNCH_CONFIG, name)
+
+
+def versioned_name(name, version):
+    return "{}{}{}".format(name, VERSION_SEPARATOR, version)
+
+
+def parse_versioned_name(name):
+    """
+    Split `web-v7` into ('web', 7). Names without a version return
+    (name, None).
+    """
+    match = VERSIONED_NAME_RE.match(name)
+    if not match:
+        return name, None
+    return match.group(1), int(match.group(2))
+
+
+def resolve_launch_config_name(name, session=None):
+    """
+    Return the name of the launch configuration currently backing the
+    logical name `name`: either `name` itself or its highest `name-vN`.
+    """
+    session = get_session(session)
+    with session.connection() as conn:
+        if conn.get_all_launch_configurations(names=[name]):
+            return name
+    versions = []
+    for config in iter_launch_configs(session=session):
+        logical_name, version = parse_versioned_name(config.name)
+        if logical_name == name and version is not None:
+            versions.append((version, config.name))
+    if not versions:
+        raise AutoScalerException("No launch configuration could be found for %s", name)
+    return max(versions)[1]
+
+
+def edit_launch_config(name, session=None, concurrency=DEFAULT_CONCURRENCY,
+                       versioned=False, index=None, waves=None, health_check=None, **kwargs):
+    """
+    Change attributes of launch config `name` and move its groups onto the
+    result.
+
+    With `waves` (see `wave_sizes`) the groups are first moved onto the new
+    attributes a wave at a time, and `health_check(group_names)` is called
+    after each wave. A false result or an exception moves the groups back,
+    drops the change and raises HealthCheckError.
+    """
+    session = get_session(session)
+    with phase('describe'):
+        if versioned:
+            name = resolve_launch_config_name(name, session=session)
+        with session.connection() as conn:
+            configs = conn.get_all_launch_configurations(names=[name])
     if not configs:
         raise AutoScalerException("No launch configuration could be found for %s", name)
-    config = configs[0]
-    temp_name = "{}-autoscaler-temp".format(name)
-    config_attrs = attrs_from_config(config)
+    new_config = _edit_launch_config(name, attrs_from_config(configs[0]), session, concurrency,
+                                     versioned, index, kwargs, waves, health_check)
+    # An edit that changes nothing returns the config as it is
+    return new_config or configs[0]
+
+
+def _edit_launch_config(name, config_attrs, session, concurrency, versioned, index, kwargs,
+                        waves=None, health_check=None):
+    # Edit config `name` whose current attributes, as already described, are
+    # `config_attrs`. Returns the new config, or None if nothing changed.
+    if not diff_attributes(config_attrs, kwargs):
+        return None
+    # Every attribute comes from the config, so the new configs need no base
+    config_attrs = OrderedDict(config_attrs)
     config_attrs.update(kwargs)
 
-    # Create temp config and reassign groups to it
-    add_launch_config(temp_name, **config_attrs)
-    update_all_groups(name, temp_name)
+    if index is None:
+        with phase('describe'):
+            index = LaunchConfigIndex.build(session=session)
+    group_names = [group.name for group in index.groups_for(name)]
+
+    if versioned:
+        return _replace_launch_config(name, config_attrs, session, concurrency, index,
+                                      group_names, waves, health_check)
+
+    temp_name = "{}-autoscaler-temp".format(name)
+    log = _begin_edit(session, name, [
+        create_step(temp_name),
+        reassign_step(name, temp_name, group_names),
+        delete_step(name),
+        create_step(name, base=temp_name),
+        reassign_step(temp_name, name, group_names),
+        delete_step(temp_name),
+    ])
+
+    # Create temp config and reassign groups to it, in waves if asked to
+    with _step(log, 0), phase('create'):
+        add_launch_config(temp_name, base=None, session=session, **config_attrs)
+    with _step(log, 1), phase('reassign'):
+        _reassign_in_waves(name, temp_name, session, index, concurrency, waves,
+                           health_check, log)
 
     # Delete the old config
-    conn.delete_launch_configuration(name)
+    with _step(log, 2), phase('delete'):
+        _delete_launch_config(session, name)
 
     # Create new config with the original name and reassign groups
-    new_config = add_launch_config(name, **config_attrs)
-    update_all_groups(temp_name, name)
+    with _step(log, 3), phase('create'):
+        new_config = add_launch_config(name, base=None, session=session, **config_attrs)
+    with _step(log, 4), phase('reassign'):
+        result = update_all_groups(temp_name, name, session=session, index=index,
+                                   concurrency=concurrency)
+    _check_group_updates(result, temp_name, name)
 
     # Delete the temp config
-    conn.delete_launch_configuration(temp_name)
+    with _step(log, 5), phase('delete'):
+        _delete_launch_config(session, temp_name)
 
+    _finish_edit(log)
     return new_config
 
 
+def _replace_launch_config(name, config_attrs, session, concurrency, index, group_names,
+                           waves, health_check):
+    # Create the next version of the config, move groups over once and then
+    # delete the previous version
+    logical_name, version = parse_versioned_name(name)
+    new_name = versioned_name(logical_name, (version or 0) + 1)
+    log = _begin_edit(session, name, [
+        create_step(new_name),
+        reassign_step(name, new_name, group_names),
+        delete_step(name),
+    ])
+
+    with _step(log, 0), phase('create'):
+        new_config = add_launch_config(new_name, base=None, session=session, **config_attrs)
+    with _step(log, 1), phase('reassign'):
+        _reassign_in_waves(name, new_name, session, index, concurrency, waves,
+                           health_check, log)
+
+    with _step(log, 2), phase('delete'):
+        _delete_launch_config(session, name)
+
+    _finish_edit(log)
+    return new_config
+
+
+def rollout_ami(old_image_id, new_image_id, session=None, concurrency=DEFAULT_CONCURRENCY,
+                versioned=False):
+    """
+    Replace `old_image_id` with `new_image_id` in every launch config that
+    uses it, editing up to `concurrency` configs at once.
+
+    The launch configs and the groups are each described once however many
+    configs use the image. Returns a `BatchResult` keyed by config name.
+    """
+    session = get_session(session)
+    with phase('describe'):
+        # Configs left over from an interrupted edit are for `resume_edit`
+        configs = [config for config in iter_launch_configs(session=session)
+                   if config.image_id == old_image_id
+                   and not config.name.endswith("-autoscaler-temp")]
+        index = LaunchConfigIndex.build(session=session) if configs else None
+
+    def edit(config):
+        # The configs are already edited `concurrency` at a time, so each
+        # moves its groups one at a time to keep within that
+        return _edit_launch_config(config.name, attrs_from_config(config), session,
+                                   1, versioned, index,
+                                   {'image_id': new_image_id})
+
+    return run_concurrently(edit, configs, key=lambda config: config.name,
+                            concurrency=concurrency)
+
+
+def _begin_edit(session, name, steps):
+    journal = getattr(session, 'journal', None)
+    if journal is None:
+        return None
+    return journal.begin(name, steps)
+
+
+@contextmanager
+def _step(log, position):
+    # Journal the step before running it
+    if log is not None:
+        log.start(position)
+    yield
+
+
+def _finish_edit(log):
+    if log is not None:
+        log.finish()
+
+
+def _config_exists(session, name):
+    # Always asks AutoScaling, since the inventory may predate the crash
+    with session.connection() as conn:
+        return bool(conn.get_all_launch_configurations(names=[name]))
+
+
+def resume_edit(log, session=None, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Finish the launch config edit recorded in the journal `log`, or the
+    rollback of it that a failed health check started, replaying it from
+    the last step that was started with the group names it recorded.
+
+    Returns False if the edit stopped before changing anything, in which
+    case it is abandoned and has to be run again.
+    """
+    session = get_session(session)
+    position = log.started or 0
+    if position == 0 and log.steps[0]['action'] == 'create':
+        # The first step creates a config from attributes that weren't
+        # journaled, so it can only be skipped if it already happened
+        if not _config_exists(session, log.steps[0]['config']):
+            log.finish()
+            return False
+        position = 1
+
+    for position in range(position, len(log.steps)):
+        step = log.steps[position]
+        with _step(log, position), phase(step['action']):
+            if step['action'] == 'create':
+                if not _config_exists(session, step['config']):
+                    add_launch_config(step['config'], base=step['base'], session=session)
+            elif step['action'] == 'reassign':
+                _reassign_groups(step['groups'], step['from'], step['to'], session, concurrency)
+            elif step['action'] == 'delete':
+                if _config_exists(session, step['config']):
+                    _delete_launch_config(session, step['config'])
+    log.finish()
+    return True
+
+
+def _reassign_groups(group_names, old_name, new_name, session, concurrency):
+    changes = OrderedDict([('launch_config_name', (old_name, new_name))])
+
+    def reassign(group_name):
+        with session.connection() as conn:
+            update_group(conn, group_name, changes)
+
+    result = run_concurrently(reassign, group_names, concurrency=concurrency)
+    _invalidate(session, GROUP, *group_names)
+    _check_group_updates(result, old_name, new_name)
+
+
 def attrs_from_group(group):
     default_attrs = OrderedDict()
     for attr in autoscaling_group_attrs:
@@ -118,29 +608,83 @@ def attrs_from_group(group):
     return default_attrs
 
 
-def get_group_attributes_or_defaults(group_name):
-    conn = boto.connect_autoscale(use_block_device_types=True)
-    groups = conn.get_all_groups(names=[group_name])
-    if groups:
-        return attrs_from_group(groups[0])
+def get_group_attributes_or_defaults(group_name, session=None):
+    attributes = _describe_many(get_session(session), GROUP, [group_name],
+                                _describe_groups, attrs_from_group)[group_name]
+    if attributes is not None:
+        return attributes
     else:
         return empty_group_attrs
 
 
-def add_auto_scaling_group(name, **kwargs):
-    conn = boto.connect_autoscale(use_block_device_types=True)
+def get_groups_many(names, session=None, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Return an OrderedDict of name -> group attributes for every name in
+    `names`, with default attributes for the groups that don't exist.
+    """
+    groups = _describe_many(get_session(session), GROUP, names,
+                            _describe_groups, attrs_from_group, concurrency)
+    for name, attributes in groups.items():
+        if attributes is None:
+            groups[name] = copy.deepcopy(empty_group_attrs)
+    return groups
+
+
+def refresh_inventory(session=None, page_size=None):
+    """
+    Describe every launch config and group into the session's inventory,
+    a page at a time, and forget the bases resolved before, which other
+    processes may have changed since. Returns how many of each were cached.
+    """
+    session = get_session(session)
+    inventory = getattr(session, 'inventory', None)
+    if inventory is None:
+        raise AutoScalerException("The session has no inventory to refresh")
+    counts = OrderedDict([(LAUNCH_CONFIG, 0), (GROUP, 0)])
+    described_at = inventory.now()
+    for config in iter_launch_configs(session=session, page_size=page_size, prefetch=True):
+        inventory.put(LAUNCH_CONFIG, config.name, attrs_from_config(config), described_at=described_at)
+        counts[LAUNCH_CONFIG] += 1
+    for group in iter_groups(session=session, page_size=page_size, prefetch=True):
+        inventory.put(GROUP, group.name, attrs_from_group(group), described_at=described_at)
+        counts[GROUP] += 1
+    bases = getattr(session, 'bases', None)
+    if bases is not None:
+        bases.clear()
+    return counts
+
+
+def add_auto_scaling_group(name, session=None, **kwargs):
+    session = get_session(session)
     kwargs['name'] = name
     config = AutoScalingGroup(**kwargs)
-    conn.create_auto_scaling_group(config)
+    with session.connection() as conn:
+        conn.create_auto_scaling_group(config)
+    _invalidate(session, GROUP, name)
     return config
 
 
-def edit_auto_scaling_group(name, **kwargs):
-    conn = boto.connect_autoscale(use_block_device_types=True)
-    groups = conn.get_all_groups(names=[name])
-    if not groups:
-        raise AutoScalerException("No autoscaling groups could be found for %s", name)
-    group = groups[0]
-    for attr_name, attr_value in kwargs.items():
-        setattr(group, attr_name, attr_value)
-    group.update()
+def edit_auto_scaling_group(name, session=None, group=None, current=None, **kwargs):
+    """
+    Change attributes of group `name`. Pass the already described `group`,
+    or its `current` attributes from get_groups_many, to skip describing it
+    again. Returns the group, or None when only `current` was given.
+    """
+    session = get_session(session)
+    with session.connection() as conn:
+        if group is None and current is None:
+            groups = conn.get_all_groups(names=[name])
+            if not groups:
+                raise AutoScalerException("No autoscaling groups could be found for %s", name)
+            group = groups[0]
+        changes = diff_group(attrs_from_group(group) if current is None else current, kwargs)
+        if not changes:
+            return group
+        if group is not None:
+            for attr_name, (_, attr_value) in changes.items():
+                setattr(group, attr_name, attr_value)
+        update_group(conn, name, changes)
+    # Only once the update is made, or a describe in between would cache
+    # the group as it was
+    _invalidate(session, GROUP, name)
+    return group
@@ -0,0 +1,252 @@
+import json
+import os
+import socket
+import sys
+import threading
+import traceback
+
+try:
+    from SocketServer import StreamRequestHandler, ThreadingMixIn, UnixStreamServer
+except ImportError:  # pragma: no cover
+    from socketserver import StreamRequestHandler, ThreadingMixIn, UnixStreamServer
+
+try:
+    from StringIO import StringIO
+except ImportError:  # pragma: no cover
+    from io import StringIO
+
+from .exceptions import AutoScalerException
+
+# Only the client half of this module is used by every CLI call, so boto is
+# imported by the server alone
+
+SOCKET_ENV = 'AUTOSCALER_SOCKET'
+# Set to run commands in-process even when a daemon is running
+NO_DAEMON_ENV = 'AUTOSCALER_NO_DAEMON'
+DEFAULT_SOCKET_PATH = os.path.join('~', '.cache', 'autoscaler', 'daemon.sock')
+DEFAULT_REFRESH_INTERVAL = 60
+
+# Core functions a client may call by name
+OPERATIONS = [
+    'add_launch_config', 'edit_launch_config', 'add_auto_scaling_group',
+    'edit_auto_scaling_group', 'get_config_values_many', 'get_groups_many',
+    'resolve_launch_config_name',
+]
+
+
+def socket_path(path=None):
+    return os.path.expanduser(path or os.environ.get(SOCKET_ENV) or DEFAULT_SOCKET_PATH)
+
+
+class Client(object):
+    """
+    Talks to a running `autoscaler serve` over its Unix socket, one JSON
+    request and response per connection
+    """
+
+    def __init__(self, path=None):
+        self.path = socket_path(path)
+
+    def available(self):
+        if not os.path.exists(self.path):
+            return False
+        try:
+            self._request({'ping': True})
+        except (socket.error, ValueError):
+            return False
+        return True
+
+    def _request(self, request):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.path)
+            sock.sendall((json.dumps(request) + "\n").encode('utf-8'))
+            chunks = []
+            while not chunks or not chunks[-1].endswith(b"\n"):
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+            response = json.loads(b"".join(chunks).decode('utf-8'))
+        finally:
+            sock.close()
+        if 'error' in response:
+            raise AutoScalerException(response['error'])
+        return response
+
+    def call(self, operation, *args, **kwargs):
+        """
+        Run core function `operation` in the daemon and return its result as
+        JSON: launch configs and groups as `autoscaler export` records
+        """
+        return self._request({'operation': operation, 'args': args, 'kwargs': kwargs})['result']
+
+    def run(self, argv, stdin=None, cwd=None):
+        """
+        Run an `autoscaler` command in the daemon and return its exit status
+        and output
+        """
+        response = self._request({'argv': argv, 'stdin': stdin, 'cwd': cwd or os.getcwd()})
+        return response['status'], response['output']
+
+
+def _to_json(value):
+    from boto.ec2.autoscale.group import AutoScalingGroup
+    from boto.ec2.autoscale.launchconfig import LaunchConfiguration
+    from .export import _serialize, config_record, group_record
+
+    if isinstance(value, LaunchConfiguration):
+        return config_record(value)
+    if isinstance(value, AutoScalingGroup):
+        return group_record(value)
+    if isinstance(value, dict):
+        # name -> attributes from the bulk lookups
+        return dict((name, dict((attr_name, _serialize(attr_name, attr_value))
+                                for attr_name, attr_value in attributes.items()))
+                    for name, attributes in value.items())
+    return value
+
+
+class _Handler(StreamRequestHandler):
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline().decode('utf-8'))
+            response = self.server.autoscaler_daemon.handle(request)
+        except Exception as exc:
+            response = {'error': "{}: {}".format(type(exc).__name__, exc)}
+        self.wfile.write((json.dumps(response) + "\n").encode('utf-8'))
+
+
+class _Server(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+
+class Daemon(object):
+    """
+    Serves core operations and CLI commands from one process, so they share
+    warm connection pools and an inventory that is refreshed every
+    `refresh_interval` seconds in the background (never when None).
+
+    Operations run concurrently, but CLI commands run one at a time since
+    each takes over the process's standard streams and working directory.
+    """
+
+    def __init__(self, path=None, session=None, refresh_interval=DEFAULT_REFRESH_INTERVAL):
+        from .cache import DEFAULT_TTL, Inventory
+        from .session import Session, set_default_session
+
+        self.path = socket_path(path)
+        if session is None:
+            # Entries don't go stale before the next refresh replaces them
+            ttl = refresh_interval * 2 if refresh_interval else DEFAULT_TTL
+            session = Session(inventory=Inventory(path=':memory:', ttl=ttl))
+        self.session = session
+        # CLI commands run against the default session
+        set_default_session(session)
+        self.refresh_interval = refresh_interval
+        self._stopped = threading.Event()
+        # Commands swap the process-wide stdout, stdin and working directory
+        self._command_lock = threading.Lock()
+        self._server = None
+
+    def handle(self, request):
+        if request.get('ping'):
+            return {'pong': True}
+        if 'argv' in request:
+            status, output = self.run_command(request['argv'], request.get('stdin'), request.get('cwd'))
+            return {'status': status, 'output': output}
+        return {'result': self.call(request['operation'], request.get('args') or [],
+                                    request.get('kwargs') or {})}
+
+    def call(self, operation, args, kwargs):
+        from . import core
+        from .export import deserialize_block_device_mappings
+
+        if operation not in OPERATIONS:
+            raise AutoScalerException("Unknown operation {}, use one of {}".format(
+                operation, ", ".join(OPERATIONS)))
+        if isinstance(kwargs.get('block_device_mappings'), dict):
+            kwargs['block_device_mappings'] = [
+                deserialize_block_device_mappings(kwargs['block_device_mappings'])]
+        kwargs = dict((str(key), value) for key, value in kwargs.items())
+        return _to_json(getattr(core, operation)(*args, session=self.session, **kwargs))
+
+    def run_command(self, argv, stdin=None, cwd=None):
+        from .cli import dispatch
+
+        with self._command_lock:
+            output = StringIO()
+            saved = sys.stdout, sys.stderr, sys.stdin
+            saved_cwd = os.getcwd()
+            sys.stdout = sys.stderr = output
+            sys.stdin = StringIO(stdin or u"")
+            status = 0
+            try:
+                if cwd:
+                    os.chdir(cwd)
+                dispatch(argv)
+            except SystemExit as exc:
+                if isinstance(exc.code, int):
+                    status = exc.code
+                elif exc.code is not None:
+                    output.write(u"{}\n".format(exc.code))
+                    status = 1
+            except Exception:
+                output.write(u"{}".format(traceback.format_exc()))
+                status = 1
+            finally:
+                sys.stdout, sys.stderr, sys.stdin = saved
+                os.chdir(saved_cwd)
+        return status, output.getvalue()
+
+    def refresh(self):
+        from .core import refresh_inventory
+        return refresh_inventory(session=self.session)
+
+    def _refresh_loop(self):
+        while not self._stopped.is_set():
+            try:
+                self.refresh()
+            except Exception:
+                traceback.print_exc()
+            self._stopped.wait(self.refresh_interval)
+
+    def start(self):
+        """
+        Listen on the socket and start refreshing the inventory, both in
+        background threads
+        """
+        if Client(self.path).available():
+            raise AutoScalerException("A daemon is already listening on {}".format(self.path))
+        if os.path.exists(self.path):
+            # Left behind by a daemon that didn't stop cleanly
+            os.remove(self.path)
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        self._server = _Server(self.path, _Handler)
+        self._server.autoscaler_daemon = self
+        targets = [self._server.serve_forever]
+        if self.refresh_interval:
+            targets.append(self._refresh_loop)
+        for target in targets:
+            thread = threading.Thread(target=target)
+            thread.daemon = True
+            thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def serve_forever(self):
+        self.start()
+        try:
+            while not self._stopped.wait(1):
+                pass
+        finally:
+            self.stop()
@@ -0,0 +1,178 @@
+from collections import OrderedDict
+
+from boto.ec2.autoscale.request import Request
+
+from .compat import string_types
+
+# Launch config and group attributes whose order doesn't matter
+UNORDERED_ATTRS = [
+    "security_groups", "availability_zones", "load_balancers",
+]
+# Group attributes that AutoScaling keeps as one comma-separated string
+# of items whose order doesn't matter
+COMMA_SEPARATED_ATTRS = [
+    "vpc_zone_identifier",
+]
+BOOLEAN_ATTRS = [
+    "instance_monitoring", "ebs_optimized", "associate_public_ip_address",
+]
+# Attributes that compare as numbers, whether given as strings or not
+NUMERIC_ATTRS = [
+    "min_size", "max_size", "desired_capacity", "health_check_period", "default_cooldown",
+    "spot_price",
+]
+NUMERIC_BLOCK_DEVICE_FIELDS = ["size", "iops"]
+# Block device fields that launch configs keep, compared by diffs and
+# written by exports
+BLOCK_DEVICE_FIELDS = [
+    "ephemeral_name", "snapshot_id", "size", "volume_type", "iops", "encrypted",
+    "no_device", "delete_on_termination",
+]
+
+# UpdateAutoScalingGroup parameter for each group attribute it accepts
+GROUP_UPDATE_PARAMS = OrderedDict([
+    ("launch_config_name", "LaunchConfigurationName"),
+    ("min_size", "MinSize"),
+    ("max_size", "MaxSize"),
+    ("desired_capacity", "DesiredCapacity"),
+    ("availability_zones", "AvailabilityZones"),
+    ("vpc_zone_identifier", "VPCZoneIdentifier"),
+    ("health_check_period", "HealthCheckGracePeriod"),
+    ("health_check_type", "HealthCheckType"),
+    ("default_cooldown", "DefaultCooldown"),
+    ("placement_group", "PlacementGroup"),
+    ("termination_policies", "TerminationPolicies"),
+])
+GROUP_LIST_PARAMS = ["availability_zones", "termination_policies"]
+
+
+def merge_block_device_mappings(value):
+    """
+    Return the devices of `value` as one dict. The CLI passes a list holding
+    a single BlockDeviceMapping, while described configs hold the mapping.
+    """
+    if isinstance(value, (list, tuple)):
+        mappings = {}
+        for mapping in value:
+            mappings.update(mapping or {})
+        value = mappings
+    return value or {}
+
+
+def _normalize_block_device_field(device, field):
+    value = getattr(device, field, None)
+    if field == 'encrypted':
+        # Unset means unencrypted
+        return _normalize_boolean(value)
+    return _normalize_scalar(value, numeric=field in NUMERIC_BLOCK_DEVICE_FIELDS)
+
+
+def _normalize_block_device_mappings(value):
+    devices = []
+    for device_name, device in merge_block_device_mappings(value).items():
+        if getattr(device, 'ephemeral_name', None):
+            # Nothing but the name applies to instance store volumes
+            fields = (device.ephemeral_name,)
+        else:
+            fields = tuple(_normalize_block_device_field(device, field) for field in BLOCK_DEVICE_FIELDS)
+        devices.append((device_name, fields))
+    return tuple(sorted(devices))
+
+
+def _normalize_boolean(value):
+    if hasattr(value, 'enabled'):
+        # InstanceMonitoring
+        value = value.enabled
+    if isinstance(value, string_types):
+        return value.lower() in ('true', 'yes', 'y')
+    return bool(value)
+
+
+def _normalize_scalar(value, numeric=False):
+    if value == "" or value is None:
+        return None
+    if not numeric or isinstance(value, bool):
+        return value
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return value
+    return int(number) if number.is_integer() else number
+
+
+def normalize(attr_name, value):
+    """
+    Return a representation of `value` that compares equal to any other
+    value AutoScaling would store the same way.
+    """
+    if attr_name == "block_device_mappings":
+        return _normalize_block_device_mappings(value)
+    if attr_name in BOOLEAN_ATTRS:
+        return _normalize_boolean(value)
+    if attr_name in COMMA_SEPARATED_ATTRS:
+        if isinstance(value, string_types):
+            value = value.split(",")
+        return tuple(sorted(set(item.strip() for item in value or []) - set([""])))
+    if attr_name in UNORDERED_ATTRS or attr_name == "termination_policies":
+        if not value:
+            return ()
+        if isinstance(value, (list, tuple, set)):
+            values = tuple(_normalize_scalar(item) for item in value)
+        else:
+            values = (_normalize_scalar(value),)
+        if attr_name in UNORDERED_ATTRS:
+            values = tuple(sorted(values))
+        return values
+    if attr_name == "launch_config_name" and hasattr(value, 'name'):
+        return value.name
+    return _normalize_scalar(value, numeric=attr_name in NUMERIC_ATTRS)
+
+
+def diff_attributes(current, requested):
+    """
+    Return an OrderedDict of attr_name -> (current value, requested value)
+    for every requested attribute that differs from `current`.
+    """
+    changes = OrderedDict()
+    for attr_name, requested_value in requested.items():
+        current_value = current.get(attr_name)
+        if normalize(attr_name, current_value) != normalize(attr_name, requested_value):
+            changes[attr_name] = (current_value, requested_value)
+    return changes
+
+
+def diff_group(current, requested):
+    # The param is 'launch_config' while the attribute is 'launch_config_name'
+    requested = OrderedDict(requested)
+    if 'launch_config' in requested:
+        requested['launch_config_name'] = requested.pop('launch_config')
+    return diff_attributes(current, requested)
+
+
+def update_group_params(name, changes):
+    """
+    Build UpdateAutoScalingGroup params holding only the changed attributes
+    """
+    params = {'AutoScalingGroupName': name}
+    for attr_name, (_, value) in changes.items():
+        param_name = GROUP_UPDATE_PARAMS.get(attr_name)
+        if param_name is None:
+            continue
+        if attr_name == "launch_config_name" and hasattr(value, 'name'):
+            value = value.name
+        if attr_name in GROUP_LIST_PARAMS:
+            for index, item in enumerate(value or []):
+                params['{}.member.{}'.format(param_name, index + 1)] = item
+        elif attr_name in COMMA_SEPARATED_ATTRS and isinstance(value, (list, tuple, set)):
+            params[param_name] = ",".join(value)
+        elif value is not None:
+            params[param_name] = value
+    return params
+
+
+def update_group(conn, name, changes):
+    params = update_group_params(name, changes)
+    if len(params) == 1:
+        # Nothing that UpdateAutoScalingGroup can change
+        return None
+    return conn.get_object('UpdateAutoScalingGroup', params, Request)
@@ -1,2 +1,14 @@
 class AutoScalerException(Exception):
     pass
+
+
+class GroupUpdateError(AutoScalerException):
+    def __init__(self, message, result):
+        super(GroupUpdateError, self).__init__(message)
+        self.result = result
+
+
+class HealthCheckError(AutoScalerException):
+    def __init__(self, message, group_names):
+        super(HealthCheckError, self).__init__(message)
+        self.group_names = group_names
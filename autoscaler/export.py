@@ -0,0 +1,177 @@
+import csv
+import gzip
+import io
+import json
+import sys
+from collections import OrderedDict
+
+from boto.ec2.blockdevicemapping import BlockDeviceMapping, BlockDeviceType
+
+from .compat import PY2
+from .core import (
+    attrs_from_config,
+    attrs_from_group,
+    autoscaling_group_attrs,
+    iter_groups,
+    iter_launch_configs,
+    launch_config_attrs,
+)
+from .diff import BLOCK_DEVICE_FIELDS, merge_block_device_mappings
+from .exceptions import AutoScalerException
+
+FORMATS = ['jsonl', 'csv']
+LAUNCH_CONFIG_KIND = 'launch_config'
+GROUP_KIND = 'group'
+# Columns of a CSV export, which holds both kinds of record
+CSV_COLUMNS = (['kind', 'name'] + launch_config_attrs +
+               [attr for attr in autoscaling_group_attrs if attr not in launch_config_attrs] +
+               ['tags'])
+
+
+def serialize_block_device_mappings(mappings):
+    """
+    Return {device name: {field: value}} holding only the fields that are
+    set on each device
+    """
+    mappings = merge_block_device_mappings(mappings)
+    devices = OrderedDict()
+    for device_name in sorted(mappings):
+        device = mappings[device_name]
+        fields = OrderedDict(
+            (field, getattr(device, field)) for field in BLOCK_DEVICE_FIELDS
+            if field != 'delete_on_termination'
+            and getattr(device, field, None) not in (None, False, '')
+        )
+        if not device.ephemeral_name:
+            fields['delete_on_termination'] = str(device.delete_on_termination).lower() == 'true'
+        devices[device_name] = fields
+    return devices
+
+
+def deserialize_block_device_mappings(devices):
+    """
+    Rebuild a BlockDeviceMapping from `serialize_block_device_mappings`
+    output
+    """
+    mapping = BlockDeviceMapping()
+    for device_name, fields in (devices or {}).items():
+        mapping[device_name] = BlockDeviceType(**fields)
+    return mapping
+
+
+def _serialize(attr_name, value):
+    if attr_name == 'block_device_mappings':
+        return serialize_block_device_mappings(value)
+    if attr_name == 'instance_monitoring':
+        if hasattr(value, 'enabled'):
+            value = value.enabled
+        return str(value).lower() == 'true'
+    if isinstance(value, (list, tuple)):
+        return [getattr(item, 'name', item) for item in value]
+    return value
+
+
+def config_record(config):
+    record = OrderedDict([('kind', LAUNCH_CONFIG_KIND), ('name', config.name)])
+    for attr_name, value in attrs_from_config(config).items():
+        record[attr_name] = _serialize(attr_name, value)
+    return record
+
+
+def group_record(group):
+    record = OrderedDict([('kind', GROUP_KIND), ('name', group.name)])
+    for attr_name, value in attrs_from_group(group).items():
+        record[attr_name] = _serialize(attr_name, value)
+    record['tags'] = [[tag.key, tag.value, str(tag.propagate_at_launch).lower() == 'true']
+                      for tag in group.tags or []]
+    return record
+
+
+def iter_records(session=None, page_size=None, prefetch=True):
+    """
+    Yield a record for every launch config and then every group, one page
+    of each in memory at a time. With `prefetch`, the next page is described
+    while the current one is written.
+    """
+    for config in iter_launch_configs(session=session, page_size=page_size, prefetch=prefetch):
+        yield config_record(config)
+    for group in iter_groups(session=session, page_size=page_size, prefetch=prefetch):
+        yield group_record(group)
+
+
+def _compact(value):
+    return json.dumps(value, separators=(',', ':'))
+
+
+class JSONLinesWriter(object):
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, record):
+        self.stream.write(_compact(record) + "\n")
+
+
+class CSVWriter(object):
+    """
+    Writes records as CSV rows under CSV_COLUMNS, with lists and mappings
+    as compact JSON
+    """
+
+    def __init__(self, stream):
+        self.writer = csv.writer(stream)
+        self.writer.writerow(CSV_COLUMNS)
+
+    def write(self, record):
+        row = []
+        for column in CSV_COLUMNS:
+            value = record.get(column)
+            if isinstance(value, (list, dict)):
+                value = _compact(value)
+            elif PY2 and isinstance(value, unicode):  # noqa
+                value = value.encode('utf-8')
+            row.append('' if value is None else value)
+        self.writer.writerow(row)
+
+
+WRITERS = {'jsonl': JSONLinesWriter, 'csv': CSVWriter}
+
+
+def open_output(path=None, compress=False):
+    """
+    Open `path` (standard output if None) for writing an export, through
+    gzip when `compress` is set or `path` ends with .gz
+    """
+    compress = compress or bool(path and path.endswith('.gz'))
+    if path is None:
+        stream = sys.stdout if PY2 else sys.stdout.buffer
+        if not compress:
+            return sys.stdout
+        return _text(gzip.GzipFile(fileobj=stream, mode='wb'))
+    if compress:
+        return _text(gzip.open(path, 'wb'))
+    if PY2:
+        return open(path, 'wb')
+    return io.open(path, 'w', newline='')
+
+
+def _text(stream):
+    # The csv module wants bytes on Python 2 and text on Python 3
+    if PY2:
+        return stream
+    return io.TextIOWrapper(stream, newline='')
+
+
+def export_inventory(stream, format='jsonl', session=None, page_size=None, prefetch=True):
+    """
+    Write every launch config and group to `stream` as JSON Lines or CSV,
+    page by page. Returns the number of records written.
+    """
+    if format not in WRITERS:
+        raise AutoScalerException("Unknown export format {}, use one of {}".format(
+            format, ", ".join(FORMATS)))
+    writer = WRITERS[format](stream)
+    count = 0
+    for record in iter_records(session=session, page_size=page_size, prefetch=prefetch):
+        writer.write(record)
+        count += 1
+    return count
@@ -0,0 +1,148 @@
+import json
+import os
+import threading
+import time
+
+from .exceptions import AutoScalerException
+
+DEFAULT_JOURNAL_DIR = os.path.join('~', '.cache', 'autoscaler', 'journal')
+JOURNAL_DIR_ENV = 'AUTOSCALER_JOURNAL_DIR'
+# AUTOSCALER_JOURNAL_DIR value that turns journaling off
+NO_JOURNAL = 'none'
+JOURNAL_SUFFIX = '.journal'
+
+
+def create_step(config, base=None):
+    # Without a base the config is created from attributes that aren't
+    # journaled, so the step can't be replayed
+    return {'action': 'create', 'config': config, 'base': base}
+
+
+def reassign_step(old_name, new_name, groups):
+    return {'action': 'reassign', 'from': old_name, 'to': new_name, 'groups': list(groups)}
+
+
+def delete_step(config):
+    return {'action': 'delete', 'config': config}
+
+
+class EditLog(object):
+    """
+    Write-ahead log of one launch config edit: the steps it will take,
+    followed by the position of each step as it is started. An edit that is
+    rolled back writes the steps that undo it, which replace the rest.
+    """
+
+    def __init__(self, path, name, steps, started=None):
+        self.path = path
+        self.name = name
+        self.steps = steps
+        self.started = started
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load the log at `path`, or return None if the process died while
+        writing its header, before the edit changed anything
+        """
+        entries = []
+        with open(path) as log_file:
+            for line in log_file:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    # Only the last line can be partly written
+                    break
+        if not entries:
+            return None
+        header = entries[0]
+        steps, started = header['steps'], None
+        for entry in entries[1:]:
+            if 'steps' in entry:
+                steps, started = entry['steps'], None
+            else:
+                started = entry['started']
+        return cls(path, header['name'], steps, started)
+
+    def _append(self, entry):
+        with open(self.path, 'a') as log_file:
+            log_file.write(json.dumps(entry) + "\n")
+            log_file.flush()
+            os.fsync(log_file.fileno())
+
+    def start(self, position):
+        self._append({'started': position})
+        self.started = position
+
+    def rewrite(self, steps):
+        # Replace the steps that are left, before running any of them
+        self._append({'steps': steps})
+        self.steps = steps
+        self.started = None
+
+    def finish(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class Journal(object):
+    """
+    Directory of the logs of launch config edits that haven't finished.
+    A log is removed as soon as its edit completes.
+    """
+
+    def __init__(self, directory=DEFAULT_JOURNAL_DIR):
+        self.directory = os.path.expanduser(directory)
+        self._lock = threading.Lock()
+        self._last_stamp = 0.0
+
+    def begin(self, name, steps):
+        with self._lock:
+            if not os.path.isdir(self.directory):
+                try:
+                    os.makedirs(self.directory)
+                except OSError as exc:
+                    raise AutoScalerException(
+                        "Can't create journal directory {}: {}. Set {} to another directory, "
+                        "or to '{}' to edit without a journal".format(
+                            self.directory, exc.strerror, JOURNAL_DIR_ENV, NO_JOURNAL))
+            # File names sort in the order edits were started
+            stamp = max(time.time(), self._last_stamp + 0.000001)
+            self._last_stamp = stamp
+            path = os.path.join(self.directory, "{:.6f}-{}{}".format(stamp, os.getpid(), JOURNAL_SUFFIX))
+        log = EditLog(path, name, steps)
+        log._append({'name': name, 'steps': steps})
+        return log
+
+    def pending(self, name=None):
+        """
+        Return the logs of unfinished edits, oldest first, optionally only
+        those of launch config `name`
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        logs = []
+        for file_name in sorted(os.listdir(self.directory)):
+            if not file_name.endswith(JOURNAL_SUFFIX):
+                continue
+            path = os.path.join(self.directory, file_name)
+            log = EditLog.load(path)
+            if log is None:
+                os.remove(path)
+            elif name is None or log.name == name:
+                logs.append(log)
+        return logs
+
+
+def journal_from_environment(subdirectory=None):
+    """
+    Return a `Journal` in AUTOSCALER_JOURNAL_DIR, or ~/.cache/autoscaler/journal
+    when it isn't set, optionally in its `subdirectory`. Returns None if
+    AUTOSCALER_JOURNAL_DIR is 'none'.
+    """
+    directory = os.environ.get(JOURNAL_DIR_ENV) or DEFAULT_JOURNAL_DIR
+    if directory.lower() == NO_JOURNAL:
+        return None
+    if subdirectory:
+        directory = os.path.join(directory, subdirectory)
+    return Journal(directory)
@@ -0,0 +1,255 @@
+import json
+import time
+from collections import OrderedDict
+
+from .concurrency import DEFAULT_CONCURRENCY, run_concurrently
+from .core import (
+    DEFAULT_CONFIG_NAME,
+    LaunchConfigIndex,
+    add_auto_scaling_group,
+    add_launch_config,
+    attrs_from_group,
+    _edit_launch_config,
+    edit_auto_scaling_group,
+    get_config_values_many,
+    iter_groups,
+)
+from .diff import diff_attributes, diff_group
+from .exceptions import AutoScalerException
+from .export import deserialize_block_device_mappings
+from .parsers import parse_block_device_mappings
+from .session import get_session
+from .stats import phase
+
+LAUNCH_CONFIGS_KEY = 'launch_configs'
+GROUPS_KEY = 'auto_scaling_groups'
+
+
+def load_manifest(path):
+    """
+    Load a manifest from a JSON or YAML file. YAML needs PyYAML installed.
+    """
+    with open(path) as manifest_file:
+        if path.endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise AutoScalerException("PyYAML is required to load YAML manifests")
+            manifest = yaml.safe_load(manifest_file)
+        else:
+            manifest = json.load(manifest_file, object_pairs_hook=OrderedDict)
+    return normalize_manifest(manifest or {})
+
+
+def normalize_manifest(manifest):
+    unknown_keys = set(manifest) - set([LAUNCH_CONFIGS_KEY, GROUPS_KEY])
+    if unknown_keys:
+        raise AutoScalerException("Unknown manifest sections: {}".format(", ".join(sorted(unknown_keys))))
+
+    launch_configs = OrderedDict()
+    for name, attrs in (manifest.get(LAUNCH_CONFIGS_KEY) or {}).items():
+        attrs = OrderedDict(attrs or {})
+        mappings = attrs.get('block_device_mappings')
+        if isinstance(mappings, dict):
+            # As written by `autoscaler export`
+            attrs['block_device_mappings'] = [deserialize_block_device_mappings(mappings)]
+        elif mappings and not isinstance(mappings, list):
+            # Same syntax as the CLI
+            attrs['block_device_mappings'] = [parse_block_device_mappings(mappings)]
+        launch_configs[name] = attrs
+
+    groups = OrderedDict()
+    for name, attrs in (manifest.get(GROUPS_KEY) or {}).items():
+        groups[name] = OrderedDict(attrs or {})
+
+    return OrderedDict([(LAUNCH_CONFIGS_KEY, launch_configs), (GROUPS_KEY, groups)])
+
+
+class ManifestPlan(object):
+    """
+    What applying a manifest will do: the attributes to create each new
+    object with, the changed attributes of each existing one, and the names
+    of objects that already match. The launch configs and groups described
+    while planning are kept so applying the plan doesn't describe them
+    again.
+    """
+
+    def __init__(self):
+        self.config_creates = OrderedDict()
+        self.config_edits = OrderedDict()
+        self.config_unchanged = []
+        self.group_creates = OrderedDict()
+        self.group_edits = OrderedDict()
+        self.group_unchanged = []
+        self.configs = {}
+        self.groups = {}
+        self.index = None
+
+    @property
+    def is_empty(self):
+        return not (self.config_creates or self.config_edits or
+                    self.group_creates or self.group_edits)
+
+
+class PhaseResult(object):
+    def __init__(self, name):
+        self.name = name
+        self.created = []
+        self.edited = []
+        self.unchanged = []
+        self.failed = OrderedDict()
+        self.seconds = 0.0
+
+    def summary(self):
+        return "{}: {} created, {} edited, {} unchanged, {} failed ({:.2f}s)".format(
+            self.name, len(self.created), len(self.edited), len(self.unchanged),
+            len(self.failed), self.seconds)
+
+
+def plan_manifest(manifest, session=None):
+    """
+    Describe every launch config and group once and work out what needs to
+    change to reach `manifest`.
+    """
+    session = get_session(session)
+    manifest = normalize_manifest(manifest)
+    plan = ManifestPlan()
+
+    current_configs = get_config_values_many(list(manifest[LAUNCH_CONFIGS_KEY]), session=session)
+    for name, attrs in manifest[LAUNCH_CONFIGS_KEY].items():
+        if not any(current_configs[name].values()):
+            plan.config_creates[name] = attrs
+            continue
+        plan.configs[name] = current_configs[name]
+        attrs = OrderedDict((key, value) for key, value in attrs.items() if key != 'base')
+        changes = diff_attributes(current_configs[name], attrs)
+        if changes:
+            plan.config_edits[name] = OrderedDict((key, attrs[key]) for key in changes)
+        else:
+            plan.config_unchanged.append(name)
+
+    groups = list(iter_groups(session=session))
+    plan.index = LaunchConfigIndex(groups)
+    plan.groups = dict((group.name, group) for group in groups)
+    for name, attrs in manifest[GROUPS_KEY].items():
+        if name not in plan.groups:
+            plan.group_creates[name] = attrs
+            continue
+        changes = diff_group(attrs_from_group(plan.groups[name]), attrs)
+        if changes:
+            plan.group_edits[name] = OrderedDict((key, value) for key, (_, value) in changes.items())
+        else:
+            plan.group_unchanged.append(name)
+    return plan
+
+
+def _run_phase(result, creates, edits, create, edit, concurrency, progress=None):
+    operations = [('create', name, attrs) for name, attrs in creates.items()]
+    operations.extend(('edit', name, attrs) for name, attrs in edits.items())
+
+    def run(operation):
+        action, name, attrs = operation
+        try:
+            if action == 'create':
+                create(name, attrs)
+            else:
+                edit(name, attrs)
+        except Exception as exc:
+            if progress is not None:
+                progress(result.name, action, name, exc)
+            raise
+        if progress is not None:
+            progress(result.name, action, name, None)
+
+    start = time.time()
+    outcome = run_concurrently(run, operations, key=lambda operation: operation[1],
+                               concurrency=concurrency)
+    result.seconds = time.time() - start
+    for action, name, _ in operations:
+        if name in outcome.failed:
+            result.failed[name] = outcome.failed[name]
+        elif action == 'create':
+            result.created.append(name)
+        else:
+            result.edited.append(name)
+    return result
+
+
+def apply_manifest(manifest, session=None, concurrency=DEFAULT_CONCURRENCY, progress=None):
+    """
+    Bring launch configs and groups in line with `manifest`. Launch configs
+    are applied before the groups that may reference them, with the objects
+    in each phase created and edited concurrently.
+
+    `progress`, if given, is called as progress(phase, action, name, error)
+    after each object is created or edited.
+
+    Returns a list of `PhaseResult`, one per phase.
+    """
+    session = get_session(session)
+
+    describe = PhaseResult('describe')
+    start = time.time()
+    with phase('describe'):
+        plan = plan_manifest(manifest, session=session)
+    describe.seconds = time.time() - start
+
+    return [describe] + apply_plan(plan, session=session, concurrency=concurrency,
+                                   progress=progress)
+
+
+def apply_plan(plan, session=None, concurrency=DEFAULT_CONCURRENCY, progress=None):
+    """
+    Make the changes in a `ManifestPlan`. Returns the `PhaseResult` of the
+    launch configs and of the groups.
+    """
+    session = get_session(session)
+
+    configs = PhaseResult('launch configs')
+    configs.unchanged = plan.config_unchanged
+
+    def create_config(name, attrs):
+        attrs = OrderedDict(attrs)
+        base = attrs.pop('base', DEFAULT_CONFIG_NAME)
+        add_launch_config(name, base=base, session=session, **attrs)
+
+    bases = getattr(session, 'bases', None)
+    if bases is not None:
+        # Configs may be based on others created in the same phase
+        for name, attrs in plan.config_creates.items():
+            attrs = OrderedDict(attrs)
+            base = attrs.pop('base', DEFAULT_CONFIG_NAME)
+            bases.register(name, base, attrs)
+
+    def edit_config(name, attrs):
+        # The configs are already edited `concurrency` at a time, as in
+        # rollout_ami, so each moves its groups one at a time
+        _edit_launch_config(name, plan.configs[name], session, 1, False, plan.index, attrs)
+
+    with phase(configs.name):
+        _run_phase(configs, plan.config_creates, plan.config_edits,
+                   create_config, edit_config, concurrency, progress)
+    if bases is not None:
+        bases.unregister(*[name for name in configs.failed if name in plan.config_creates])
+
+    groups = PhaseResult('groups')
+    groups.unchanged = plan.group_unchanged
+
+    def create_group(name, attrs):
+        add_auto_scaling_group(name, session=session, **attrs)
+
+    def edit_group(name, attrs):
+        edit_auto_scaling_group(name, session=session, group=plan.groups.get(name), **attrs)
+
+    if configs.failed:
+        # Groups may depend on the configs that failed
+        groups.failed.update(
+            (name, AutoScalerException("Skipped after launch config failures"))
+            for name in list(plan.group_creates) + list(plan.group_edits)
+        )
+    else:
+        with phase(groups.name):
+            _run_phase(groups, plan.group_creates, plan.group_edits,
+                       create_group, edit_group, concurrency, progress)
+
+    return [configs, groups]
@@ -0,0 +1,146 @@
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from .bases import BaseConfigResolver
+from .compat import string_types
+from .session import get_session
+from .stats import operation_name
+
+def _target(args):
+    for arg in args:
+        if isinstance(arg, dict):
+            return arg.get('AutoScalingGroupName') or arg.get('LaunchConfigurationName')
+        name = getattr(arg, 'name', arg)
+        if isinstance(name, string_types):
+            return name
+    return None
+
+
+class Operation(object):
+    def __init__(self, name, target=None):
+        self.name = name
+        self.target = target
+
+    @property
+    def is_describe(self):
+        return self.name.startswith('Describe')
+
+    def __repr__(self):
+        return "<Operation {} {}>".format(self.name, self.target)
+
+
+class OperationPlan(object):
+    """
+    The AutoScaling API calls an operation made or would have made
+    """
+
+    def __init__(self):
+        self.operations = []
+        self._lock = threading.Lock()
+
+    def record(self, name, target=None):
+        with self._lock:
+            self.operations.append(Operation(name, target))
+
+    def counts(self):
+        counts = OrderedDict()
+        for operation in sorted(self.operations, key=lambda operation: operation.name):
+            counts[operation.name] = counts.get(operation.name, 0) + 1
+        return counts
+
+    @property
+    def total_calls(self):
+        return len(self.operations)
+
+    def touched_groups(self):
+        names = OrderedDict()
+        for operation in self.operations:
+            if operation.name.endswith('AutoScalingGroup') and not operation.is_describe:
+                names[operation.target] = True
+        return list(names)
+
+    def touched_launch_configs(self):
+        names = OrderedDict()
+        for operation in self.operations:
+            if operation.name.endswith('LaunchConfiguration'):
+                names[operation.target] = True
+        return list(names)
+
+    def estimate_seconds(self, rate):
+        return self.total_calls / float(rate)
+
+    def report(self, rate):
+        lines = ["API calls:"]
+        for name, count in self.counts().items():
+            lines.append("  {}: {}".format(name, count))
+        lines.append("Total: {} calls, about {:.1f}s at {:g} calls/s".format(
+            self.total_calls, self.estimate_seconds(rate), rate))
+        configs = self.touched_launch_configs()
+        if configs:
+            lines.append("Launch configs: {}".format(", ".join(configs)))
+        groups = self.touched_groups()
+        if groups:
+            lines.append("Groups: {}".format(", ".join(groups)))
+        return "\n".join(lines)
+
+
+class DryRunConnection(object):
+    """
+    Passes describe calls through to `wrapped` and records every other call
+    without making it.
+    """
+
+    def __init__(self, wrapped, plan):
+        self.wrapped = wrapped
+        self.plan = plan
+
+    def __getattr__(self, name):
+        attr = getattr(self.wrapped, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            operation, operation_args = operation_name(name, args)
+            if operation.startswith('Describe'):
+                self.plan.record(operation)
+                return attr(*args, **kwargs)
+            self.plan.record(operation, _target(operation_args))
+            return None
+        return call
+
+
+class DryRunSession(object):
+    """
+    A session that describes for real through `session` but only records
+    the changes it would have made in `plan`. Bases resolved and registered
+    during the dry run stay on the dry run.
+    """
+
+    def __init__(self, session=None):
+        self.session = get_session(session)
+        self.throttler = self.session.throttler
+        self.inventory = None
+        self.journal = None
+        # Its own bases, so the configs a dry run plans to create aren't
+        # registered on the real session
+        self.bases = BaseConfigResolver()
+        self.plan = OperationPlan()
+
+    @contextmanager
+    def connection(self):
+        with self.session.connection() as conn:
+            yield DryRunConnection(conn, self.plan)
+
+    def close(self):
+        pass
+
+
+def dry_run(func, *args, **kwargs):
+    """
+    Run `func(*args, **kwargs)` against a `DryRunSession` and return the
+    resulting `OperationPlan`.
+    """
+    session = DryRunSession(kwargs.pop('session', None))
+    func(*args, session=session, **kwargs)
+    return session.plan
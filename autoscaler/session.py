@@ -0,0 +1,107 @@
+import threading
+from contextlib import contextmanager
+
+try:
+    from Queue import Queue, Empty, Full
+except ImportError:  # pragma: no cover
+    from queue import Queue, Empty, Full
+
+import boto
+import boto.ec2.autoscale
+
+from .bases import BaseConfigResolver
+from .cache import inventory_from_environment
+from .exceptions import AutoScalerException
+from .journal import journal_from_environment
+from .stats import instrument_connection
+from .throttle import Throttler, ThrottledConnection
+
+DEFAULT_POOL_SIZE = 10
+
+
+class Session(object):
+    """
+    Holds a pool of AutoScale connections so that a single operation (and
+    every operation after it) reuses warm connections instead of opening a
+    new one for each API call.
+
+    Every call made on a connection from the pool goes through the
+    session's `Throttler`. Single-name describes are served from `inventory`
+    when one is given, and the base configs new launch configs are built
+    from are kept in `bases`. Launch config edits are written ahead to
+    `journal` so they can be resumed if the process dies; by default the
+    journal comes from the environment, and `journal=False` turns it off.
+
+    Connections go to `region` with the credentials of boto profile
+    `profile`, or boto's defaults for either when None.
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, throttler=None, inventory=None,
+                 bases=None, journal=None, region=None, profile=None, **connect_kwargs):
+        connect_kwargs.setdefault('use_block_device_types', True)
+        if profile:
+            connect_kwargs['profile_name'] = profile
+        self.connect_kwargs = connect_kwargs
+        self.region = region
+        self.profile = profile
+        self.pool_size = pool_size
+        self.throttler = throttler or Throttler()
+        self.inventory = inventory
+        self.bases = bases or BaseConfigResolver()
+        self.journal = journal_from_environment() if journal is None else (journal or None)
+        self._pool = Queue(maxsize=pool_size)
+
+    def _connect(self):
+        if self.region is None:
+            return instrument_connection(boto.connect_autoscale(**self.connect_kwargs))
+        conn = boto.ec2.autoscale.connect_to_region(self.region, **self.connect_kwargs)
+        if conn is None:
+            raise AutoScalerException("Unknown region {}".format(self.region))
+        return instrument_connection(conn)
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._pool.get_nowait()
+        except Empty:
+            conn = self._connect()
+        try:
+            yield ThrottledConnection(conn, self.throttler)
+        finally:
+            try:
+                self._pool.put_nowait(conn)
+            except Full:
+                conn.close()
+
+    def close(self):
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except Empty:
+                break
+            conn.close()
+
+
+_default_session = None
+_default_session_lock = threading.Lock()
+
+
+def get_session(session=None):
+    """
+    Return `session` if given, otherwise the process-wide default session
+    """
+    global _default_session
+    if session is not None:
+        return session
+    with _default_session_lock:
+        if _default_session is None:
+            _default_session = Session(inventory=inventory_from_environment())
+        return _default_session
+
+
+def set_default_session(session):
+    global _default_session
+    with _default_session_lock:
+        old_session, _default_session = _default_session, session
+    if old_session is not None and old_session is not session:
+        old_session.close()
@@ -0,0 +1,82 @@
+import gzip
+import json
+import time
+from collections import OrderedDict
+
+from boto.ec2.autoscale.tag import Tag
+
+from .concurrency import DEFAULT_CONCURRENCY
+from .exceptions import AutoScalerException
+from .export import GROUP_KIND, LAUNCH_CONFIG_KIND, deserialize_block_device_mappings
+from .manifest import GROUPS_KEY, LAUNCH_CONFIGS_KEY, PhaseResult, apply_plan, plan_manifest
+from .session import get_session
+from .stats import phase
+
+
+def load_snapshot(path):
+    """
+    Read the records of an `autoscaler export` JSON Lines file, gzipped if
+    `path` ends with .gz
+    """
+    opener = gzip.open if path.endswith('.gz') else open
+    records = []
+    with opener(path, 'rb') as snapshot_file:
+        for line in snapshot_file:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line.decode('utf-8'), object_pairs_hook=OrderedDict))
+    return records
+
+
+def snapshot_manifest(records):
+    """
+    Turn snapshot records into a manifest and the tags of each group, which
+    manifests don't hold
+    """
+    configs = OrderedDict()
+    groups = OrderedDict()
+    tags = {}
+    for record in records:
+        attrs = OrderedDict((key, value) for key, value in record.items()
+                            if key not in ('kind', 'name'))
+        if record['kind'] == LAUNCH_CONFIG_KIND:
+            mappings = attrs.get('block_device_mappings')
+            attrs['block_device_mappings'] = (
+                [deserialize_block_device_mappings(mappings)] if mappings else None)
+            # Records hold every attribute, so nothing comes from a base
+            attrs['base'] = None
+            configs[record['name']] = attrs
+        elif record['kind'] == GROUP_KIND:
+            attrs['launch_config'] = attrs.pop('launch_config_name', None)
+            tags[record['name']] = attrs.pop('tags', None) or []
+            groups[record['name']] = attrs
+        else:
+            raise AutoScalerException("Unknown snapshot record kind {}".format(record['kind']))
+    return OrderedDict([(LAUNCH_CONFIGS_KEY, configs), (GROUPS_KEY, groups)]), tags
+
+
+def restore_snapshot(records, session=None, concurrency=DEFAULT_CONCURRENCY, progress=None):
+    """
+    Recreate the launch configs and groups of a snapshot, configs first.
+    Objects that already match are left alone and the rest are created or
+    edited concurrently, like `apply_manifest`.
+
+    Returns a list of `PhaseResult`, one per phase.
+    """
+    session = get_session(session)
+    manifest, tags = snapshot_manifest(records)
+
+    describe = PhaseResult('describe')
+    start = time.time()
+    with phase(describe.name):
+        plan = plan_manifest(manifest, session=session)
+    describe.seconds = time.time() - start
+
+    # Tags are only set on the groups being created, they aren't compared
+    # with those of existing groups
+    for name, attrs in plan.group_creates.items():
+        attrs['tags'] = [Tag(key=key, value=value, propagate_at_launch=propagate, resource_id=name)
+                         for key, value, propagate in tags.get(name, [])]
+
+    return [describe] + apply_plan(plan, session=session, concurrency=concurrency,
+                                   progress=progress)
@@ -0,0 +1,275 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    from urllib import urlencode
+except ImportError:  # pragma: no cover
+    from urllib.parse import urlencode
+
+# API operation behind each connection method that core uses
+OPERATIONS = {
+    'get_all_groups': 'DescribeAutoScalingGroups',
+    'get_all_launch_configurations': 'DescribeLaunchConfigurations',
+    'create_launch_configuration': 'CreateLaunchConfiguration',
+    'delete_launch_configuration': 'DeleteLaunchConfiguration',
+    'create_auto_scaling_group': 'CreateAutoScalingGroup',
+    'delete_auto_scaling_group': 'DeleteAutoScalingGroup',
+    'set_desired_capacity': 'SetDesiredCapacity',
+}
+DEFAULT_PHASE = 'other'
+
+_sinks = []
+_sinks_lock = threading.Lock()
+_local = threading.local()
+
+
+def operation_name(method_name, args):
+    """
+    Return the API operation for a connection method call and the arguments
+    that follow the operation name
+    """
+    if method_name in ('_update_group', 'get_object'):
+        # Both take the operation name as their first argument
+        return args[0], args[1:]
+    return OPERATIONS.get(method_name, method_name), args
+
+
+class CallRecord(object):
+    def __init__(self, operation, phase):
+        self.operation = operation
+        self.phase = phase
+        self.duration = 0.0
+        self.retries = 0
+        self.pages = 1 if operation.startswith('Describe') else 0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.error = None
+
+    def to_dict(self):
+        return OrderedDict([
+            ('operation', self.operation),
+            ('phase', self.phase),
+            ('duration', self.duration),
+            ('retries', self.retries),
+            ('pages', self.pages),
+            ('request_bytes', self.request_bytes),
+            ('response_bytes', self.response_bytes),
+            ('error', self.error),
+        ])
+
+
+def add_sink(sink):
+    """
+    Register `sink` to receive a `CallRecord` through `sink.record(call)` for
+    every API call, and `sink.phase(name, seconds)` (if it has one) whenever
+    a `phase()` block finishes.
+    """
+    with _sinks_lock:
+        _sinks.append(sink)
+    return sink
+
+
+def remove_sink(sink):
+    with _sinks_lock:
+        if sink in _sinks:
+            _sinks.remove(sink)
+
+
+def _emit(method_name, *args):
+    with _sinks_lock:
+        sinks = list(_sinks)
+    for sink in sinks:
+        method = getattr(sink, method_name, None)
+        if method is not None:
+            method(*args)
+
+
+def current_phase():
+    return getattr(_local, 'phase', None) or DEFAULT_PHASE
+
+
+@contextmanager
+def use_phase(name):
+    """
+    Attribute calls on this thread to phase `name` without timing it. Used
+    to carry the caller's phase into worker threads.
+    """
+    previous = getattr(_local, 'phase', None)
+    _local.phase = name
+    try:
+        yield
+    finally:
+        _local.phase = previous
+
+
+@contextmanager
+def phase(name):
+    """
+    Attribute the API calls made inside the block to phase `name` and report
+    the block's wall-clock time to the sinks.
+    """
+    start = time.time()
+    with use_phase(name):
+        try:
+            yield
+        finally:
+            _emit('phase', name, time.time() - start)
+
+
+def count_retry():
+    record = getattr(_local, 'record', None)
+    if record is not None:
+        record.retries += 1
+
+
+@contextmanager
+def track(operation):
+    record = CallRecord(operation, current_phase())
+    previous = getattr(_local, 'record', None)
+    _local.record = record
+    start = time.time()
+    try:
+        yield record
+    except Exception as exc:
+        record.error = exc.__class__.__name__
+        raise
+    finally:
+        record.duration = time.time() - start
+        _local.record = previous
+        _emit('record', record)
+
+
+class _CountingResponse(object):
+    def __init__(self, response, record):
+        self._response = response
+        self._record = record
+
+    def read(self, *args):
+        body = self._response.read(*args)
+        if self._record is not None:
+            self._record.response_bytes += len(body or '')
+        return body
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+
+def instrument_connection(conn):
+    """
+    Count request and response bytes of every request `conn` makes against
+    the call currently being tracked on the calling thread.
+    """
+    make_request = conn.make_request
+
+    def counting_make_request(action, params=None, *args, **kwargs):
+        record = getattr(_local, 'record', None)
+        if record is not None:
+            record.request_bytes += len(urlencode(params or {}))
+        return _CountingResponse(make_request(action, params, *args, **kwargs), record)
+
+    conn.make_request = counting_make_request
+    return conn
+
+
+class MemorySink(object):
+    """
+    Keeps per-phase, per-operation totals for a summary at the end of a run
+    """
+
+    def __init__(self):
+        self.operations = OrderedDict()
+        self.phases = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, call):
+        with self._lock:
+            totals = self.operations.setdefault((call.phase, call.operation), OrderedDict([
+                ('calls', 0), ('errors', 0), ('retries', 0), ('pages', 0),
+                ('seconds', 0.0), ('max_seconds', 0.0), ('bytes', 0),
+            ]))
+            totals['calls'] += 1
+            totals['errors'] += 1 if call.error else 0
+            totals['retries'] += call.retries
+            totals['pages'] += call.pages
+            totals['seconds'] += call.duration
+            totals['max_seconds'] = max(totals['max_seconds'], call.duration)
+            totals['bytes'] += call.request_bytes + call.response_bytes
+
+    def phase(self, name, seconds):
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def summary(self):
+        lines = ["{:<24} {:<30} {:>6} {:>7} {:>6} {:>9} {:>9} {:>9}".format(
+            "phase", "operation", "calls", "retries", "pages", "total(s)", "avg(ms)", "max(ms)")]
+        with self._lock:
+            for (phase_name, operation), totals in self.operations.items():
+                lines.append("{:<24} {:<30} {:>6} {:>7} {:>6} {:>9.3f} {:>9.1f} {:>9.1f}".format(
+                    phase_name, operation, totals['calls'], totals['retries'], totals['pages'],
+                    totals['seconds'], 1000 * totals['seconds'] / totals['calls'],
+                    1000 * totals['max_seconds']))
+            if self.phases:
+                lines.append("")
+                lines.append("{:<24} {:>9}".format("phase", "wall(s)"))
+                for phase_name, seconds in self.phases.items():
+                    lines.append("{:<24} {:>9.3f}".format(phase_name, seconds))
+        return "\n".join(lines)
+
+
+class JSONLinesSink(object):
+    """
+    Writes one JSON object per API call to `stream`
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def record(self, call):
+        line = json.dumps(call.to_dict())
+        with self._lock:
+            self.stream.write(line + "\n")
+
+
+class PrometheusTextfileSink(MemorySink):
+    """
+    Writes per-operation totals in the Prometheus text format on `flush()`,
+    for the node_exporter textfile collector
+    """
+
+    def __init__(self, path):
+        super(PrometheusTextfileSink, self).__init__()
+        self.path = path
+
+    def render(self):
+        metrics = [
+            ('autoscaler_api_calls_total', 'calls', 'counter', 'AutoScaling API calls'),
+            ('autoscaler_api_errors_total', 'errors', 'counter', 'AutoScaling API calls that failed'),
+            ('autoscaler_api_retries_total', 'retries', 'counter', 'Retries of throttled calls'),
+            ('autoscaler_api_pages_total', 'pages', 'counter', 'Describe pages fetched'),
+            ('autoscaler_api_call_seconds_total', 'seconds', 'counter', 'Time spent in API calls'),
+            ('autoscaler_api_bytes_total', 'bytes', 'counter', 'Request and response bytes'),
+        ]
+        lines = []
+        with self._lock:
+            for metric, key, metric_type, help_text in metrics:
+                lines.append("# HELP {} {}".format(metric, help_text))
+                lines.append("# TYPE {} {}".format(metric, metric_type))
+                for (phase_name, operation), totals in self.operations.items():
+                    lines.append('{}{{phase="{}",operation="{}"}} {}'.format(
+                        metric, phase_name, operation, totals[key]))
+        return "\n".join(lines) + "\n"
+
+    def flush(self):
+        # Write to a temporary file and rename it so the collector never
+        # reads a partial file
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as temp_file:
+            temp_file.write(self.render())
+        os.rename(temp_path, self.path)
@@ -0,0 +1,82 @@
+import threading
+from collections import namedtuple
+
+from .cache import inventory_from_environment
+from .concurrency import run_concurrently
+from .journal import journal_from_environment
+from .session import Session, get_session
+
+
+class Target(namedtuple('Target', ['region', 'profile'])):
+    """
+    A region and boto credentials profile to run operations against, None
+    meaning boto's default for either
+    """
+    __slots__ = ()
+
+    @property
+    def label(self):
+        return "/".join(part for part in (self.profile, self.region) if part) or 'default'
+
+    @property
+    def slug(self):
+        # The label, usable in a file name
+        return self.label.replace("/", "-")
+
+
+DEFAULT_TARGET = Target(None, None)
+
+
+def parse_targets(regions=None, profiles=None):
+    """
+    Return a `Target` for every combination of `regions` and `profiles`
+    """
+    return [Target(region, profile)
+            for profile in (profiles or [None])
+            for region in (regions or [None])]
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_target_session(target):
+    """
+    Return the session of `target`, so each target keeps its own connection
+    pool, throttler, cache namespace and journal. The default target uses
+    the default session.
+    """
+    if target == DEFAULT_TARGET:
+        return get_session()
+    with _sessions_lock:
+        if target not in _sessions:
+            _sessions[target] = Session(
+                region=target.region,
+                profile=target.profile,
+                inventory=inventory_from_environment(namespace=target.label),
+                journal=journal_from_environment(target.slug) or False,
+            )
+        return _sessions[target]
+
+
+def close_target_sessions():
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
+
+
+def fan_out(func, targets, *args, **kwargs):
+    """
+    Call `func(*args, session=<session of the target>, **kwargs)` for every
+    target at once, so the whole takes as long as the slowest target.
+
+    Returns a `BatchResult` keyed by target.
+    """
+    targets = list(targets)
+
+    def call(target):
+        return func(*args, session=get_target_session(target), **kwargs)
+
+    return run_concurrently(call, targets, concurrency=len(targets))
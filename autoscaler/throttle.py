@@ -0,0 +1,144 @@
+import random
+import threading
+import time
+
+from boto.exception import BotoServerError
+
+from .stats import count_retry, operation_name, track
+
+DEFAULT_RATE = 20
+DEFAULT_MAX_ATTEMPTS = 8
+THROTTLE_ERROR_CODES = ('Throttling', 'ThrottlingException', 'RequestLimitExceeded')
+
+
+def is_throttle_error(exc):
+    return isinstance(exc, BotoServerError) and exc.error_code in THROTTLE_ERROR_CODES
+
+
+class TokenBucket(object):
+    """
+    Hands out one token per API call, refilled at `rate` tokens per second
+    up to `capacity`.
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.time, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self.tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        # Take the token straight away, going into debt if the bucket is
+        # empty, and then sleep until that debt has been refilled.
+        with self._lock:
+            now = self._clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+            self._last = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate
+        if wait > 0:
+            self._sleep(wait)
+
+
+class Throttler(object):
+    """
+    Rate limits API calls and retries throttled ones with exponential
+    backoff and full jitter.
+
+    The rate is halved on every throttle (down to `min_rate`) and creeps back
+    up by `rate_increase` per successful call until it reaches `max_rate`.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, max_rate=None, min_rate=1, rate_increase=0.1,
+                 max_attempts=DEFAULT_MAX_ATTEMPTS, base_delay=0.1, max_delay=20,
+                 clock=time.time, sleep=time.sleep):
+        self.bucket = TokenBucket(rate, capacity=rate, clock=clock, sleep=sleep)
+        self.max_rate = float(max_rate or rate)
+        self.min_rate = float(min_rate)
+        self.rate_increase = rate_increase
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.throttles = 0
+        self.failures = 0
+
+    @property
+    def rate(self):
+        return self.bucket.rate
+
+    def backoff(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, func, *args, **kwargs):
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            with self._lock:
+                self.calls += 1
+            try:
+                result = func(*args, **kwargs)
+            except Exception as exc:
+                if not is_throttle_error(exc):
+                    with self._lock:
+                        self.failures += 1
+                    raise
+                self._throttled()
+                attempt += 1
+                if attempt >= self.max_attempts:
+                    with self._lock:
+                        self.failures += 1
+                    raise
+                with self._lock:
+                    self.retries += 1
+                count_retry()
+                self._sleep(self.backoff(attempt))
+                continue
+            self._succeeded()
+            return result
+
+    def _throttled(self):
+        with self._lock:
+            self.throttles += 1
+            self.bucket.rate = max(self.min_rate, self.bucket.rate / 2)
+
+    def _succeeded(self):
+        with self._lock:
+            self.bucket.rate = min(self.max_rate, self.bucket.rate + self.rate_increase)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'retries': self.retries,
+                'throttles': self.throttles,
+                'failures': self.failures,
+                'rate': self.bucket.rate,
+            }
+
+
+class ThrottledConnection(object):
+    """
+    Wraps an AutoScale connection so that every method call goes through
+    `throttler` and is reported to the stats sinks.
+    """
+
+    def __init__(self, wrapped, throttler):
+        self.wrapped = wrapped
+        self.throttler = throttler
+
+    def __getattr__(self, name):
+        attr = getattr(self.wrapped, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            with track(operation_name(name, args)[0]):
+                return self.throttler.call(attr, *args, **kwargs)
+        return call
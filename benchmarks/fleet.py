@@ -0,0 +1,43 @@
+import boto
+from boto.ec2.autoscale.group import AutoScalingGroup
+from boto.ec2.autoscale.launchconfig import LaunchConfiguration
+
+ZONES = ['us-east-1c']
+
+
+def config_name(index):
+    return "config-{:05d}".format(index)
+
+
+def group_name(index):
+    return "group-{:05d}".format(index)
+
+
+def create_fleet(configs, groups):
+    """
+    Create `configs` launch configs and `groups` groups spread evenly across
+    them in the (mocked) account, without going through autoscaler so the
+    setup isn't measured
+    """
+    conn = boto.connect_autoscale(use_block_device_types=True)
+    conn.create_launch_configuration(LaunchConfiguration(
+        name='autoscaler_default',
+        image_id='ami-1234abcd',
+        instance_type='m1.small',
+    ))
+    for index in range(configs):
+        conn.create_launch_configuration(LaunchConfiguration(
+            name=config_name(index),
+            image_id='ami-1234abcd',
+            instance_type='m1.small',
+            user_data="echo '{}' > /etc/config".format(index),
+        ))
+    for index in range(groups):
+        conn.create_auto_scaling_group(AutoScalingGroup(
+            name=group_name(index),
+            availability_zones=ZONES,
+            launch_config=config_name(index % configs),
+            min_size=0,
+            max_size=2,
+        ))
+    return conn
@@ -0,0 +1,199 @@
+from __future__ import print_function
+
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from docopt import docopt
+from moto import mock_autoscaling
+
+from autoscaler import Session, Throttler, add_launch_config, edit_launch_config, set_default_session
+from autoscaler.cli import main as cli_main
+from autoscaler.concurrency import DEFAULT_CONCURRENCY
+from autoscaler.core import groups_for_token, update_all_groups
+from autoscaler.journal import Journal
+from autoscaler.stats import MemorySink, add_sink, remove_sink
+
+from .fleet import config_name, create_fleet, group_name
+
+USAGE = """Benchmark autoscaler against a moto-backed synthetic fleet.
+Run with `python -m benchmarks.run`.
+
+Usage:
+    benchmarks [options]
+
+Options:
+    -h --help                Show this screen.
+    --sizes=<sizes>          Comma separated launch config counts [default: 100,1000].
+    --groups-per-config=<n>  Groups using each launch config [default: 1].
+    --rate=<rate>            Throttler rate in calls per second [default: 100000].
+    --concurrency=<n>        Maximum number of concurrent API operations [default: 10].
+    --output=<path>          Write the JSON results to a file instead of stdout.
+    --compare=<path>         Exit with an error if any operation makes more API
+                             calls than in these earlier results.
+"""
+
+# Launch configs and groups the manifest flows touch
+MANIFEST_SIZE = 10
+
+
+def measure(name, func, *args, **kwargs):
+    """
+    Run `func` and return its wall-clock time and the API calls it made
+    """
+    sink = add_sink(MemorySink())
+    start = time.time()
+    try:
+        func(*args, **kwargs)
+    finally:
+        seconds = time.time() - start
+        remove_sink(sink)
+    calls = OrderedDict()
+    for (_, operation), totals in sorted(sink.operations.items(), key=lambda item: item[0][1]):
+        calls[operation] = calls.get(operation, 0) + totals['calls']
+    return OrderedDict([
+        ('operation', name),
+        ('seconds', round(seconds, 4)),
+        ('api_calls', sum(calls.values())),
+        ('calls', calls),
+    ])
+
+
+@contextmanager
+def _quiet():
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        yield
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+
+def _run_cli(*argv):
+    argv_before = sys.argv
+    sys.argv = ['autoscaler'] + list(argv)
+    try:
+        with _quiet():
+            cli_main()
+    finally:
+        sys.argv = argv_before
+
+
+def _write_manifest(directory, configs):
+    manifest = OrderedDict([
+        ('launch_configs', OrderedDict(
+            (config_name(index), {'image_id': 'ami-5678abcd'})
+            for index in range(min(MANIFEST_SIZE, configs)))),
+        ('auto_scaling_groups', OrderedDict(
+            (group_name(index), {'max_size': 4})
+            for index in range(min(MANIFEST_SIZE, configs)))),
+    ])
+    path = os.path.join(directory, 'manifest.json')
+    with open(path, 'w') as manifest_file:
+        json.dump(manifest, manifest_file)
+    return path
+
+
+def benchmark_fleet(configs, groups_per_config, rate, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Return the results of every benchmark against a fresh fleet of
+    `configs` launch configs, making up to `concurrency` calls at once
+    """
+    groups = configs * groups_per_config
+    directory = tempfile.mkdtemp()
+    mock = mock_autoscaling()
+    mock.start()
+    session = Session(throttler=Throttler(rate=rate), journal=Journal(directory))
+    set_default_session(session)
+    try:
+        create_fleet(configs, groups)
+        manifest_path = _write_manifest(directory, configs)
+        concurrency_option = '--concurrency={}'.format(concurrency)
+        results = [
+            measure('groups_for_token', groups_for_token, None, session=session),
+            measure('add_launch_config', add_launch_config, 'bench-new', session=session,
+                    user_data="echo 'bench' > /etc/config"),
+            measure('update_all_groups', update_all_groups, config_name(0), 'bench-new',
+                    session=session, concurrency=concurrency),
+            measure('edit_launch_config', edit_launch_config, config_name(1), session=session,
+                    concurrency=concurrency, user_data="echo 'edited' > /etc/config"),
+            measure('edit_launch_config versioned', edit_launch_config, config_name(2),
+                    session=session, concurrency=concurrency, versioned=True,
+                    user_data="echo 'edited' > /etc/config"),
+            measure('cli apply --dry-run', _run_cli, 'apply', manifest_path, '--dry-run',
+                    concurrency_option),
+            measure('cli apply', _run_cli, 'apply', manifest_path, concurrency_option),
+            measure('cli resume', _run_cli, 'resume', concurrency_option),
+        ]
+    finally:
+        set_default_session(None)
+        mock.stop()
+        shutil.rmtree(directory)
+    for result in results:
+        result['configs'] = configs
+        result['groups'] = groups
+    return results
+
+
+def compare(results, baseline):
+    """
+    Return a message for every operation that makes more API calls than it
+    did in `baseline`
+    """
+    before = dict(((result['operation'], result['configs'], result['groups']), result['api_calls'])
+                  for result in baseline['results'])
+    regressions = []
+    for result in results['results']:
+        key = (result['operation'], result['configs'], result['groups'])
+        if key in before and result['api_calls'] > before[key]:
+            regressions.append("{} ({} configs, {} groups): {} API calls, was {}".format(
+                result['operation'], result['configs'], result['groups'],
+                result['api_calls'], before[key]))
+    return regressions
+
+
+def _version():
+    try:
+        import pkg_resources
+        return pkg_resources.get_distribution('autoscaler').version
+    except Exception:
+        return None
+
+
+def main(argv=None):
+    arguments = docopt(USAGE, argv=argv)
+    results = OrderedDict([
+        ('autoscaler', _version()),
+        ('python', platform.python_version()),
+        ('results', []),
+    ])
+    for size in arguments['--sizes'].split(','):
+        results['results'].extend(benchmark_fleet(
+            int(size), int(arguments['--groups-per-config']), float(arguments['--rate']),
+            int(arguments['--concurrency'])))
+
+    output = json.dumps(results, indent=2)
+    if arguments['--output']:
+        with open(arguments['--output'], 'w') as output_file:
+            output_file.write(output + "\n")
+    else:
+        print(output)
+
+    if arguments['--compare']:
+        with open(arguments['--compare']) as baseline_file:
+            regressions = compare(results, json.load(baseline_file))
+        for regression in regressions:
+            print(regression, file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
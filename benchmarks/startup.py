@@ -0,0 +1,94 @@
+from __future__ import print_function
+
+import json
+import platform
+import subprocess
+import sys
+import time
+from collections import OrderedDict
+
+from docopt import docopt
+
+USAGE = """Time how long the autoscaler command takes to start.
+Run with `python -m benchmarks.startup`.
+
+Usage:
+    benchmarks [options]
+
+Options:
+    -h --help          Show this screen.
+    --runs=<n>         Times to run each command [default: 10].
+    --output=<path>    Write the JSON results to a file instead of stdout.
+"""
+
+# Each snippet runs in a fresh interpreter and prints whether boto was loaded
+COMMANDS = OrderedDict([
+    ('import autoscaler', "import autoscaler"),
+    ('autoscaler --help', (
+        "import sys\n"
+        "sys.argv = ['autoscaler', '--help']\n"
+        "from autoscaler.cli import main\n"
+        "try:\n"
+        "    main()\n"
+        "except SystemExit:\n"
+        "    pass\n")),
+    ('autoscaler apply --help', (
+        "import sys\n"
+        "sys.argv = ['autoscaler', 'apply', '--help']\n"
+        "from autoscaler.cli import main\n"
+        "try:\n"
+        "    main()\n"
+        "except SystemExit:\n"
+        "    pass\n")),
+    ('import autoscaler.core', "import autoscaler.core"),
+])
+REPORT = "\nimport sys\nsys.stderr.write('boto loaded: {}\\n'.format('boto' in sys.modules))\n"
+
+
+def time_command(code, runs):
+    """
+    Return the fastest and median wall-clock time of running `code` in a new
+    interpreter, and whether it imported boto
+    """
+    timings = []
+    boto_loaded = None
+    for _ in range(runs):
+        start = time.time()
+        # -E so that nothing from PYTHONPATH (like a sitecustomize) gets
+        # imported as well
+        process = subprocess.Popen([sys.executable, '-E', '-c', code + REPORT],
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        _, errors = process.communicate()
+        timings.append(time.time() - start)
+        boto_loaded = b'boto loaded: True' in errors
+    timings.sort()
+    return OrderedDict([
+        ('min_seconds', round(timings[0], 4)),
+        ('median_seconds', round(timings[len(timings) // 2], 4)),
+        ('boto_loaded', boto_loaded),
+    ])
+
+
+def main(argv=None):
+    arguments = docopt(USAGE, argv=argv)
+    runs = int(arguments['--runs'])
+    results = OrderedDict([
+        ('python', platform.python_version()),
+        ('runs', runs),
+        ('results', []),
+    ])
+    for name, code in COMMANDS.items():
+        result = OrderedDict([('command', name)])
+        result.update(time_command(code, runs))
+        results['results'].append(result)
+
+    output = json.dumps(results, indent=2)
+    if arguments['--output']:
+        with open(arguments['--output'], 'w') as output_file:
+            output_file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
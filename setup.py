@@ -11,13 +11,17 @@ setup(
     url='https://github.com/spulec/autoscaler',
     entry_points={
         'console_scripts': [
+            'autoscaler = autoscaler.cli:main',
             'autoscaler_launch_config = autoscaler.cli:launch_config',
             'autoscaler_auto_scaling_group = autoscaler.cli:autoscaling_group',
         ],
     },
-    packages=find_packages(),
+    packages=find_packages(exclude=['benchmarks', 'benchmarks.*']),
     install_requires=[
         "boto>=2.27.0",
         "docopt",
     ],
+    extras_require={
+        'yaml': ["PyYAML"],
+    },
 )
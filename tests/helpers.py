@@ -0,0 +1,41 @@
+import boto
+from boto.ec2.autoscale.group import AutoScalingGroup
+from boto.ec2.autoscale.tag import Tag
+
+from autoscaler.concurrency import run_concurrently
+
+ZONES = ['us-east-1c']
+
+
+def group_names(prefix, count):
+    return ['{}-{}'.format(prefix, number) for number in range(count)]
+
+
+def create_groups(names, config_name='web', min_size=2, max_size=None, desired_capacity=None,
+                  tags=None):
+    """
+    Create a group for every name in `names` in the (mocked) account, all
+    using the launch config `config_name`. `max_size` defaults to `min_size`
+    and `tags` maps tag key -> value. Returns the connection
+    """
+    conn = boto.connect_autoscale(use_block_device_types=True)
+    for name in names:
+        conn.create_auto_scaling_group(AutoScalingGroup(
+            name=name,
+            availability_zones=ZONES,
+            launch_config=config_name,
+            min_size=min_size,
+            max_size=min_size if max_size is None else max_size,
+            desired_capacity=desired_capacity,
+            tags=[Tag(key=key, value=value, resource_id=name, propagate_at_launch=True)
+                  for key, value in sorted((tags or {}).items())],
+        ))
+    return conn
+
+
+def run_serially(func, items, key=None, concurrency=None):
+    """
+    Stand-in for run_concurrently that calls `func` on one item at a time,
+    for tests against moto, which isn't safe to call from several threads
+    """
+    return run_concurrently(func, items, key=key, concurrency=1)
@@ -0,0 +1,81 @@
+import threading
+import time
+from unittest import SkipTest
+
+from mock import patch
+import sure  # noqa
+
+from autoscaler import aio
+from autoscaler.stats import current_phase, phase
+
+
+def setup():
+    if aio.asyncio is None:
+        raise SkipTest("asyncio is not available")
+
+
+def _run(awaitables):
+    loop = aio.asyncio.new_event_loop()
+    aio.asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(aio.asyncio.gather(*awaitables))
+    finally:
+        loop.close()
+
+
+def test_edits_run_concurrently_up_to_the_executor_size():
+    lock = threading.Lock()
+    in_flight = [0, 0]
+
+    def edit(name, **kwargs):
+        with lock:
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight[1], in_flight[0])
+        time.sleep(0.05)
+        with lock:
+            in_flight[0] -= 1
+        return name
+
+    executor = aio.ThreadPoolExecutor(max_workers=3)
+    with patch('autoscaler.core.edit_launch_config', side_effect=edit):
+        results = _run([aio.edit_launch_config("web{}".format(index), executor=executor,
+                                               image_id="ami-1234")
+                        for index in range(10)])
+    executor.shutdown()
+
+    results.should.equal(["web{}".format(index) for index in range(10)])
+    in_flight[1].should.equal(3)
+
+
+def test_set_executor_bounds_calls_without_an_executor():
+    lock = threading.Lock()
+    in_flight = [0, 0]
+
+    def edit(name, **kwargs):
+        with lock:
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight[1], in_flight[0])
+        time.sleep(0.05)
+        with lock:
+            in_flight[0] -= 1
+        return name
+
+    aio.set_executor(aio.ThreadPoolExecutor(max_workers=2))
+    try:
+        with patch('autoscaler.core.edit_auto_scaling_group', side_effect=edit):
+            _run([aio.edit_auto_scaling_group("web{}".format(index), max_size=4)
+                  for index in range(6)])
+    finally:
+        aio.set_executor(None)
+
+    in_flight[1].should.equal(2)
+    aio.get_executor()._max_workers.should.equal(aio.DEFAULT_EXECUTOR_SIZE)
+
+
+def test_calls_keep_the_callers_phase():
+    executor = aio.ThreadPoolExecutor(max_workers=1)
+    with patch('autoscaler.core.add_auto_scaling_group', side_effect=lambda name, **kwargs: current_phase()):
+        with phase('deploy'):
+            awaitable = aio.add_auto_scaling_group("web", executor=executor)
+        _run([awaitable]).should.equal(['deploy'])
+    executor.shutdown()
@@ -0,0 +1,146 @@
+from collections import OrderedDict
+
+from moto import mock_autoscaling
+import sure  # noqa
+
+from autoscaler import AutoScalerException, Session, add_launch_config, edit_launch_config
+from autoscaler.bases import BaseConfigResolver
+from autoscaler.core import empty_launch_config_attrs, resolve_base
+from autoscaler.stats import MemorySink, add_sink, remove_sink
+
+
+class FakeDescribe(object):
+    def __init__(self, missing=()):
+        self.missing = missing
+        self.calls = []
+
+    def __call__(self, name):
+        self.calls.append(name)
+        if name in self.missing:
+            return OrderedDict([('image_id', ''), ('instance_type', '')])
+        return OrderedDict([('image_id', 'ami-1234'), ('instance_type', 'm1.small')])
+
+
+def test_resolver_does_not_remember_missing_bases():
+    describe = FakeDescribe(missing=['autoscaler_default'])
+    resolver = BaseConfigResolver()
+
+    resolver.resolve('autoscaler_default', describe)['image_id'].should.equal('')
+    resolver.resolve('autoscaler_default', describe)['image_id'].should.equal('')
+    describe.calls.should.equal(['autoscaler_default', 'autoscaler_default'])
+
+
+def test_resolver_memoizes_bases():
+    describe = FakeDescribe()
+    resolver = BaseConfigResolver()
+
+    resolver.resolve('autoscaler_default', describe)['image_id'].should.equal('ami-1234')
+    resolver.resolve('autoscaler_default', describe)['image_id'].should.equal('ami-1234')
+    describe.calls.should.equal(['autoscaler_default'])
+
+
+def test_resolver_returns_copies():
+    resolver = BaseConfigResolver()
+    resolver.resolve('autoscaler_default', FakeDescribe())['image_id'] = 'ami-9999'
+
+    resolver.resolve('autoscaler_default', FakeDescribe())['image_id'].should.equal('ami-1234')
+
+
+def test_resolver_evicts_least_recently_used():
+    describe = FakeDescribe()
+    resolver = BaseConfigResolver(maxsize=2)
+    resolver.resolve('a', describe)
+    resolver.resolve('b', describe)
+    resolver.resolve('a', describe)
+    resolver.resolve('c', describe)
+    resolver.resolve('a', describe)
+    resolver.resolve('b', describe)
+
+    describe.calls.should.equal(['a', 'b', 'c', 'b'])
+
+
+def test_resolver_follows_chained_bases():
+    describe = FakeDescribe(missing=['web_base', 'web_frontend'])
+    resolver = BaseConfigResolver()
+    resolver.register('web_base', 'autoscaler_default', {'instance_type': 'm1.large'})
+    resolver.register('web_frontend', 'web_base', {'key_name': 'frontend'})
+
+    attributes = resolver.resolve('web_frontend', describe)
+    attributes['image_id'].should.equal('ami-1234')
+    attributes['instance_type'].should.equal('m1.large')
+    attributes['key_name'].should.equal('frontend')
+
+    resolver.resolve('web_base', describe)
+    describe.calls.should.equal(['web_frontend', 'web_base', 'autoscaler_default'])
+
+
+def test_invalidating_a_base_invalidates_its_chains():
+    describe = FakeDescribe(missing=['web_base'])
+    resolver = BaseConfigResolver()
+    resolver.register('web_base', 'autoscaler_default', {'instance_type': 'm1.large'})
+    resolver.resolve('web_base', describe)
+    resolver.resolve('other', describe)
+
+    resolver.invalidate('autoscaler_default')
+    resolver.resolve('web_base', describe)
+    resolver.resolve('other', describe)
+
+    describe.calls.should.equal([
+        'web_base', 'autoscaler_default', 'other', 'web_base', 'autoscaler_default'])
+
+
+def test_resolver_rejects_cycles():
+    resolver = BaseConfigResolver()
+    resolver.register('a', 'b', {})
+    resolver.register('b', 'a', {})
+
+    resolver.resolve.when.called_with('a', FakeDescribe(missing=['a', 'b'])).should.throw(AutoScalerException)
+
+
+def _describe_count(sink):
+    return sum(totals['calls'] for (_, operation), totals in sink.operations.items()
+               if operation == 'DescribeLaunchConfigurations')
+
+
+@mock_autoscaling
+def test_default_config_is_described_once():
+    session = Session()
+    add_launch_config("autoscaler_default", session=session, image_id="ami-1234",
+                      instance_type="m1.small")
+
+    sink = add_sink(MemorySink())
+    try:
+        for index in range(5):
+            add_launch_config("web{}".format(index), session=session, key_name="web")
+    finally:
+        remove_sink(sink)
+
+    _describe_count(sink).should.equal(1)
+
+
+@mock_autoscaling
+def test_no_base_is_not_described():
+    session = Session()
+    session.bases.register("web", None, {'instance_type': 'm1.large'})
+
+    sink = add_sink(MemorySink())
+    try:
+        add_launch_config("worker", base=None, session=session, image_id="ami-1234")
+        # Bases registered without a parent end at no base as well
+        add_launch_config("web-1", base="web", session=session, image_id="ami-1234")
+    finally:
+        remove_sink(sink)
+
+    _describe_count(sink).should.equal(1)
+    resolve_base(None, session=Session()).should.equal(empty_launch_config_attrs)
+
+
+@mock_autoscaling
+def test_editing_a_base_invalidates_it():
+    session = Session()
+    add_launch_config("autoscaler_default", session=session, image_id="ami-1234")
+    add_launch_config("web", session=session).image_id.should.equal("ami-1234")
+
+    edit_launch_config("autoscaler_default", session=session, image_id="ami-5678")
+
+    add_launch_config("api", session=session).image_id.should.equal("ami-5678")
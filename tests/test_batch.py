@@ -0,0 +1,146 @@
+import json
+
+import boto
+from mock import patch
+from moto import mock_autoscaling
+import sure  # noqa
+
+from autoscaler import AutoScalerException, add_launch_config
+from autoscaler.cli import _read_batch, _parse_config_value, main
+from autoscaler.core import launch_config_attrs
+from autoscaler.stats import MemorySink, add_sink, remove_sink
+
+try:
+    from StringIO import StringIO
+except ImportError:  # pragma: no cover
+    from io import StringIO
+
+from helpers import create_groups, group_names
+
+
+def _batch(*objects):
+    return StringIO("".join(json.dumps(obj) + "\n" for obj in objects))
+
+
+@mock_autoscaling
+@patch('autoscaler.cli.get_input')
+@patch('autoscaler.cli.sys')
+def test_launch_config_add_set(sys, user_input):
+    sys.argv = ['autoscaler', 'launch-config', 'add', 'web', '--set', 'image_id=ami-1234abcd',
+                '--set', 'security_groups=default,web', '--set', 'instance_monitoring=true',
+                '--set', 'block_device_mappings=/dev/xvdb=ephemeral0']
+
+    main()
+
+    user_input.called.should.equal(False)
+    conn = boto.connect_autoscale(use_block_device_types=True)
+    config = conn.get_all_launch_configurations(names=['web'])[0]
+    config.image_id.should.equal('ami-1234abcd')
+    set(config.security_groups).should.equal(set(['default', 'web']))
+    config.instance_monitoring.enabled.should.equal('true')
+    config.block_device_mappings['/dev/xvdb'].ephemeral_name.should.equal('ephemeral0')
+
+
+@mock_autoscaling
+@patch('autoscaler.cli.sys')
+def test_launch_config_edit_set_keeps_other_values(sys):
+    add_launch_config("web", base=None, image_id="ami-1234abcd", instance_type="m1.small")
+    sys.argv = ['autoscaler', 'launch-config', 'edit', 'web', '--set', 'instance_type=m1.large']
+
+    main()
+
+    conn = boto.connect_autoscale(use_block_device_types=True)
+    config = conn.get_all_launch_configurations(names=['web'])[0]
+    config.image_id.should.equal('ami-1234abcd')
+    config.instance_type.should.equal('m1.large')
+
+
+@patch('autoscaler.cli.sys')
+def test_set_unknown_attribute(sys):
+    sys.argv = ['autoscaler', 'launch-config', 'edit', 'web', '--set', 'colour=blue']
+
+    main.when.called_with().should.throw(AutoScalerException, "Unknown attributes colour")
+
+
+def test_read_batch():
+    objects = _read_batch(_batch(
+        {'name': 'web', 'image_id': 'ami-1234', 'security_groups': ['default']},
+        {'name': 'worker', 'block_device_mappings': {'/dev/xvdb': {'ephemeral_name': 'ephemeral0'}}},
+    ), launch_config_attrs, _parse_config_value)
+
+    [name for name, _ in objects].should.equal(['web', 'worker'])
+    objects[0][1].should.equal({'image_id': 'ami-1234', 'security_groups': ['default']})
+    objects[1][1]['block_device_mappings'][0]['/dev/xvdb'].ephemeral_name.should.equal('ephemeral0')
+
+
+def test_read_batch_errors():
+    _read_batch.when.called_with(_batch({'image_id': 'ami-1234'}), launch_config_attrs,
+                                 _parse_config_value).should.throw(
+        AutoScalerException, "Line 1 of the batch has no name")
+    _read_batch.when.called_with(_batch({'name': 'web'}, {'name': 'web'}), launch_config_attrs,
+                                 _parse_config_value).should.throw(
+        AutoScalerException, "web is in the batch more than once")
+    _read_batch.when.called_with(StringIO("{\n"), launch_config_attrs,
+                                 _parse_config_value).should.throw(
+        AutoScalerException, "Line 1 of the batch isn't a JSON object")
+
+
+@mock_autoscaling
+@patch('autoscaler.cli.sys')
+@patch('autoscaler.cli.print', create=True)
+def test_launch_config_batch(printer, sys):
+    sys.argv = ['autoscaler', 'launch-config', 'add', '--batch', '--concurrency', '1']
+    sys.stdin = _batch(*[
+        {'name': 'web-{}'.format(index), 'base': None, 'image_id': 'ami-1234'}
+        for index in range(10)
+    ])
+
+    with patch('autoscaler.session.boto.connect_autoscale', wraps=boto.connect_autoscale) as connect:
+        main()
+
+    lines = [call[0][0] for call in printer.call_args_list]
+    sorted(lines[:10]).should.equal(sorted("Launch config web-{} created".format(index)
+                                           for index in range(10)))
+    lines[10].should.equal("10 succeeded, 0 failed")
+    # At most one connection, reused for every operation
+    connect.call_count.should.be.lower_than(2)
+    conn = boto.connect_autoscale(use_block_device_types=True)
+    conn.get_all_launch_configurations().should.have.length_of(10)
+    sys.exit.called.should.equal(False)
+
+
+@mock_autoscaling
+@patch('autoscaler.cli.sys')
+@patch('autoscaler.cli.print', create=True)
+def test_group_batch_failures(printer, sys):
+    add_launch_config("web", base=None, image_id="ami-1234")
+    sys.argv = ['autoscaler', 'auto-scaling-group', 'edit', '--batch']
+    sys.stdin = _batch({'name': 'missing', 'max_size': 4})
+
+    main()
+
+    lines = [call[0][0] for call in printer.call_args_list]
+    lines[0].should.match(r"^missing failed: ")
+    lines[1].should.equal("0 succeeded, 1 failed")
+    sys.exit.assert_called_once_with(1)
+
+
+@mock_autoscaling
+@patch('autoscaler.cli.sys')
+@patch('autoscaler.cli.print', create=True)
+def test_group_batch_describes_groups_together(printer, sys):
+    add_launch_config("web", base=None, image_id="ami-1234")
+    conn = create_groups(group_names('web', 3))
+    sys.argv = ['autoscaler', 'auto-scaling-group', 'edit', '--batch', '--concurrency', '1']
+    sys.stdin = _batch(*[{'name': name, 'max_size': 4} for name in group_names('web', 3)])
+
+    sink = add_sink(MemorySink())
+    try:
+        main()
+    finally:
+        remove_sink(sink)
+
+    [call[0][0] for call in printer.call_args_list][-1].should.equal("3 succeeded, 0 failed")
+    sum(totals['calls'] for (_, operation), totals in sink.operations.items()
+        if operation == 'DescribeAutoScalingGroups').should.equal(1)
+    set(group.max_size for group in conn.get_all_groups()).should.equal(set([4]))
@@ -0,0 +1,29 @@
+import sure  # noqa
+
+from benchmarks.run import benchmark_fleet, compare
+
+
+def test_benchmark_fleet_counts_api_calls():
+    results = benchmark_fleet(3, 2, rate=100000, concurrency=1)
+
+    results_by_operation = dict((result['operation'], result) for result in results)
+    groups_for_token = results_by_operation['groups_for_token']
+    groups_for_token['groups'].should.equal(6)
+    dict(groups_for_token['calls']).should.equal({'DescribeAutoScalingGroups': 1})
+    results_by_operation['update_all_groups']['calls']['UpdateAutoScalingGroup'].should.equal(2)
+
+
+def test_compare_reports_more_api_calls():
+    baseline = {'results': [
+        {'operation': 'edit_launch_config', 'configs': 100, 'groups': 100, 'api_calls': 8},
+        {'operation': 'add_launch_config', 'configs': 100, 'groups': 100, 'api_calls': 2},
+    ]}
+    results = {'results': [
+        {'operation': 'edit_launch_config', 'configs': 100, 'groups': 100, 'api_calls': 9},
+        {'operation': 'add_launch_config', 'configs': 100, 'groups': 100, 'api_calls': 2},
+        {'operation': 'cli apply', 'configs': 100, 'groups': 100, 'api_calls': 50},
+    ]}
+
+    compare(results, baseline).should.equal([
+        "edit_launch_config (100 configs, 100 groups): 9 API calls, was 8",
+    ])
@@ -0,0 +1,125 @@
+import os
+import shutil
+import tempfile
+
+from mock import patch
+from moto import mock_autoscaling
+import sure  # noqa
+
+from autoscaler import Session, add_launch_config, edit_auto_scaling_group, edit_launch_config
+from autoscaler.cache import GROUP, LAUNCH_CONFIG, MISSING, Inventory, inventory_from_environment
+from autoscaler.stats import MemorySink, add_sink, remove_sink
+from autoscaler.core import add_auto_scaling_group, get_config_values, get_group_attributes_or_defaults
+from autoscaler.diff import update_group
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_inventory_entries_expire():
+    clock = FakeClock()
+    inventory = Inventory(path=':memory:', ttl=60, clock=clock)
+    inventory.put(LAUNCH_CONFIG, "web", {'image_id': 'ami-1234'})
+
+    inventory.get(LAUNCH_CONFIG, "web").should.equal({'image_id': 'ami-1234'})
+    clock.now += 61
+    inventory.get(LAUNCH_CONFIG, "web").should.be.none
+
+
+def test_inventory_caches_misses():
+    inventory = Inventory(path=':memory:')
+    inventory.put(GROUP, "web", MISSING)
+
+    inventory.get(GROUP, "web").should.be(MISSING)
+    inventory.get(LAUNCH_CONFIG, "web").should.be.none
+
+
+def test_inventory_namespaces_are_separate():
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'cache', 'inventory.sqlite')
+        east = Inventory(path=path, namespace='us-east-1')
+        west = Inventory(path=path, namespace='us-west-2')
+        east.put(LAUNCH_CONFIG, "web", {'image_id': 'ami-1234'})
+
+        west.get(LAUNCH_CONFIG, "web").should.be.none
+        Inventory(path=path, namespace='us-east-1').get(LAUNCH_CONFIG, "web").should.equal(
+            {'image_id': 'ami-1234'})
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_inventory_from_environment():
+    with patch.dict(os.environ, {'AUTOSCALER_CACHE_TTL': ''}):
+        inventory_from_environment().should.be.none
+
+
+@mock_autoscaling
+def test_repeated_describes_are_served_from_the_cache():
+    session = Session(inventory=Inventory(path=':memory:'))
+    add_launch_config("web", session=session, image_id="ami-1234")
+
+    sink = add_sink(MemorySink())
+    try:
+        get_config_values("web", session=session)['image_id'].should.equal("ami-1234")
+        get_config_values("web", session=session)['image_id'].should.equal("ami-1234")
+        get_config_values("missing", session=session)['image_id'].should.equal("")
+        get_config_values("missing", session=session)['image_id'].should.equal("")
+    finally:
+        remove_sink(sink)
+
+    sink.operations[('other', 'DescribeLaunchConfigurations')]['calls'].should.equal(2)
+
+
+@mock_autoscaling
+def test_writes_invalidate_the_cache():
+    session = Session(inventory=Inventory(path=':memory:'))
+    get_config_values("web", session=session)['image_id'].should.equal("")
+
+    add_launch_config("web", session=session, image_id="ami-1234")
+    get_config_values("web", session=session)['image_id'].should.equal("ami-1234")
+
+    edit_launch_config("web", session=session, image_id="ami-5678")
+    get_config_values("web", session=session)['image_id'].should.equal("ami-5678")
+
+    get_group_attributes_or_defaults("web_group", session=session)['max_size'].should.equal("")
+    add_auto_scaling_group("web_group", session=session, launch_config="web",
+                           availability_zones=['us-east-1c'], min_size=1, max_size=2)
+    get_group_attributes_or_defaults("web_group", session=session)['max_size'].should.equal(2)
+
+
+@mock_autoscaling
+def test_group_edit_invalidates_after_the_update():
+    session = Session(inventory=Inventory(path=':memory:'))
+    add_launch_config("web", session=session, image_id="ami-1234")
+    add_auto_scaling_group("web_group", session=session, launch_config="web",
+                           availability_zones=['us-east-1c'], min_size=1, max_size=2)
+
+    def describe_then_update(conn, name, changes):
+        # Another thread describing the group while it is being updated
+        get_group_attributes_or_defaults(name, session=session)
+        return update_group(conn, name, changes)
+
+    with patch('autoscaler.core.update_group', describe_then_update):
+        edit_auto_scaling_group("web_group", session=session, max_size=4)
+
+    get_group_attributes_or_defaults("web_group", session=session)['max_size'].should.equal(4)
+
+
+def test_inventory_put_skips_names_invalidated_since_described():
+    clock = FakeClock()
+    inventory = Inventory(path=':memory:', clock=clock)
+    described_at = inventory.now()
+    clock.now += 1
+    inventory.invalidate(LAUNCH_CONFIG, "web")
+
+    inventory.put(LAUNCH_CONFIG, "web", {'image_id': 'ami-old'}, described_at=described_at)
+    inventory.put(LAUNCH_CONFIG, "worker", {'image_id': 'ami-1234'}, described_at=described_at)
+
+    inventory.get(LAUNCH_CONFIG, "web").should.be.none
+    inventory.get(LAUNCH_CONFIG, "worker").should.equal({'image_id': 'ami-1234'})
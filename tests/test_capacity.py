@@ -0,0 +1,175 @@
+import json
+import os
+import shutil
+import tempfile
+
+import boto
+import boto.ec2.autoscale
+from boto.ec2.autoscale import AutoScaleConnection
+from boto.ec2.autoscale.group import AutoScalingGroup
+from mock import patch
+from moto import mock_autoscaling
+import sure  # noqa
+
+from autoscaler import AutoScalerException, Session, add_launch_config
+from autoscaler.capacity import load_state, restore_capacity, select_groups, set_capacity
+from autoscaler.cli import main
+
+from helpers import create_groups, run_serially
+
+directory = None
+
+
+def setup():
+    global directory
+    directory = tempfile.mkdtemp()
+
+
+def teardown():
+    shutil.rmtree(directory)
+
+
+def _state_path(name):
+    return os.path.join(directory, name)
+
+
+def _add_groups(groups):
+    # groups maps group name -> (environment tag, size)
+    add_launch_config("web", base=None, image_id="ami-1234")
+    for name, (environment, size) in groups.items():
+        create_groups([name], min_size=size, max_size=size * 2, desired_capacity=size,
+                      tags={'environment': environment})
+
+
+def _capacities(conn):
+    return dict((group.name, (group.min_size, group.max_size, group.desired_capacity))
+                for group in conn.get_all_groups())
+
+
+@mock_autoscaling
+def test_select_groups():
+    conn = boto.connect_autoscale(use_block_device_types=True)
+    _add_groups({'staging-web': ('staging', 2), 'staging-worker': ('staging', 1),
+                 'prod-web': ('prod', 4)})
+
+    sorted(group.name for group in select_groups("staging-*")).should.equal(
+        ['staging-web', 'staging-worker'])
+    [group.name for group in select_groups(tags={'environment': 'prod'})].should.equal(['prod-web'])
+    [group.name for group in select_groups("*-web", {'environment': None})].should.have.length_of(2)
+    select_groups(tags={'team': None}).should.equal([])
+
+
+@mock_autoscaling
+def test_scale_to_zero_and_back():
+    conn = boto.connect_autoscale(use_block_device_types=True)
+    _add_groups(dict(('staging-{}'.format(number), ('staging', number + 1))
+                      for number in range(8)))
+    _add_groups({'prod-web': ('prod', 4)})
+    state_path = _state_path('scale.json')
+    groups = select_groups(tags={'environment': 'staging'})
+
+    with patch('boto.ec2.autoscale.AutoScaleConnection.get_all_groups',
+               autospec=True, side_effect=AutoScaleConnection.get_all_groups) as get_all_groups:
+        result = set_capacity(groups, state_path=state_path, concurrency=1,
+                              min_size=0, max_size=0, desired_capacity=0)
+    # The groups were described by select_groups
+    get_all_groups.call_count.should.equal(0)
+    result.failed.should.be.empty
+    capacities = _capacities(conn)
+    capacities.pop('prod-web').should.equal((4, 8, 4))
+    set(capacities.values()).should.equal(set([(0, 0, 0)]))
+    dict(load_state(state_path)['staging-2']).should.equal(
+        {'min_size': 3, 'max_size': 6, 'desired_capacity': 3})
+
+    # Scaling down again keeps the capacity to go back to
+    set_capacity(select_groups("staging-2"), state_path=state_path, concurrency=1,
+                 desired_capacity=0)
+    load_state(state_path)['staging-2']['max_size'].should.equal(6)
+
+    result = restore_capacity(state_path=state_path, concurrency=1)
+
+    sorted(result.succeeded).should.equal(['staging-{}'.format(number) for number in range(8)])
+    _capacities(conn)['staging-2'].should.equal((3, 6, 3))
+    dict(load_state(state_path)).should.equal({})
+
+
+@mock_autoscaling
+def test_restore_capacity_keeps_failed_groups():
+    conn = boto.connect_autoscale(use_block_device_types=True)
+    _add_groups({'staging-web': ('staging', 2), 'staging-worker': ('staging', 1)})
+    state_path = _state_path('failed.json')
+    set_capacity(select_groups("staging-*"), state_path=state_path, concurrency=1, min_size=0,
+                 desired_capacity=0)
+    conn.delete_auto_scaling_group('staging-worker', force_delete=True)
+
+    result = restore_capacity(state_path=state_path, pattern="staging-*", concurrency=1)
+
+    list(result.succeeded).should.equal(['staging-web'])
+    list(result.failed).should.equal(['staging-worker'])
+    list(load_state(state_path)).should.equal(['staging-worker'])
+
+
+def test_set_capacity_unknown_attribute():
+    set_capacity.when.called_with([], state_path=_state_path('unknown.json'), colour=0).should.throw(
+        AutoScalerException, "Unknown capacity attributes colour")
+
+
+@mock_autoscaling
+@patch('autoscaler.cli.sys')
+@patch('autoscaler.cli.print', create=True)
+def test_capacity_cli(printer, sys):
+    conn = boto.connect_autoscale(use_block_device_types=True)
+    _add_groups({'staging-web': ('staging', 2), 'prod-web': ('prod', 4)})
+    state_path = _state_path('cli.json')
+    sys.argv = ['autoscaler', 'capacity', 'set', '--tag', 'environment=staging', '--min', '0',
+                '--desired', '0', '--state', state_path]
+
+    main()
+
+    printer.assert_any_call("AutoScaling group staging-web updated")
+    printer.assert_any_call("1 succeeded, 0 failed")
+    _capacities(conn).should.equal({'staging-web': (0, 4, 0), 'prod-web': (4, 8, 4)})
+    with open(state_path) as state_file:
+        json.load(state_file).should.equal(
+            {'staging-web': {'min_size': 2, 'max_size': 4, 'desired_capacity': 2}})
+
+    sys.argv = ['autoscaler', 'capacity', 'restore', '--state', state_path]
+    main()
+
+    _capacities(conn)['staging-web'].should.equal((2, 4, 2))
+    sys.exit.called.should.equal(False)
+
+
+@mock_autoscaling
+@patch('autoscaler.concurrency.run_concurrently', run_serially)
+@patch('autoscaler.cli.sys')
+@patch('autoscaler.cli.print', create=True)
+def test_capacity_cli_dry_run_regions(printer, sys):
+    add_launch_config("web", base=None, session=Session(region='us-west-2'), image_id="ami-1234")
+    conn = boto.ec2.autoscale.connect_to_region('us-west-2')
+    conn.create_auto_scaling_group(AutoScalingGroup(
+        name='staging-web', availability_zones=['us-west-2a'], launch_config='web',
+        min_size=1, max_size=1, desired_capacity=1,
+    ))
+    state_path = _state_path('regions.json')
+    sys.argv = ['autoscaler', 'capacity', 'set', 'staging-*', '--desired', '0', '--state', state_path,
+                '--dry-run', '--region', 'us-west-2', '--region', 'eu-west-1']
+
+    main()
+
+    lines = [call[0][0] for call in printer.call_args_list]
+    lines[0].should.equal("us-west-2:")
+    lines[1].should.equal("1 succeeded, 0 failed")
+    lines[2].should.equal("Dry run, no changes were made")
+    lines[3].should.contain("UpdateAutoScalingGroup")
+    conn.get_all_groups()[0].desired_capacity.should.equal(1)
+    os.listdir(directory).should_not.contain('regions.us-west-2.json')
+
+
+@patch('autoscaler.cli.sys')
+def test_capacity_cli_needs_a_selection(sys):
+    sys.exit.side_effect = SystemExit
+    sys.argv = ['autoscaler', 'capacity', 'set', '--desired', '0']
+
+    main.when.called_with().should.throw(SystemExit)
+    sys.exit.assert_called_once_with("Select groups with a name pattern or --tag")
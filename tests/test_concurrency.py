@@ -0,0 +1,81 @@
+import threading
+import time
+
+import boto
+from boto.ec2.autoscale.group import AutoScalingGroup
+from boto.exception import BotoServerError
+from mock import Mock, patch
+from moto import mock_autoscaling
+import sure  # noqa
+
+from autoscaler import Session, add_launch_config, edit_launch_config, GroupUpdateError
+from autoscaler.concurrency import run_concurrently
+from autoscaler.core import LaunchConfigIndex, update_all_groups
+
+from helpers import create_groups, group_names
+
+
+def test_run_concurrently_is_bounded():
+    lock = threading.Lock()
+    state = {'running': 0, 'peak': 0}
+
+    def work(item):
+        with lock:
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+        time.sleep(0.01)
+        with lock:
+            state['running'] -= 1
+        if item == 3:
+            raise ValueError(item)
+        return item * 2
+
+    result = run_concurrently(work, range(10), concurrency=4)
+
+    state['peak'].should.be.lower_than(5)
+    result.succeeded[2].should.equal(4)
+    list(result.failed).should.equal([3])
+    result.failed[3].should.be.a(ValueError)
+
+
+@patch('autoscaler.session.boto.connect_autoscale', Mock())
+def test_update_all_groups_collects_failures():
+    lock = threading.Lock()
+    in_flight = [0, 0]
+
+    def update(conn, name, changes):
+        with lock:
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight[1], in_flight[0])
+        time.sleep(0.05)
+        with lock:
+            in_flight[0] -= 1
+        if name == 'web-2':
+            raise BotoServerError(400, 'Bad Request')
+
+    # Stubbed connections, as moto isn't safe to call from several threads
+    index = LaunchConfigIndex(AutoScalingGroup(name=name, launch_config='web')
+                              for name in group_names('web', 6))
+    with patch('autoscaler.core.update_group', side_effect=update):
+        result = update_all_groups('web', 'other', session=Session(), index=index, concurrency=3)
+
+    in_flight[1].should.equal(3)
+    sorted(result.succeeded).should.equal(['web-0', 'web-1', 'web-3', 'web-4', 'web-5'])
+    list(result.failed).should.equal(['web-2'])
+    # The group that failed stays on the old config
+    [group.name for group in index.groups_for('web')].should.equal(['web-2'])
+
+
+@mock_autoscaling
+def test_edit_launch_config_stops_on_failed_reassignment():
+    add_launch_config("web")
+    create_groups(['web-1', 'web-2'])
+
+    with patch('autoscaler.core.update_group', side_effect=BotoServerError(400, 'Bad Request')):
+        (edit_launch_config.when.called_with("web", concurrency=1,
+                                             user_data="echo 'other_machine' > /etc/config")
+            .should.throw(GroupUpdateError))
+
+    # The original config is left in place when groups could not be moved
+    conn = boto.connect_autoscale(use_block_device_types=True)
+    conn.get_all_launch_configurations(names=['web']).should.have.length_of(1)
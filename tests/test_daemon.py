@@ -0,0 +1,196 @@
+import json
+import os
+import shutil
+import tempfile
+
+import boto
+from mock import patch
+from moto import mock_autoscaling
+import sure  # noqa
+
+from autoscaler import AutoScalerException, Session, add_launch_config, edit_launch_config
+from autoscaler.cache import LAUNCH_CONFIG, GROUP, Inventory
+from autoscaler.cli import main
+from autoscaler.core import add_auto_scaling_group, refresh_inventory
+from autoscaler.daemon import Client, Daemon
+from autoscaler.stats import MemorySink, add_sink, remove_sink
+
+directory = None
+daemon = None
+client = None
+
+
+def setup():
+    global directory, daemon, client
+    directory = tempfile.mkdtemp()
+    # Started before any test mocks AutoScaling, which also patches the
+    # socket module. The tests refresh it themselves.
+    daemon = Daemon(os.path.join(directory, 'daemon.sock'), refresh_interval=None)
+    daemon.start()
+    client = Client(daemon.path)
+
+
+def teardown():
+    daemon.stop()
+    shutil.rmtree(directory)
+
+
+def _round_trip(request):
+    return json.loads(json.dumps(daemon.handle(request)))
+
+
+def _reset_daemon():
+    # Each test mocks a fresh account
+    daemon.session.inventory.clear()
+    daemon.session.bases.clear()
+
+
+@mock_autoscaling
+def test_refresh_inventory():
+    add_launch_config("web", base=None, image_id="ami-1234")
+    add_auto_scaling_group("web", availability_zones=['us-east-1c'], launch_config="web",
+                           min_size=1, max_size=1)
+    session = Session(inventory=Inventory(path=':memory:'))
+
+    dict(refresh_inventory(session=session)).should.equal({LAUNCH_CONFIG: 1, GROUP: 1})
+
+    session.inventory.get(LAUNCH_CONFIG, "web")['image_id'].should.equal("ami-1234")
+    session.inventory.get(GROUP, "web")['max_size'].should.equal(1)
+    sink = add_sink(MemorySink())
+    try:
+        edit_launch_config("web", session=session, image_id="ami-5678")
+    finally:
+        remove_sink(sink)
+    # Edits invalidate what the refresh cached
+    session.inventory.get(LAUNCH_CONFIG, "web").should.be.none
+
+
+@mock_autoscaling
+def test_daemon_operations():
+    _reset_daemon()
+
+    # What goes over the socket
+    record = _round_trip({
+        'operation': 'add_launch_config', 'args': ['web'],
+        'kwargs': {'base': None, 'image_id': 'ami-1234',
+                   'block_device_mappings': {'/dev/xvdb': {'ephemeral_name': 'ephemeral0'}}},
+    })['result']
+    values = _round_trip({'operation': 'get_config_values_many', 'args': [['web', 'missing']]})['result']
+
+    record['name'].should.equal('web')
+    record['block_device_mappings'].should.equal({'/dev/xvdb': {'ephemeral_name': 'ephemeral0'}})
+    values['web']['image_id'].should.equal('ami-1234')
+    values['missing']['image_id'].should.equal('')
+
+
+@mock_autoscaling
+def test_daemon_serves_describes_from_the_inventory():
+    _reset_daemon()
+    add_launch_config("web", base=None, image_id="ami-1234")
+    daemon.refresh()
+    sink = add_sink(MemorySink())
+    try:
+        values = daemon.call('get_config_values_many', [['web']], {})
+    finally:
+        remove_sink(sink)
+
+    values['web']['image_id'].should.equal('ami-1234')
+    sink.operations.should.be.empty
+
+
+@mock_autoscaling
+def test_refresh_forgets_resolved_bases():
+    _reset_daemon()
+    other_process = Session()
+    add_launch_config("autoscaler_default", base=None, session=other_process, image_id="ami-old")
+    daemon.call('add_launch_config', ['a'], {})['image_id'].should.equal('ami-old')
+
+    conn = boto.connect_autoscale(use_block_device_types=True)
+    conn.delete_launch_configuration('autoscaler_default')
+    add_launch_config("autoscaler_default", base=None, session=other_process, image_id="ami-new")
+    daemon.refresh()
+
+    daemon.call('add_launch_config', ['b'], {})['image_id'].should.equal('ami-new')
+
+
+@mock_autoscaling
+def test_daemon_commands():
+    _reset_daemon()
+    add_launch_config("web", base=None, image_id="ami-1234")
+
+    daemon.run_command(['launch-config', 'edit', 'web', '--set', 'image_id=ami-5678']).should.equal(
+        (0, "Launch config web updated\n"))
+    status, output = daemon.run_command(['launch-config', 'edit', '--batch'],
+                                        stdin='{"name": "missing", "image_id": "ami-5678"}\n')
+
+    conn = boto.connect_autoscale(use_block_device_types=True)
+    conn.get_all_launch_configurations(names=['web'])[0].image_id.should.equal('ami-5678')
+    status.should.equal(1)
+    output.should.contain("missing failed")
+
+
+def test_client():
+    # The socket module is left alone here, unlike under mock_autoscaling
+    client.available().should.equal(True)
+    client.call.when.called_with('delete_everything').should.throw(
+        AutoScalerException, "Unknown operation delete_everything")
+    Daemon(daemon.path, session=daemon.session).start.when.called_with().should.throw(
+        AutoScalerException, "A daemon is already listening")
+
+
+def test_stopped_daemon_removes_its_socket():
+    stopped = Daemon(os.path.join(directory, 'stopped.sock'), session=daemon.session)
+    stopped.start()
+    stopped.stop()
+
+    os.path.exists(stopped.path).should.equal(False)
+    Client(stopped.path).available().should.equal(False)
+
+
+@patch('autoscaler.cli.sys')
+def test_cli_forwards_to_the_daemon(sys):
+    sys.argv = ['autoscaler', 'launch-config', 'edit', 'web', '--set', 'image_id=ami-5678']
+    with patch.dict(os.environ, {'AUTOSCALER_SOCKET': daemon.path}):
+        with patch.object(daemon, 'run_command', return_value=(0, "Launch config web updated\n")) as run:
+            with patch('autoscaler.cli.dispatch') as dispatch:
+                main()
+
+    run.assert_called_once_with(['launch-config', 'edit', 'web', '--set', 'image_id=ami-5678'],
+                                None, os.getcwd())
+    dispatch.called.should.equal(False)
+    sys.stdout.write.assert_called_once_with("Launch config web updated\n")
+    sys.exit.called.should.equal(False)
+
+
+@patch('autoscaler.cli.sys')
+def test_cli_runs_health_checks_in_process(sys):
+    argv = ['launch-config', 'edit', 'web', '--set', 'image_id=ami-5678', '--waves=1',
+            '--health-check=checks:healthy']
+    sys.argv = ['autoscaler'] + argv
+    with patch.dict(os.environ, {'AUTOSCALER_SOCKET': daemon.path}):
+        with patch.object(daemon, 'run_command') as run:
+            with patch('autoscaler.cli.dispatch') as dispatch:
+                main()
+
+    run.called.should.equal(False)
+    dispatch.assert_called_once_with(argv)
+
+
+@patch('autoscaler.cli.sys')
+def test_cli_runs_in_process_without_a_daemon(sys):
+    sys.argv = ['autoscaler', 'apply', 'manifest.json']
+    with patch.dict(os.environ, {'AUTOSCALER_SOCKET': os.path.join(directory, 'none.sock')}):
+        with patch('autoscaler.cli.dispatch') as dispatch:
+            main()
+
+    dispatch.assert_called_once_with(['apply', 'manifest.json'])
+
+
+@patch('autoscaler.cli.sys')
+def test_interactive_commands_run_in_process(sys):
+    sys.argv = ['autoscaler', 'launch-config', 'edit', 'web']
+    with patch.dict(os.environ, {'AUTOSCALER_SOCKET': daemon.path}):
+        with patch('autoscaler.cli.dispatch') as dispatch:
+            main()
+
+    dispatch.assert_called_once_with(['launch-config', 'edit', 'web'])
@@ -0,0 +1,126 @@
+import boto
+from boto.ec2.autoscale import AutoScaleConnection
+from boto.ec2.autoscale.group import AutoScalingGroup
+from boto.ec2.autoscale.launchconfig import InstanceMonitoring
+from boto.ec2.blockdevicemapping import BlockDeviceMapping, BlockDeviceType
+from mock import patch
+from moto import mock_autoscaling
+import sure  # noqa
+
+from autoscaler import add_launch_config, edit_launch_config, edit_auto_scaling_group
+from autoscaler.diff import diff_attributes, diff_group, update_group_params
+
+
+def _mapping(size, **fields):
+    mapping = BlockDeviceMapping()
+    fields.setdefault('volume_type', 'standard')
+    mapping['/dev/xvdb'] = BlockDeviceType(size=size, delete_on_termination=True, **fields)
+    return mapping
+
+
+def test_diff_normalizes_values():
+    current = {
+        'security_groups': ['web', 'default'],
+        'instance_monitoring': InstanceMonitoring(enabled='true'),
+        'block_device_mappings': _mapping(100),
+        'spot_price': 0.2,
+        'kernel_id': '',
+        'ebs_optimized': False,
+    }
+    requested = {
+        'security_groups': ['default', 'web'],
+        'instance_monitoring': True,
+        'block_device_mappings': [_mapping(100)],
+        'spot_price': '0.2',
+        'kernel_id': None,
+        'ebs_optimized': 'no',
+    }
+    dict(diff_attributes(current, requested)).should.equal({})
+
+
+def test_diff_reports_changes():
+    current = {
+        'instance_monitoring': InstanceMonitoring(enabled='false'),
+        'block_device_mappings': _mapping(100),
+        'image_id': 'ami-1234abcd',
+    }
+    requested = {
+        'instance_monitoring': True,
+        'block_device_mappings': [_mapping(200)],
+        'image_id': 'ami-1234abcd',
+    }
+    list(diff_attributes(current, requested)).should.equal(['instance_monitoring', 'block_device_mappings'])
+
+
+def test_diff_reports_encryption_changes():
+    current = {'block_device_mappings': _mapping(100, volume_type='gp2', encrypted=False)}
+
+    list(diff_attributes(current, {
+        'block_device_mappings': [_mapping(100, volume_type='gp2', encrypted=True)],
+    })).should.equal(['block_device_mappings'])
+    # Unset is unencrypted
+    dict(diff_attributes(current, {
+        'block_device_mappings': [_mapping(100, volume_type='gp2')],
+    })).should.equal({})
+
+
+def test_diff_group_params():
+    current = {'launch_config_name': 'web', 'min_size': 2, 'max_size': 2, 'availability_zones': ['us-east-1c']}
+    changes = diff_group(current, {'launch_config': 'other', 'min_size': '2', 'max_size': 4,
+                                   'availability_zones': ['us-east-1c']})
+    update_group_params('web', changes).should.equal({
+        'AutoScalingGroupName': 'web',
+        'LaunchConfigurationName': 'other',
+        'MaxSize': 4,
+    })
+
+
+def test_diff_subnets_as_a_set():
+    current = {'vpc_zone_identifier': 'subnet-b,subnet-a'}
+
+    dict(diff_group(current, {'vpc_zone_identifier': ['subnet-a', 'subnet-b']})).should.equal({})
+    dict(diff_group(current, {'vpc_zone_identifier': 'subnet-a, subnet-b'})).should.equal({})
+    changes = diff_group(current, {'vpc_zone_identifier': ['subnet-a', 'subnet-c']})
+    update_group_params('web', changes).should.equal({
+        'AutoScalingGroupName': 'web',
+        'VPCZoneIdentifier': 'subnet-a,subnet-c',
+    })
+
+
+def test_diff_only_compares_numeric_attributes_as_numbers():
+    sorted(diff_attributes({'user_data': '1', 'key_name': '10'},
+                           {'user_data': '1.0', 'key_name': 10})).should.equal(['key_name', 'user_data'])
+    dict(diff_group({'default_cooldown': 300}, {'default_cooldown': '300.0'})).should.equal({})
+
+
+@mock_autoscaling
+def test_unchanged_launch_config_edit_is_skipped():
+    add_launch_config("web", user_data="echo 'web_machine' > /etc/config", security_groups=['a', 'b'])
+
+    with patch.object(AutoScaleConnection, 'create_launch_configuration') as create:
+        edit_launch_config("web", user_data="echo 'web_machine' > /etc/config", security_groups=['b', 'a'])
+    create.called.should.equal(False)
+
+
+@mock_autoscaling
+def test_group_edit_sends_changed_fields():
+    add_launch_config("web")
+    conn = boto.connect_autoscale(use_block_device_types=True)
+    conn.create_auto_scaling_group(AutoScalingGroup(
+        name='web',
+        availability_zones=['us-east-1c'],
+        launch_config='web',
+        max_size=2,
+        min_size=2,
+    ))
+
+    with patch.object(AutoScaleConnection, 'get_object', autospec=True,
+                      side_effect=AutoScaleConnection.get_object) as get_object:
+        edit_auto_scaling_group("web", max_size=2, min_size=2)
+        get_object.called.should.equal(False)
+
+        edit_auto_scaling_group("web", max_size=4, min_size=2)
+        get_object.call_count.should.equal(1)
+        get_object.call_args[0][2].should.equal({'AutoScalingGroupName': 'web', 'MaxSize': 4})
+
+    conn.get_all_groups(names=['web'])[0].max_size.should.equal(4)
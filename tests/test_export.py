@@ -0,0 +1,121 @@
+import csv
+import gzip
+import json
+import os
+import shutil
+import tempfile
+
+from mock import patch
+from moto import mock_autoscaling
+import sure  # noqa
+
+from autoscaler import Session, add_launch_config
+from autoscaler.cli import main
+from autoscaler.core import iter_launch_configs as core_iter_launch_configs
+from autoscaler.export import CSV_COLUMNS, export_inventory, open_output, serialize_block_device_mappings
+from autoscaler.parsers import parse_block_device_mappings
+from autoscaler.stats import MemorySink, add_sink, remove_sink
+
+from helpers import create_groups, group_names
+
+try:
+    from StringIO import StringIO
+except ImportError:  # pragma: no cover
+    from io import StringIO
+
+
+def _create_fleet(groups=3):
+    add_launch_config("web", image_id="ami-1234", instance_monitoring=True,
+                      block_device_mappings=[parse_block_device_mappings(
+                          "/dev/xvdb=ephemeral0,/dev/xvdp=snap-1234abcd:100:false")])
+    create_groups(group_names('web', groups), tags={'team': 'web'})
+
+
+def test_serialize_block_device_mappings():
+    mappings = parse_block_device_mappings("/dev/xvdb=ephemeral0,/dev/xvdp=snap-1234abcd:100:false:1000")
+
+    json.loads(json.dumps(serialize_block_device_mappings([mappings]))).should.equal({
+        '/dev/xvdb': {'ephemeral_name': 'ephemeral0'},
+        '/dev/xvdp': {'snapshot_id': 'snap-1234abcd', 'size': 100, 'volume_type': 'io1',
+                      'iops': 1000, 'delete_on_termination': False},
+    })
+
+
+@mock_autoscaling
+def test_export_json_lines():
+    _create_fleet()
+    stream = StringIO()
+
+    export_inventory(stream, session=Session()).should.equal(4)
+
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    [(record['kind'], record['name']) for record in records].should.equal([
+        ('launch_config', 'web'), ('group', 'web-0'), ('group', 'web-1'), ('group', 'web-2'),
+    ])
+    records[0]['image_id'].should.equal('ami-1234')
+    records[0]['instance_monitoring'].should.equal(True)
+    records[0]['block_device_mappings']['/dev/xvdb'].should.equal({'ephemeral_name': 'ephemeral0'})
+    records[1]['launch_config_name'].should.equal('web')
+    records[1]['availability_zones'].should.equal(['us-east-1c'])
+    records[1]['tags'].should.equal([['team', 'web', True]])
+
+
+@mock_autoscaling
+def test_export_is_paged():
+    _create_fleet(groups=5)
+    sink = add_sink(MemorySink())
+    # moto can't page launch configs
+    iter_launch_configs = lambda page_size, **kwargs: core_iter_launch_configs(**kwargs)  # noqa
+    try:
+        with patch('autoscaler.export.iter_launch_configs', iter_launch_configs):
+            export_inventory(StringIO(), session=Session(), page_size=2, prefetch=False)
+    finally:
+        remove_sink(sink)
+
+    sink.operations[('other', 'DescribeAutoScalingGroups')]['calls'].should.equal(3)
+
+
+@mock_autoscaling
+def test_export_csv():
+    _create_fleet(groups=1)
+    stream = StringIO()
+
+    export_inventory(stream, format='csv', session=Session())
+
+    rows = list(csv.DictReader(StringIO(stream.getvalue())))
+    list(csv.reader(StringIO(stream.getvalue())))[0].should.equal(CSV_COLUMNS)
+    rows.should.have.length_of(2)
+    rows[0]['name'].should.equal('web')
+    json.loads(rows[0]['block_device_mappings'])['/dev/xvdp']['size'].should.equal(100)
+    rows[1]['max_size'].should.equal('2')
+    json.loads(rows[1]['tags']).should.equal([['team', 'web', True]])
+
+
+@mock_autoscaling
+@patch('autoscaler.cli.sys')
+def test_export_cli_gzip(sys):
+    _create_fleet(groups=2)
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'inventory.jsonl.gz')
+        sys.argv = ['autoscaler', 'export', '--output', path]
+        main()
+        with gzip.open(path) as export_file:
+            lines = export_file.read().decode('utf-8').splitlines()
+    finally:
+        shutil.rmtree(directory)
+
+    [json.loads(line)['name'] for line in lines].should.equal(['web', 'web-0', 'web-1'])
+
+
+def test_open_output_compresses():
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'inventory.csv')
+        stream = open_output(path, compress=True)
+        stream.write('kind,name\n')
+        stream.close()
+        with gzip.open(path) as export_file:
+            export_file.read().decode('utf-8').should.equal('kind,name\n')
+    finally:
+        shutil.rmtree(directory)
@@ -0,0 +1,234 @@
+import os
+import shutil
+import tempfile
+
+import boto
+from mock import patch
+from moto import mock_autoscaling
+import sure  # noqa
+
+from autoscaler import (
+    AutoScalerException,
+    Session,
+    add_launch_config,
+    edit_launch_config,
+    set_default_session,
+)
+from autoscaler.cli import main
+from autoscaler.core import (
+    _delete_launch_config,
+    _move_groups,
+    add_launch_config as core_add_launch_config,
+    resume_edit,
+)
+from autoscaler.journal import EditLog, Journal
+from autoscaler.stats import MemorySink, add_sink, remove_sink
+
+from helpers import create_groups, group_names
+
+
+class Crash(Exception):
+    pass
+
+
+def _crash_on(func, calls):
+    # Fail the `calls`th call of `func`, like a process dying mid-edit
+    count = [0]
+
+    def crash(*args, **kwargs):
+        count[0] += 1
+        if count[0] == calls:
+            raise Crash()
+        return func(*args, **kwargs)
+    return crash
+
+
+def _state():
+    conn = boto.connect_autoscale(use_block_device_types=True)
+    configs = dict((config.name, config.image_id) for config in conn.get_all_launch_configurations())
+    groups = sorted(set(group.launch_config_name for group in conn.get_all_groups()))
+    return configs, groups
+
+
+_directory = None
+
+
+def setup():
+    global _directory
+    _directory = tempfile.mkdtemp()
+
+
+def teardown():
+    shutil.rmtree(_directory)
+
+
+def _session():
+    return Session(journal=Journal(tempfile.mkdtemp(dir=_directory)))
+
+
+@mock_autoscaling
+def test_resume_after_delete():
+    session = _session()
+    add_launch_config("web", session=session, image_id="ami-1234")
+    create_groups(group_names('web', 3))
+
+    with patch('autoscaler.core._delete_launch_config', _crash_on(_delete_launch_config, 1)):
+        edit_launch_config.when.called_with(
+            "web", session=session, concurrency=1, image_id="ami-5678").should.throw(Crash)
+    _state().should.equal(({'web': 'ami-1234', 'web-autoscaler-temp': 'ami-5678'},
+                           ['web-autoscaler-temp']))
+
+    logs = session.journal.pending()
+    logs.should.have.length_of(1)
+    logs[0].started.should.equal(2)
+
+    sink = add_sink(MemorySink())
+    try:
+        resume_edit(logs[0], session=session, concurrency=1).should.equal(True)
+    finally:
+        remove_sink(sink)
+
+    _state().should.equal(({'web': 'ami-5678'}, ['web']))
+    session.journal.pending().should.equal([])
+    [operation for (_, operation) in sink.operations].shouldnt.contain('DescribeAutoScalingGroups')
+
+@mock_autoscaling
+def test_resume_after_original_was_deleted():
+    session = _session()
+    add_launch_config("web", session=session, image_id="ami-1234")
+    create_groups(group_names('web', 2))
+
+    with patch('autoscaler.core.add_launch_config', _crash_on(core_add_launch_config, 2)):
+        edit_launch_config.when.called_with(
+            "web", session=session, concurrency=1, image_id="ami-5678").should.throw(Crash)
+    _state().should.equal(({'web-autoscaler-temp': 'ami-5678'}, ['web-autoscaler-temp']))
+
+    resume_edit(session.journal.pending("web")[0], session=session, concurrency=1).should.equal(True)
+    _state().should.equal(({'web': 'ami-5678'}, ['web']))
+
+@mock_autoscaling
+def test_resume_versioned_edit():
+    session = _session()
+    add_launch_config("web", session=session, image_id="ami-1234")
+    create_groups(group_names('web', 2))
+
+    with patch('autoscaler.core._delete_launch_config', _crash_on(_delete_launch_config, 1)):
+        edit_launch_config.when.called_with(
+            "web", session=session, concurrency=1, versioned=True,
+            image_id="ami-5678").should.throw(Crash)
+
+    resume_edit(session.journal.pending()[0], session=session, concurrency=1).should.equal(True)
+    _state().should.equal(({'web-v1': 'ami-5678'}, ['web-v1']))
+
+@mock_autoscaling
+def test_resume_rollback_of_failed_health_check():
+    session = _session()
+    add_launch_config("web", session=session, image_id="ami-1234")
+    create_groups(group_names('web', 3))
+
+    # Dies moving the first wave back after its health check fails
+    with patch('autoscaler.core._move_groups', _crash_on(_move_groups, 2)):
+        edit_launch_config.when.called_with(
+            "web", session=session, concurrency=1, image_id="ami-5678", waves=[2],
+            health_check=lambda group_names: False).should.throw(Crash)
+    _state().should.equal(({'web': 'ami-1234', 'web-autoscaler-temp': 'ami-5678'},
+                           ['web', 'web-autoscaler-temp']))
+
+    log = session.journal.pending()[0]
+    [step['action'] for step in log.steps].should.equal(['reassign', 'delete'])
+    resume_edit(log, session=session, concurrency=1).should.equal(True)
+
+    # Rolled back rather than finished
+    _state().should.equal(({'web': 'ami-1234'}, ['web']))
+    session.journal.pending().should.equal([])
+
+
+@mock_autoscaling
+def test_edit_that_made_no_changes_is_abandoned():
+    session = _session()
+    add_launch_config("web", session=session, image_id="ami-1234")
+    create_groups(group_names('web', 1))
+
+    with patch('autoscaler.core.add_launch_config', side_effect=Crash):
+        edit_launch_config.when.called_with(
+            "web", session=session, concurrency=1, image_id="ami-5678").should.throw(Crash)
+
+    resume_edit(session.journal.pending()[0], session=session, concurrency=1).should.equal(False)
+    session.journal.pending().should.equal([])
+    _state().should.equal(({'web': 'ami-1234'}, ['web']))
+
+@mock_autoscaling
+def test_finished_edits_leave_no_journal():
+    session = _session()
+    add_launch_config("web", session=session, image_id="ami-1234")
+    edit_launch_config("web", session=session, image_id="ami-5678")
+
+    os.listdir(session.journal.directory).should.equal([])
+
+@mock_autoscaling
+@patch('autoscaler.cli.sys')
+def test_resume_cli(sys):
+    session = _session()
+    add_launch_config("web", session=session, image_id="ami-1234")
+    create_groups(group_names('web', 2))
+    with patch('autoscaler.core._delete_launch_config', _crash_on(_delete_launch_config, 2)):
+        edit_launch_config.when.called_with(
+            "web", session=session, concurrency=1, image_id="ami-5678").should.throw(Crash)
+
+    set_default_session(session)
+    try:
+        sys.argv = ['autoscaler', 'resume', 'web', '--concurrency=1']
+        main()
+    finally:
+        set_default_session(None)
+
+    _state().should.equal(({'web': 'ami-5678'}, ['web']))
+
+
+@patch('autoscaler.cli.print', create=True)
+@patch('autoscaler.cli.sys')
+def test_resume_cli_without_a_journal(sys, print_):
+    set_default_session(Session(journal=False))
+    try:
+        sys.argv = ['autoscaler', 'resume']
+        main()
+    finally:
+        set_default_session(None)
+
+    print_.assert_called_once_with("Launch config edits aren't journaled, there is nothing to resume")
+
+
+def test_partly_written_entries_are_ignored():
+    session = _session()
+    log = session.journal.begin("web", [{'action': 'delete', 'config': 'web'}])
+    log.start(0)
+    with open(log.path, 'a') as log_file:
+        log_file.write('{"started": ')
+
+    EditLog.load(log.path).started.should.equal(0)
+
+def test_logs_without_a_header_are_discarded():
+    session = _session()
+    path = os.path.join(session.journal.directory, '1.000000-1.journal')
+    with open(path, 'w') as log_file:
+        log_file.write('{"name": "we')
+
+    session.journal.pending().should.equal([])
+    os.path.exists(path).should.equal(False)
+
+def test_pending_is_oldest_first():
+    session = _session()
+    session.journal.begin("web", [])
+    session.journal.begin("api", [])
+
+    [log.name for log in session.journal.pending()].should.equal(["web", "api"])
+    [log.name for log in session.journal.pending("api")].should.equal(["api"])
+
+
+def test_unwritable_journal_directory():
+    path = os.path.join(_directory, 'file')
+    open(path, 'w').close()
+    journal = Journal(os.path.join(path, 'journal'))
+
+    journal.begin.when.called_with("web", []).should.throw(
+        AutoScalerException, "Set AUTOSCALER_JOURNAL_DIR")
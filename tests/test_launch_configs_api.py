@@ -1,10 +1,13 @@
 import boto
+from boto.ec2.autoscale import AutoScaleConnection
 from boto.ec2.autoscale.group import AutoScalingGroup
 from boto.ec2.autoscale.launchconfig import LaunchConfiguration
+from mock import patch
 from moto import mock_autoscaling
 import sure  # noqa
 
 from autoscaler import add_launch_config, edit_launch_config, AutoScalerException
+from autoscaler.core import get_config_values, parse_versioned_name, resolve_launch_config_name
 
 
 @mock_autoscaling
@@ -130,3 +133,63 @@ def test_editing_launch_configuration_update_AS_groups():
     config_name.should.equal("web")
     config = conn.get_all_launch_configurations(names=[config_name])[0]
     config.user_data.should.equal("echo 'other_machine' > /etc/config")
+
+
+@mock_autoscaling
+def test_editing_launch_configuration_describes_groups_once():
+    conn = boto.connect_autoscale(use_block_device_types=True)
+    add_launch_config("web", user_data="echo 'web_machine' > /etc/config")
+    add_launch_config("worker")
+    for name, config_name in [('web', 'web'), ('web-2', 'web'), ('worker', 'worker')]:
+        group = AutoScalingGroup(
+            name=name,
+            availability_zones=['us-east-1c'],
+            launch_config=config_name,
+            max_size=2,
+            min_size=2,
+        )
+        conn.create_auto_scaling_group(group)
+
+    with patch('boto.ec2.autoscale.AutoScaleConnection.get_all_groups',
+               autospec=True, side_effect=AutoScaleConnection.get_all_groups) as get_all_groups:
+        edit_launch_config("web", concurrency=1, user_data="echo 'other_machine' > /etc/config")
+    get_all_groups.call_count.should.equal(1)
+
+    groups = dict((group.name, group.launch_config_name) for group in conn.get_all_groups())
+    groups.should.equal({'web': 'web', 'web-2': 'web', 'worker': 'worker'})
+    set(config.name for config in conn.get_all_launch_configurations()).should.equal(set(['web', 'worker']))
+
+
+@mock_autoscaling
+def test_versioned_edit_launch_configuration():
+    conn = boto.connect_autoscale(use_block_device_types=True)
+    add_launch_config("web", user_data="echo 'web_machine' > /etc/config")
+    group = AutoScalingGroup(
+        name='web',
+        availability_zones=['us-east-1c'],
+        launch_config='web',
+        max_size=2,
+        min_size=2,
+    )
+    conn.create_auto_scaling_group(group)
+
+    edit_launch_config("web", versioned=True, user_data="echo 'v1' > /etc/config")
+    edit_launch_config("web", versioned=True, user_data="echo 'v2' > /etc/config")
+
+    [config.name for config in conn.get_all_launch_configurations()].should.equal(['web-v2'])
+    conn.get_all_groups()[0].launch_config_name.should.equal('web-v2')
+    resolve_launch_config_name("web").should.equal('web-v2')
+    get_config_values(resolve_launch_config_name("web"))['user_data'].should.equal("echo 'v2' > /etc/config")
+
+
+@mock_autoscaling
+def test_resolve_missing_launch_configuration():
+    add_launch_config("web-worker")
+    (resolve_launch_config_name.when.called_with("web")
+        .should.throw(AutoScalerException))
+
+
+def test_parse_versioned_name():
+    parse_versioned_name("web-v7").should.equal(("web", 7))
+    parse_versioned_name("web").should.equal(("web", None))
+    parse_versioned_name("web-vnext").should.equal(("web-vnext", None))
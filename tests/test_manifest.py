@@ -0,0 +1,193 @@
+import json
+import os
+import shutil
+import tempfile
+
+import boto
+from mock import patch
+from moto import mock_autoscaling
+import sure  # noqa
+
+from autoscaler import AutoScalerException, Session, add_launch_config, add_auto_scaling_group
+from autoscaler.cli import main
+from autoscaler.core import resolve_base
+from autoscaler.manifest import apply_manifest, load_manifest, plan_manifest
+from autoscaler.plan import DryRunSession
+from autoscaler.stats import MemorySink, add_sink, remove_sink
+
+from helpers import create_groups, group_names
+
+MANIFEST = {
+    'launch_configs': {
+        'web': {
+            'image_id': 'ami-1234abcd',
+            'instance_type': 'm1.small',
+            'block_device_mappings': '/dev/xvdb=ephemeral0',
+        },
+        'worker': {
+            'image_id': 'ami-abcd1234',
+            'instance_type': 'm1.large',
+        },
+    },
+    'auto_scaling_groups': {
+        'web': {
+            'launch_config': 'web',
+            'availability_zones': ['us-east-1c'],
+            'min_size': 2,
+            'max_size': 4,
+        },
+        'worker': {
+            'launch_config': 'worker',
+            'availability_zones': ['us-east-1c'],
+            'min_size': 1,
+            'max_size': 1,
+        },
+    },
+}
+
+
+def _write_manifest(manifest):
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'manifest.json')
+    with open(path, 'w') as manifest_file:
+        json.dump(manifest, manifest_file)
+    return directory, path
+
+
+@mock_autoscaling
+def test_plan_manifest():
+    add_launch_config("web", image_id='ami-1234abcd', instance_type='m1.small')
+    add_launch_config("worker", image_id='ami-old', instance_type='m1.large')
+    add_auto_scaling_group(
+        "web", launch_config='web', availability_zones=['us-east-1c'], min_size=2, max_size=2,
+    )
+
+    plan = plan_manifest(MANIFEST)
+
+    list(plan.config_creates).should.equal([])
+    dict(plan.config_edits).should.equal({
+        'web': {'block_device_mappings': plan.config_edits['web']['block_device_mappings']},
+        'worker': {'image_id': 'ami-abcd1234'},
+    })
+    dict(plan.group_edits).should.equal({'web': {'max_size': 4}})
+    list(plan.group_creates).should.equal(['worker'])
+
+
+@mock_autoscaling
+def test_apply_manifest():
+    add_launch_config("worker", image_id='ami-old', instance_type='m1.large')
+
+    phases = apply_manifest(MANIFEST, concurrency=1)
+    [phase.name for phase in phases].should.equal(['describe', 'launch configs', 'groups'])
+    phases[1].created.should.equal(['web'])
+    phases[1].edited.should.equal(['worker'])
+    sorted(phases[2].created).should.equal(['web', 'worker'])
+
+    conn = boto.connect_autoscale(use_block_device_types=True)
+    configs = dict((config.name, config) for config in conn.get_all_launch_configurations())
+    configs['worker'].image_id.should.equal('ami-abcd1234')
+    configs['web'].block_device_mappings['/dev/xvdb'].ephemeral_name.should.equal('ephemeral0')
+    groups = dict((group.name, group) for group in conn.get_all_groups())
+    groups['web'].max_size.should.equal(4)
+    groups['worker'].launch_config_name.should.equal('worker')
+
+    # Applying the same manifest again changes nothing
+    phases = apply_manifest(MANIFEST, concurrency=1)
+    sorted(phases[1].unchanged).should.equal(['web', 'worker'])
+    sorted(phases[2].unchanged).should.equal(['web', 'worker'])
+    (phases[1].created + phases[1].edited + phases[2].created + phases[2].edited).should.equal([])
+
+
+@mock_autoscaling
+def test_apply_manifest_with_exported_block_device_mappings():
+    manifest = {'launch_configs': {'web': {
+        'base': None,
+        'image_id': 'ami-1234abcd',
+        'block_device_mappings': {'/dev/xvdb': {'ephemeral_name': 'ephemeral0'},
+                                  '/dev/xvdp': {'size': 100, 'delete_on_termination': False}},
+    }}}
+
+    phases = apply_manifest(manifest, concurrency=1)
+
+    phases[1].created.should.equal(['web'])
+    conn = boto.connect_autoscale(use_block_device_types=True)
+    mappings = conn.get_all_launch_configurations(names=['web'])[0].block_device_mappings
+    mappings['/dev/xvdb'].ephemeral_name.should.equal('ephemeral0')
+    mappings['/dev/xvdp'].size.should.equal(100)
+
+
+@mock_autoscaling
+def test_apply_manifest_describes_groups_once():
+    add_launch_config("web", base=None, image_id='ami-1234abcd')
+    create_groups(group_names('web', 3))
+    manifest = {'auto_scaling_groups': dict(
+        (name, {'launch_config': 'web', 'min_size': 2, 'max_size': 4})
+        for name in group_names('web', 3))}
+
+    sink = add_sink(MemorySink())
+    try:
+        phases = apply_manifest(manifest, concurrency=1)
+    finally:
+        remove_sink(sink)
+
+    sorted(phases[2].edited).should.equal(group_names('web', 3))
+    sum(totals['calls'] for (_, operation), totals in sink.operations.items()
+        if operation == 'DescribeAutoScalingGroups').should.equal(1)
+    conn = boto.connect_autoscale(use_block_device_types=True)
+    set(group.max_size for group in conn.get_all_groups()).should.equal(set([4]))
+
+
+@mock_autoscaling
+def test_apply_manifest_describes_configs_once():
+    names = group_names('web', 3)
+    for name in names:
+        add_launch_config(name, base=None, image_id='ami-1234abcd')
+    manifest = {'launch_configs': dict((name, {'image_id': 'ami-5678'}) for name in names)}
+
+    sink = add_sink(MemorySink())
+    try:
+        phases = apply_manifest(manifest, concurrency=1)
+    finally:
+        remove_sink(sink)
+
+    sorted(phases[1].edited).should.equal(names)
+    sum(totals['calls'] for (_, operation), totals in sink.operations.items()
+        if operation == 'DescribeLaunchConfigurations').should.equal(1)
+
+
+@mock_autoscaling
+def test_dry_run_leaves_the_sessions_bases_alone():
+    session = Session()
+    manifest = {'launch_configs': {'planned': {'base': None, 'image_id': 'ami-dry'}}}
+
+    apply_manifest(manifest, session=DryRunSession(session), concurrency=1)
+
+    resolve_base('planned', session=session)['image_id'].should.equal('')
+
+
+@mock_autoscaling
+def test_failed_creates_are_not_left_as_bases():
+    session = Session()
+    manifest = {'launch_configs': {'broken': {'base': None, 'image_id': 'ami-1234'}}}
+
+    with patch('autoscaler.manifest.add_launch_config', side_effect=AutoScalerException("Failed")):
+        phases = apply_manifest(manifest, session=session, concurrency=1)
+
+    list(phases[1].failed).should.equal(['broken'])
+    resolve_base('broken', session=session)['image_id'].should.equal('')
+
+
+@mock_autoscaling
+@patch('autoscaler.cli.sys')
+def test_apply_cli(sys):
+    directory, path = _write_manifest(MANIFEST)
+    try:
+        load_manifest(path)['launch_configs'].should.have.key('web')
+        sys.argv = ['autoscaler', 'apply', path, '--concurrency=1']
+        main()
+    finally:
+        shutil.rmtree(directory)
+
+    sys.exit.called.should.equal(False)
+    conn = boto.connect_autoscale(use_block_device_types=True)
+    conn.get_all_groups().should.have.length_of(2)
@@ -0,0 +1,156 @@
+import threading
+
+import boto
+from mock import patch
+from moto import mock_autoscaling
+import sure  # noqa
+
+from autoscaler import add_launch_config, Session
+from autoscaler.core import (
+    get_config_values_many,
+    get_groups_many,
+    iter_groups,
+    iter_pages,
+    groups_for_token,
+    update_all_groups,
+    LaunchConfigIndex,
+)
+from autoscaler.stats import MemorySink, add_sink, remove_sink
+
+from helpers import create_groups
+
+
+def _padded_names(count, prefix='group'):
+    return ['{0}-{1:03d}'.format(prefix, index) for index in range(count)]
+
+
+@mock_autoscaling
+def test_iter_groups_pages():
+    add_launch_config("web")
+    create_groups(_padded_names(25))
+
+    session = Session()
+    with patch('autoscaler.session.boto.connect_autoscale', wraps=boto.connect_autoscale) as connect:
+        names = [group.name for group in iter_groups(session=session, page_size=10)]
+
+    names.should.equal(['group-{0:03d}'.format(index) for index in range(25)])
+    connect.call_count.should.equal(1)
+
+
+class FakePage(list):
+    def __init__(self, items, next_token):
+        super(FakePage, self).__init__(items)
+        self.next_token = next_token
+
+
+def test_iter_pages_prefetch():
+    pages = {None: FakePage([1, 2], 'b'), 'b': FakePage([3, 4], 'c'), 'c': FakePage([5], None)}
+    fetched = dict((token, threading.Event()) for token in pages)
+
+    def fetch(token):
+        fetched[token].set()
+        return pages[token]
+
+    # A stubbed fetch, as moto isn't safe to call from several threads
+    page_iter = iter_pages(fetch, prefetch=True)
+    list(next(page_iter)).should.equal([1, 2])
+    # The next page is requested while the caller works through this one
+    fetched['b'].wait(5).should.equal(True)
+    fetched['c'].is_set().should.equal(False)
+    [list(page) for page in page_iter].should.equal([[3, 4], [5]])
+
+
+@mock_autoscaling
+def test_iter_groups_is_lazy():
+    add_launch_config("web")
+    create_groups(_padded_names(25))
+
+    conn = boto.connect_autoscale(use_block_device_types=True)
+    with patch.object(conn, 'get_all_groups', wraps=conn.get_all_groups) as get_all_groups:
+        with patch('autoscaler.session.boto.connect_autoscale', return_value=conn):
+            groups = iter_groups(session=Session(), page_size=10)
+            next(groups).name.should.equal('group-000')
+            get_all_groups.call_count.should.equal(1)
+            list(groups).should.have.length_of(24)
+            get_all_groups.call_count.should.equal(3)
+
+
+@mock_autoscaling
+def test_groups_for_token():
+    add_launch_config("web")
+    create_groups(_padded_names(60))
+
+    groups_for_token(token=None).should.have.length_of(60)
+
+
+@mock_autoscaling
+def test_update_all_groups():
+    add_launch_config("web")
+    add_launch_config("other")
+    create_groups(_padded_names(3))
+    create_groups(_padded_names(1, prefix='other'), config_name='other')
+
+    update_all_groups('web', 'other', concurrency=1)
+
+    conn = boto.connect_autoscale(use_block_device_types=True)
+    groups = conn.get_all_groups()
+    groups.should.have.length_of(4)
+    set(group.launch_config_name for group in groups).should.equal(set(['other']))
+
+
+@mock_autoscaling
+def test_launch_config_index():
+    add_launch_config("web")
+    add_launch_config("other")
+    create_groups(_padded_names(3))
+    create_groups(_padded_names(2, prefix='other'), config_name='other')
+
+    index = LaunchConfigIndex.build()
+    sorted(index.config_names()).should.equal(['other', 'web'])
+    [group.name for group in index.groups_for('web')].should.equal(['group-000', 'group-001', 'group-002'])
+    index.groups_for('missing').should.equal([])
+
+    update_all_groups('web', 'other', index=index, concurrency=1)
+    index.config_names().should.equal(['other'])
+    index.groups_for('other').should.have.length_of(5)
+
+
+def _describe_calls(sink, operation):
+    return sum(totals['calls'] for (_, name), totals in sink.operations.items()
+               if name == operation)
+
+
+@mock_autoscaling
+def test_get_groups_many_batches_names():
+    add_launch_config("web", image_id="ami-1234")
+    create_groups(_padded_names(120))
+    names = _padded_names(120) + ['missing']
+
+    sink = add_sink(MemorySink())
+    try:
+        groups = get_groups_many(names, session=Session(), concurrency=1)
+    finally:
+        remove_sink(sink)
+
+    list(groups).should.equal(names)
+    groups['group-119']['max_size'].should.equal(2)
+    groups['missing']['max_size'].should.equal("")
+    _describe_calls(sink, 'DescribeAutoScalingGroups').should.equal(3)
+
+
+@mock_autoscaling
+def test_get_config_values_many_batches_names():
+    session = Session()
+    names = ['web-{0:02d}'.format(index) for index in range(60)]
+    for name in names:
+        add_launch_config(name, session=session, image_id="ami-1234")
+
+    sink = add_sink(MemorySink())
+    try:
+        configs = get_config_values_many(names + ['missing'], session=session, concurrency=1)
+    finally:
+        remove_sink(sink)
+
+    configs['web-59']['image_id'].should.equal("ami-1234")
+    configs['missing']['image_id'].should.equal("")
+    _describe_calls(sink, 'DescribeLaunchConfigurations').should.equal(2)
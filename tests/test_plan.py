@@ -0,0 +1,76 @@
+import boto
+from mock import patch
+from moto import mock_autoscaling
+import sure  # noqa
+
+from autoscaler import Session, add_launch_config, edit_launch_config, edit_auto_scaling_group
+from autoscaler.cli import autoscaling_group
+from autoscaler.plan import dry_run
+
+from helpers import create_groups
+
+
+@mock_autoscaling
+def test_dry_run_edit_launch_config():
+    add_launch_config("web", user_data="echo 'web_machine' > /etc/config")
+    create_groups(['web-1', 'web-2'])
+
+    # A fresh session so no base config is memoized from earlier tests
+    plan = dry_run(edit_launch_config, "web", user_data="echo 'other_machine' > /etc/config",
+                   session=Session(), concurrency=1)
+
+    # The edited config is described once, and the new configs need no base
+    dict(plan.counts()).should.equal({
+        'DescribeLaunchConfigurations': 1,
+        'DescribeAutoScalingGroups': 1,
+        'CreateLaunchConfiguration': 2,
+        'DeleteLaunchConfiguration': 2,
+        'UpdateAutoScalingGroup': 4,
+    })
+    plan.touched_groups().should.equal(['web-1', 'web-2'])
+    plan.touched_launch_configs().should.equal(['web-autoscaler-temp', 'web'])
+    plan.estimate_seconds(4).should.equal(2.5)
+
+    # Nothing was changed
+    conn = boto.connect_autoscale(use_block_device_types=True)
+    configs = conn.get_all_launch_configurations()
+    [config.name for config in configs].should.equal(['web'])
+    configs[0].user_data.should.equal("echo 'web_machine' > /etc/config")
+
+
+@mock_autoscaling
+def test_dry_run_versioned_edit_is_cheaper():
+    add_launch_config("web", user_data="echo 'web_machine' > /etc/config")
+    create_groups(['web-1'])
+
+    swap = dry_run(edit_launch_config, "web", user_data="echo 'other_machine' > /etc/config")
+    versioned = dry_run(edit_launch_config, "web", versioned=True,
+                        user_data="echo 'other_machine' > /etc/config")
+
+    versioned.counts()['CreateLaunchConfiguration'].should.equal(1)
+    versioned.counts()['UpdateAutoScalingGroup'].should.equal(1)
+    versioned.total_calls.should.be.lower_than(swap.total_calls)
+
+
+@mock_autoscaling
+@patch('autoscaler.cli.get_input')
+@patch('autoscaler.cli.sys')
+def test_autoscaling_group_dry_run_cli(sys, user_input):
+    add_launch_config("web")
+    create_groups(['web'])
+    sys.argv = ['autoscaler_auto_scaling_group', 'edit', 'web', '--dry-run']
+
+    # "availability_zones", "default_cooldown", "desired_capacity",
+    # "health_check_period", "health_check_type", "launch_config_name",
+    # "load_balancers", "max_size", "min_size", "placement_group",
+    # "vpc_zone_identifier", "termination_policies"
+    user_input.side_effect = [
+        "us-east-1c", "300", "2", "300", "EC2", "web", "", "4", "2", "", "", "",
+    ]
+
+    autoscaling_group()
+
+    conn = boto.connect_autoscale(use_block_device_types=True)
+    conn.get_all_groups(names=['web'])[0].max_size.should.equal(2)
+    plan = dry_run(edit_auto_scaling_group, "web", max_size=4)
+    plan.counts().should.have.key('UpdateAutoScalingGroup').being.equal(1)
@@ -0,0 +1,119 @@
+import boto
+from boto.ec2.autoscale import AutoScaleConnection
+from mock import patch
+from moto import mock_autoscaling
+import sure  # noqa
+
+from autoscaler import add_launch_config
+from autoscaler.cli import main
+from autoscaler.concurrency import run_concurrently
+from autoscaler.core import rollout_ami
+
+from helpers import create_groups, group_names
+
+
+def _add_fleet(configs):
+    # configs maps config name -> (image, number of groups using it)
+    for config_name, (image_id, groups) in configs.items():
+        add_launch_config(config_name, base=None, image_id=image_id)
+        create_groups(group_names(config_name, groups), config_name=config_name)
+
+
+def _images(conn):
+    return dict((config.name, config.image_id) for config in conn.get_all_launch_configurations())
+
+
+@mock_autoscaling
+def test_rollout_ami():
+    conn = boto.connect_autoscale(use_block_device_types=True)
+    _add_fleet(dict(('web-{}'.format(number), ('ami-old', 2)) for number in range(6)))
+    _add_fleet({'worker': ('ami-other', 1)})
+
+    with patch('boto.ec2.autoscale.AutoScaleConnection.get_all_groups',
+               autospec=True, side_effect=AutoScaleConnection.get_all_groups) as get_all_groups:
+        result = rollout_ami('ami-old', 'ami-new', concurrency=1)
+
+    sorted(result.succeeded).should.equal(['web-{}'.format(number) for number in range(6)])
+    dict(result.failed).should.equal({})
+    # One scan of the groups for the whole rollout
+    get_all_groups.call_count.should.equal(1)
+    images = _images(conn)
+    images.pop('worker').should.equal('ami-other')
+    set(images.values()).should.equal(set(['ami-new']))
+    groups = dict((group.name, group.launch_config_name) for group in conn.get_all_groups())
+    groups['web-3-1'].should.equal('web-3')
+    groups['worker-0'].should.equal('worker')
+
+
+@mock_autoscaling
+def test_rollout_ami_moves_each_configs_groups_one_at_a_time():
+    _add_fleet(dict(('web-{}'.format(number), ('ami-old', 3)) for number in range(2)))
+
+    concurrencies = []
+
+    def serially(func, items, key=None, concurrency=None):
+        # Record the concurrency asked for, but call moto one call at a time
+        concurrencies.append(concurrency)
+        return run_concurrently(func, items, key=key, concurrency=1)
+
+    with patch('autoscaler.core.run_concurrently', serially):
+        rollout_ami('ami-old', 'ami-new', concurrency=4)
+
+    # The configs, then the groups of each config, twice
+    concurrencies.should.equal([4, 1, 1, 1, 1])
+
+
+@mock_autoscaling
+def test_rollout_ami_versioned():
+    conn = boto.connect_autoscale(use_block_device_types=True)
+    _add_fleet({'web-v2': ('ami-old', 1), 'worker': ('ami-old', 1)})
+
+    rollout_ami('ami-old', 'ami-new', versioned=True, concurrency=1)
+
+    _images(conn).should.equal({'web-v3': 'ami-new', 'worker-v1': 'ami-new'})
+    groups = dict((group.name, group.launch_config_name) for group in conn.get_all_groups())
+    groups.should.equal({'web-v2-0': 'web-v3', 'worker-0': 'worker-v1'})
+
+
+@mock_autoscaling
+def test_rollout_ami_leaves_interrupted_edits_alone():
+    conn = boto.connect_autoscale(use_block_device_types=True)
+    _add_fleet({'web-autoscaler-temp': ('ami-old', 1)})
+
+    result = rollout_ami('ami-old', 'ami-new')
+
+    list(result.succeeded).should.equal([])
+    _images(conn).should.equal({'web-autoscaler-temp': 'ami-old'})
+
+
+@mock_autoscaling
+@patch('autoscaler.cli.sys')
+@patch('autoscaler.cli.print', create=True)
+def test_rollout_ami_cli(printer, sys):
+    conn = boto.connect_autoscale(use_block_device_types=True)
+    _add_fleet({'web': ('ami-old', 1), 'worker': ('ami-old', 0)})
+    sys.argv = ['autoscaler', 'rollout-ami', '--from', 'ami-old', '--to', 'ami-new', '--concurrency=1']
+
+    main()
+
+    lines = [call[0][0] for call in printer.call_args_list]
+    sorted(lines[:2]).should.equal(["Launch config web updated", "Launch config worker updated"])
+    lines[2].should.equal("2 succeeded, 0 failed")
+    _images(conn).should.equal({'web': 'ami-new', 'worker': 'ami-new'})
+    sys.exit.called.should.equal(False)
+
+
+@mock_autoscaling
+@patch('autoscaler.cli.sys')
+@patch('autoscaler.cli.print', create=True)
+def test_rollout_ami_cli_dry_run(printer, sys):
+    conn = boto.connect_autoscale(use_block_device_types=True)
+    _add_fleet({'web': ('ami-old', 1)})
+    sys.argv = ['autoscaler', 'rollout-ami', '--from', 'ami-old', '--to', 'ami-new', '--dry-run']
+
+    main()
+
+    lines = [call[0][0] for call in printer.call_args_list]
+    lines[0].should.equal("1 succeeded, 0 failed")
+    lines[1].should.equal("Dry run, no changes were made")
+    _images(conn).should.equal({'web': 'ami-old'})
@@ -0,0 +1,78 @@
+import os
+
+import boto
+from mock import Mock, patch
+from moto import mock_autoscaling
+import sure  # noqa
+
+from autoscaler import (
+    add_launch_config,
+    edit_launch_config,
+    Session,
+    get_session,
+    set_default_session,
+)
+from autoscaler.journal import JOURNAL_DIR_ENV, Journal
+
+
+@mock_autoscaling
+def test_session_reuses_connections():
+    session = Session()
+    with patch('autoscaler.session.boto.connect_autoscale', wraps=boto.connect_autoscale) as connect:
+        add_launch_config("web", session=session, user_data="echo 'web_machine' > /etc/config")
+        edit_launch_config("web", session=session, user_data="echo 'other_machine' > /etc/config")
+
+    connect.call_count.should.equal(1)
+
+    conn = boto.connect_autoscale(use_block_device_types=True)
+    configs = conn.get_all_launch_configurations(names=['web'])
+    configs[0].user_data.should.equal("echo 'other_machine' > /etc/config")
+
+
+def test_session_pool_is_bounded():
+    session = Session(pool_size=1)
+    with patch('autoscaler.session.boto.connect_autoscale') as connect:
+        connect.side_effect = lambda **kwargs: Mock()
+        with session.connection() as first:
+            with session.connection() as second:
+                first.wrapped.should_not.be(second.wrapped)
+        with session.connection() as third:
+            third.wrapped.should.be(second.wrapped)
+
+    connect.call_count.should.equal(2)
+    first.wrapped.close.assert_called_once_with()
+    second.wrapped.close.called.should.equal(False)
+
+
+def test_default_session():
+    session = Session()
+    set_default_session(session)
+    get_session().should.be(session)
+    get_session(session=Session()).should_not.be(session)
+
+    set_default_session(None)
+    get_session().should_not.be(session)
+
+
+def test_session_journal():
+    journal = Journal('/tmp/journal')
+    Session(journal=journal).journal.should.be(journal)
+    Session(journal=False).journal.should.equal(None)
+
+    with patch.dict(os.environ, {JOURNAL_DIR_ENV: '/tmp/journal'}):
+        Session().journal.directory.should.equal('/tmp/journal')
+    with patch.dict(os.environ, {JOURNAL_DIR_ENV: 'none'}):
+        Session().journal.should.equal(None)
+
+
+@mock_autoscaling
+def test_edit_without_a_journal():
+    session = Session(journal=False)
+    add_launch_config("web", session=session, image_id="ami-1234")
+
+    with patch('autoscaler.journal.os.makedirs') as makedirs:
+        edit_launch_config("web", session=session, image_id="ami-5678")
+
+    makedirs.called.should.equal(False)
+    conn = boto.connect_autoscale(use_block_device_types=True)
+    conn.get_all_launch_configurations()[0].image_id.should.equal("ami-5678")
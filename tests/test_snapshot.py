@@ -0,0 +1,127 @@
+import os
+import shutil
+import tempfile
+
+import boto
+from boto.ec2.autoscale.group import AutoScalingGroup
+from boto.ec2.autoscale.tag import Tag
+from mock import patch
+from moto import mock_autoscaling
+import sure  # noqa
+
+from autoscaler import Session, add_launch_config
+from autoscaler.cli import main
+from autoscaler.export import export_inventory, open_output
+from autoscaler.parsers import parse_block_device_mappings
+from autoscaler.snapshot import load_snapshot, restore_snapshot
+
+directory = None
+snapshot_path = None
+
+
+def setup():
+    global directory, snapshot_path
+    directory = tempfile.mkdtemp()
+    snapshot_path = _snapshot_fleet(os.path.join(directory, 'snapshot.jsonl.gz'))
+
+
+def teardown():
+    shutil.rmtree(directory)
+
+
+def _snapshot_fleet(path, groups=2):
+    # Export a small fleet from a mocked account that each test then
+    # replaces with an empty one
+    mock = mock_autoscaling()
+    mock.start()
+    try:
+        add_launch_config("autoscaler_default", base=None, image_id="ami-1234", instance_type="m1.small")
+        add_launch_config("web", user_data="echo 'web'", instance_monitoring=True,
+                          block_device_mappings=[parse_block_device_mappings("/dev/xvdb=ephemeral0")])
+        conn = boto.connect_autoscale(use_block_device_types=True)
+        for index in range(groups):
+            conn.create_auto_scaling_group(AutoScalingGroup(
+                name='web-{}'.format(index),
+                availability_zones=['us-east-1c'],
+                launch_config='web',
+                max_size=3,
+                min_size=1,
+                tags=[Tag(key='team', value='web', propagate_at_launch=True,
+                          resource_id='web-{}'.format(index))],
+            ))
+        stream = open_output(path)
+        export_inventory(stream, session=Session())
+        stream.close()
+    finally:
+        mock.stop()
+    return path
+
+
+def test_load_snapshot():
+    records = load_snapshot(snapshot_path)
+
+    [(record['kind'], record['name']) for record in records].should.equal([
+        ('launch_config', 'autoscaler_default'), ('launch_config', 'web'),
+        ('group', 'web-0'), ('group', 'web-1'),
+    ])
+
+
+@mock_autoscaling
+def test_restore_snapshot():
+    records = load_snapshot(snapshot_path)
+
+    describe, configs, groups = restore_snapshot(records, session=Session(), concurrency=1)
+
+    sorted(configs.created).should.equal(['autoscaler_default', 'web'])
+    sorted(groups.created).should.equal(['web-0', 'web-1'])
+    conn = boto.connect_autoscale(use_block_device_types=True)
+    config = conn.get_all_launch_configurations(names=['web'])[0]
+    config.image_id.should.equal('ami-1234')
+    config.user_data.should.equal(b"echo 'web'")
+    list(config.block_device_mappings.keys()).should.equal(['/dev/xvdb'])
+    group = conn.get_all_groups(names=['web-1'])[0]
+    group.launch_config_name.should.equal('web')
+    group.max_size.should.equal(3)
+    [(tag.key, tag.value) for tag in group.tags].should.equal([('team', 'web')])
+
+
+@mock_autoscaling
+def test_restore_snapshot_skips_matching_objects():
+    records = load_snapshot(snapshot_path)
+    restore_snapshot(records, session=Session(), concurrency=1)
+    records[-1]['max_size'] = 5
+    calls = []
+
+    _, configs, groups = restore_snapshot(records, session=Session(), concurrency=1,
+                                          progress=lambda *args: calls.append(args))
+
+    configs.created.should.equal([])
+    configs.edited.should.equal([])
+    sorted(configs.unchanged).should.equal(['autoscaler_default', 'web'])
+    groups.edited.should.equal(['web-1'])
+    groups.unchanged.should.equal(['web-0'])
+    calls.should.equal([('groups', 'edit', 'web-1', None)])
+
+
+@mock_autoscaling
+@patch('autoscaler.cli.sys')
+@patch('autoscaler.cli.print', create=True)
+def test_restore_cli(printer, sys):
+    sys.argv = ['autoscaler', 'restore', snapshot_path, '--concurrency', '1']
+
+    main()
+
+    lines = [call[0][0] for call in printer.call_args_list]
+    # Objects in a phase are created concurrently, so in any order
+    [line.split(' ', 1)[0] for line in lines[:4]].should.equal(['[1]', '[2]', '[3]', '[4]'])
+    sorted(line.split(' ', 1)[1] for line in lines[:2]).should.equal([
+        "launch configs: created autoscaler_default",
+        "launch configs: created web",
+    ])
+    sorted(line.split(' ', 1)[1] for line in lines[2:4]).should.equal([
+        "groups: created web-0",
+        "groups: created web-1",
+    ])
+    lines[5].should.match(r"^launch configs: 2 created, 0 edited, 0 unchanged, 0 failed")
+    lines[6].should.match(r"^groups: 2 created, 0 edited, 0 unchanged, 0 failed")
+    sys.exit.called.should.equal(False)
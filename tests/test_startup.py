@@ -0,0 +1,30 @@
+from mock import patch
+import sure  # noqa
+
+from autoscaler.cli import main
+from benchmarks.startup import COMMANDS, time_command
+
+
+def test_help_does_not_load_boto():
+    for command in ['import autoscaler', 'autoscaler --help', 'autoscaler apply --help']:
+        time_command(COMMANDS[command], runs=1)['boto_loaded'].should.equal(False)
+
+
+@patch('autoscaler.cli.sys')
+def test_unknown_command(sys):
+    sys.argv = ['autoscaler', 'launch-configs', 'add', 'web']
+
+    main()
+
+    sys.exit.call_args[0][0].should.contain("Unknown command launch-configs")
+
+
+@patch('autoscaler.cli._apply_command')
+@patch('autoscaler.cli.sys')
+def test_main_dispatches_commands(sys, apply_command):
+    sys.argv = ['autoscaler', 'apply', 'manifest.json', '--dry-run']
+
+    with patch.dict('autoscaler.cli.COMMANDS', {'apply': apply_command}):
+        main()
+
+    apply_command.assert_called_once_with(['apply', 'manifest.json', '--dry-run'])
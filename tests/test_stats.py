@@ -0,0 +1,121 @@
+import json
+import os
+import shutil
+import tempfile
+
+import boto
+from boto.exception import BotoServerError
+from mock import patch
+from moto import mock_autoscaling
+import sure  # noqa
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+from autoscaler import add_launch_config, edit_launch_config, Session, Throttler
+from autoscaler.cli import launch_config
+from autoscaler.stats import (
+    CallRecord,
+    JSONLinesSink,
+    MemorySink,
+    PrometheusTextfileSink,
+    add_sink,
+    remove_sink,
+)
+
+from helpers import create_groups
+
+THROTTLE_BODY = """<ErrorResponse>
+  <Error><Code>Throttling</Code><Message>Rate exceeded</Message></Error>
+</ErrorResponse>"""
+
+
+@mock_autoscaling
+def test_memory_sink_records_phases():
+    add_launch_config("web", user_data="echo 'web_machine' > /etc/config")
+    create_groups(['web-1', 'web-2'])
+
+    sink = add_sink(MemorySink())
+    try:
+        edit_launch_config("web", concurrency=1, user_data="echo 'other_machine' > /etc/config")
+    finally:
+        remove_sink(sink)
+
+    sink.operations[('reassign', 'UpdateAutoScalingGroup')]['calls'].should.equal(4)
+    sink.operations[('describe', 'DescribeAutoScalingGroups')]['pages'].should.equal(1)
+    sink.operations[('create', 'CreateLaunchConfiguration')]['calls'].should.equal(2)
+    sink.operations[('delete', 'DeleteLaunchConfiguration')]['calls'].should.equal(2)
+    sink.operations[('describe', 'DescribeLaunchConfigurations')]['bytes'].should.be.greater_than(0)
+    list(sink.phases).should.equal(['describe', 'create', 'reassign', 'delete'])
+    sink.summary().should.contain('UpdateAutoScalingGroup')
+
+
+@mock_autoscaling
+def test_json_lines_sink_counts_retries():
+    session = Session(throttler=Throttler(sleep=lambda seconds: None))
+    stream = StringIO()
+    sink = add_sink(JSONLinesSink(stream))
+
+    calls = []
+    original = boto.ec2.autoscale.AutoScaleConnection.create_launch_configuration
+
+    def create_launch_configuration(conn, config):
+        calls.append(config)
+        if len(calls) == 1:
+            raise BotoServerError(400, 'Bad Request', THROTTLE_BODY)
+        return original(conn, config)
+
+    try:
+        with patch.object(boto.ec2.autoscale.AutoScaleConnection, 'create_launch_configuration',
+                          autospec=True, side_effect=create_launch_configuration):
+            add_launch_config("web", session=session)
+    finally:
+        remove_sink(sink)
+
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    [record['operation'] for record in records].should.equal([
+        'DescribeLaunchConfigurations', 'CreateLaunchConfiguration',
+    ])
+    records[1]['retries'].should.equal(1)
+    records[1]['error'].should.be.none
+
+
+def test_prometheus_textfile_sink():
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'autoscaler.prom')
+    sink = PrometheusTextfileSink(path)
+    try:
+        call = CallRecord('DescribeAutoScalingGroups', 'describe')
+        call.duration = 0.5
+        sink.record(call)
+        sink.record(call)
+        sink.flush()
+        with open(path) as prom_file:
+            contents = prom_file.read()
+    finally:
+        shutil.rmtree(directory)
+
+    contents.should.contain('# TYPE autoscaler_api_calls_total counter')
+    contents.should.contain(
+        'autoscaler_api_calls_total{phase="describe",operation="DescribeAutoScalingGroups"} 2')
+    contents.should.contain(
+        'autoscaler_api_call_seconds_total{phase="describe",operation="DescribeAutoScalingGroups"} 1.0')
+
+
+@mock_autoscaling
+@patch('autoscaler.cli.print', create=True)
+@patch('autoscaler.cli.get_input')
+@patch('autoscaler.cli.sys')
+def test_launch_config_stats_cli(sys, user_input, printer):
+    sys.argv = ['autoscaler_launch_config', 'add', 'web', '--stats']
+    user_input.side_effect = [
+        'ami-1234abcd', 'the_key', "default,web", "echo 'web' > /etc/config", "m1.small",
+        "", "", "", "yes", "", "0.2", "yes", "",
+    ]
+
+    launch_config()
+
+    output = "\n".join(call[0][0] for call in printer.call_args_list)
+    output.should.contain("CreateLaunchConfiguration")
@@ -0,0 +1,164 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+import boto.ec2.autoscale
+from mock import Mock, patch
+from moto import mock_autoscaling
+import sure  # noqa
+
+from autoscaler import AutoScalerException, Session, add_launch_config, edit_launch_config
+from autoscaler.cli import main
+from autoscaler.journal import JOURNAL_DIR_ENV
+from autoscaler.targets import (
+    DEFAULT_TARGET,
+    Target,
+    close_target_sessions,
+    fan_out,
+    get_target_session,
+    parse_targets,
+)
+
+from helpers import run_serially
+
+REGIONS = ['us-west-2', 'eu-west-1']
+
+
+def _config_names(region):
+    conn = boto.ec2.autoscale.connect_to_region(region)
+    return [config.name for config in conn.get_all_launch_configurations()]
+
+
+def test_parse_targets():
+    targets = parse_targets(REGIONS, ['prod', 'staging'])
+
+    [target.label for target in targets].should.equal([
+        'prod/us-west-2', 'prod/eu-west-1', 'staging/us-west-2', 'staging/eu-west-1',
+    ])
+    targets[0].slug.should.equal('prod-us-west-2')
+    parse_targets().should.equal([DEFAULT_TARGET])
+    DEFAULT_TARGET.label.should.equal('default')
+
+
+def test_target_sessions_are_kept_per_target():
+    session = get_target_session(Target('us-west-2', None))
+
+    get_target_session(Target('us-west-2', None)).should.be(session)
+    get_target_session(Target('eu-west-1', None)).should_not.be(session)
+    session.region.should.equal('us-west-2')
+
+
+def test_target_sessions_have_their_own_journal():
+    close_target_sessions()
+    try:
+        with patch.dict(os.environ, {JOURNAL_DIR_ENV: '/tmp/journal'}):
+            session = get_target_session(Target('us-west-2', None))
+    finally:
+        close_target_sessions()
+
+    session.journal.directory.should.equal('/tmp/journal/us-west-2')
+
+
+def test_session_profile():
+    with patch('autoscaler.session.boto.ec2.autoscale.connect_to_region') as connect:
+        connect.return_value = Mock()
+        session = Session(region='us-west-2', profile='prod')
+        with session.connection():
+            pass
+
+    connect.assert_called_once_with('us-west-2', use_block_device_types=True, profile_name='prod')
+
+
+def test_session_unknown_region():
+    session = Session(region='moon-1')
+
+    session.connection().__enter__.when.called_with().should.throw(
+        AutoScalerException, "Unknown region moon-1")
+
+
+def test_fan_out_runs_targets_at_once():
+    targets = parse_targets(REGIONS)
+    started = dict((target.region, threading.Event()) for target in targets)
+
+    def call(session):
+        started[session.region].set()
+        # Only true if the other target starts while this one is running
+        return all(event.wait(5) for event in started.values())
+
+    result = fan_out(call, targets)
+
+    dict(result.succeeded).should.equal(dict((target, True) for target in targets))
+
+
+@mock_autoscaling
+@patch('autoscaler.targets.run_concurrently', run_serially)
+def test_fan_out():
+    add_launch_config("autoscaler_default", base=None, session=Session(region='us-west-2'),
+                      image_id="ami-1234", instance_type="m1.small")
+
+    result = fan_out(add_launch_config, parse_targets(REGIONS), "web", image_id="ami-5678")
+
+    list(result.succeeded).should.equal(parse_targets(REGIONS))
+    dict(result.failed).should.equal({})
+    _config_names('us-west-2').should.equal(['autoscaler_default', 'web'])
+    _config_names('eu-west-1').should.equal(['web'])
+    _config_names('us-east-1').should.equal([])
+
+
+@mock_autoscaling
+@patch('autoscaler.targets.run_concurrently', run_serially)
+def test_fan_out_failures_are_per_target():
+    add_launch_config("web", base=None, session=Session(region='us-west-2'), image_id="ami-1234")
+
+    result = fan_out(edit_launch_config, parse_targets(REGIONS), "web", image_id="ami-5678")
+
+    list(result.succeeded).should.equal([Target('us-west-2', None)])
+    list(result.failed).should.equal([Target('eu-west-1', None)])
+    result.failed[Target('eu-west-1', None)].should.be.a(AutoScalerException)
+
+
+@mock_autoscaling
+@patch('autoscaler.concurrency.run_concurrently', run_serially)
+@patch('autoscaler.cli.sys')
+@patch('autoscaler.cli.print', create=True)
+def test_apply_cli_regions(printer, sys):
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'manifest.json')
+        with open(path, 'w') as manifest_file:
+            json.dump({'launch_configs': {'web': {'base': None, 'image_id': 'ami-1234'}}},
+                      manifest_file)
+        sys.argv = ['autoscaler', 'apply', path, '--concurrency=1', '--region', 'us-west-2',
+                    '--region', 'eu-west-1']
+        main()
+    finally:
+        shutil.rmtree(directory)
+
+    lines = [call[0][0] for call in printer.call_args_list]
+    lines[0].should.equal("us-west-2:")
+    lines[2].should.match(r"^launch configs: 1 created")
+    lines[4].should.equal("eu-west-1:")
+    lines[6].should.match(r"^launch configs: 1 created")
+    _config_names('us-west-2').should.equal(['web'])
+    _config_names('eu-west-1').should.equal(['web'])
+    sys.exit.called.should.equal(False)
+
+
+@mock_autoscaling
+@patch('autoscaler.concurrency.run_concurrently', run_serially)
+@patch('autoscaler.cli.sys')
+def test_export_cli_regions(sys):
+    add_launch_config("web", base=None, session=Session(region='us-west-2'), image_id="ami-1234")
+    directory = tempfile.mkdtemp()
+    try:
+        sys.argv = ['autoscaler', 'export', '--output', os.path.join(directory, 'inventory.jsonl'),
+                    '--region', 'us-west-2', '--region', 'eu-west-1']
+        main()
+        with open(os.path.join(directory, 'inventory.us-west-2.jsonl')) as export_file:
+            [json.loads(line)['name'] for line in export_file].should.equal(['web'])
+        with open(os.path.join(directory, 'inventory.eu-west-1.jsonl')) as export_file:
+            export_file.read().should.equal('')
+    finally:
+        shutil.rmtree(directory)
@@ -0,0 +1,115 @@
+import boto
+from boto.ec2.autoscale import AutoScaleConnection
+from boto.exception import BotoServerError
+from mock import patch
+from moto import mock_autoscaling
+import sure  # noqa
+
+from autoscaler import add_launch_config, edit_launch_config, Session
+from autoscaler.throttle import Throttler, TokenBucket
+
+THROTTLE_BODY = """<ErrorResponse xmlns="http://autoscaling.amazonaws.com/doc/2011-01-01/">
+  <Error>
+    <Type>Sender</Type>
+    <Code>Throttling</Code>
+    <Message>Rate exceeded</Message>
+  </Error>
+  <RequestId>7a62c49f-347e-4fc4-9331-6e8eEXAMPLE</RequestId>
+</ErrorResponse>"""
+
+
+def throttle_error():
+    return BotoServerError(400, 'Bad Request', THROTTLE_BODY)
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_token_bucket_limits_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=5, capacity=5, clock=clock, sleep=clock.sleep)
+    for _ in range(15):
+        bucket.acquire()
+
+    # The first five calls use the burst, the rest wait for refills
+    round(clock.now, 6).should.equal(2.0)
+
+
+def test_throttler_retries_and_adapts():
+    clock = FakeClock()
+    throttler = Throttler(rate=10, clock=clock, sleep=clock.sleep)
+    responses = [throttle_error(), throttle_error(), 'ok']
+
+    def flaky():
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    throttler.call(flaky).should.equal('ok')
+
+    stats = throttler.stats()
+    stats['calls'].should.equal(3)
+    stats['retries'].should.equal(2)
+    stats['throttles'].should.equal(2)
+    stats['failures'].should.equal(0)
+    round(stats['rate'], 6).should.equal(2.6)
+
+
+def test_throttler_gives_up():
+    clock = FakeClock()
+    throttler = Throttler(max_attempts=3, clock=clock, sleep=clock.sleep)
+
+    def throttled():
+        raise throttle_error()
+
+    throttler.call.when.called_with(throttled).should.throw(BotoServerError)
+    throttler.stats()['calls'].should.equal(3)
+    throttler.stats()['failures'].should.equal(1)
+
+
+def test_throttler_does_not_retry_other_errors():
+    throttler = Throttler()
+
+    def broken():
+        raise BotoServerError(400, 'Bad Request')
+
+    throttler.call.when.called_with(broken).should.throw(BotoServerError)
+    throttler.stats()['calls'].should.equal(1)
+
+
+@mock_autoscaling
+def test_edit_launch_config_survives_throttling():
+    clock = FakeClock()
+    session = Session(throttler=Throttler(clock=clock, sleep=clock.sleep))
+    add_launch_config("web", session=session, user_data="echo 'web_machine' > /etc/config")
+
+    original = AutoScaleConnection.create_launch_configuration
+    calls = []
+
+    def create_launch_configuration(conn, config):
+        calls.append(config.name)
+        if len(calls) % 2:
+            raise throttle_error()
+        return original(conn, config)
+
+    with patch.object(AutoScaleConnection, 'create_launch_configuration', autospec=True,
+                      side_effect=create_launch_configuration):
+        edit_launch_config("web", session=session, user_data="echo 'other_machine' > /etc/config")
+
+    session.throttler.stats()['throttles'].should.equal(2)
+
+    conn = boto.connect_autoscale(use_block_device_types=True)
+    configs = conn.get_all_launch_configurations()
+    [config.name for config in configs].should.equal(['web'])
+    configs[0].user_data.should.equal("echo 'other_machine' > /etc/config")
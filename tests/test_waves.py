@@ -0,0 +1,111 @@
+from mock import patch
+from moto import mock_autoscaling
+import sure  # noqa
+
+from autoscaler import AutoScalerException, HealthCheckError, add_launch_config, edit_launch_config
+from autoscaler.cli import main
+from autoscaler.core import wave_sizes
+
+from helpers import create_groups, group_names
+
+
+def _group_configs(conn):
+    return dict((group.name, group.launch_config_name) for group in conn.get_all_groups())
+
+
+def test_wave_sizes():
+    wave_sizes(20, [1, '10%']).should.equal([1, 2, 17])
+    wave_sizes(3, [1, '50%', 5]).should.equal([1, 2])
+    wave_sizes(5, ['0%']).should.equal([1, 4])
+    wave_sizes(5, None).should.equal([5])
+    wave_sizes(0, [1]).should.equal([])
+
+
+@mock_autoscaling
+def test_edit_in_waves():
+    add_launch_config("web", base=None, image_id="ami-1234")
+    conn = create_groups(group_names("web", 10))
+    waves = []
+
+    def health_check(names):
+        # Every group of the wave is on the new config by now
+        configs = _group_configs(conn)
+        set(configs[name] for name in names).should.equal(set(['web-autoscaler-temp']))
+        waves.append(len(names))
+        return True
+
+    edit_launch_config("web", concurrency=1, image_id="ami-5678", waves=[1, '20%'],
+                       health_check=health_check)
+
+    waves.should.equal([1, 2, 7])
+    set(_group_configs(conn).values()).should.equal(set(['web']))
+    conn.get_all_launch_configurations(names=['web'])[0].image_id.should.equal('ami-5678')
+
+
+@mock_autoscaling
+def test_edit_keeps_capacity_changed_between_waves():
+    add_launch_config("web", base=None, image_id="ami-1234")
+    conn = create_groups(group_names("web", 2), max_size=8, desired_capacity=2)
+
+    def health_check(names):
+        # Someone scales up a group that hasn't been moved yet
+        conn.get_all_groups(names=['web-1'])[0].set_capacity(7)
+        return True
+
+    edit_launch_config("web", concurrency=1, image_id="ami-5678", waves=[1],
+                       health_check=health_check)
+
+    groups = dict((group.name, group) for group in conn.get_all_groups())
+    groups['web-1'].desired_capacity.should.equal(7)
+    groups['web-1'].launch_config_name.should.equal('web')
+
+
+@mock_autoscaling
+def test_failed_health_check_moves_groups_back():
+    add_launch_config("web", base=None, image_id="ami-1234")
+    conn = create_groups(group_names("web", 6))
+    waves = []
+
+    def health_check(names):
+        waves.append(names)
+        if len(waves) == 2:
+            raise AutoScalerException("web-1 is unhealthy")
+        return True
+
+    edit_launch_config.when.called_with(
+        "web", concurrency=1, versioned=True, image_id="ami-5678", waves=[1, 2],
+        health_check=health_check,
+    ).should.throw(HealthCheckError, "Health check raised web-1 is unhealthy")
+
+    # The last wave never started
+    [len(names) for names in waves].should.equal([1, 2])
+    set(_group_configs(conn).values()).should.equal(set(['web']))
+    [config.name for config in conn.get_all_launch_configurations()].should.equal(['web'])
+    conn.get_all_launch_configurations(names=['web'])[0].image_id.should.equal('ami-1234')
+
+
+@mock_autoscaling
+@patch('autoscaler.cli.sys')
+def test_edit_in_waves_cli(sys):
+    add_launch_config("web", base=None, image_id="ami-1234")
+    conn = create_groups(group_names("web", 3))
+    sys.argv = ['autoscaler', 'launch-config', 'edit', 'web', '--set', 'image_id=ami-5678',
+                '--waves', '1', '--health-check', 'operator:not_', '--concurrency=1']
+
+    main.when.called_with().should.throw(HealthCheckError, "Health check returned False")
+    conn.get_all_launch_configurations(names=['web'])[0].image_id.should.equal('ami-1234')
+
+    sys.argv = ['autoscaler', 'launch-config', 'edit', 'web', '--set', 'image_id=ami-5678',
+                '--waves', '1,50%', '--health-check', 'operator:truth', '--concurrency=1']
+    main()
+
+    conn.get_all_launch_configurations(names=['web'])[0].image_id.should.equal('ami-5678')
+    set(_group_configs(conn).values()).should.equal(set(['web']))
+
+
+@patch('autoscaler.cli.sys')
+def test_edit_in_waves_cli_unknown_health_check(sys):
+    sys.argv = ['autoscaler', 'launch-config', 'edit', 'web', '--set', 'image_id=ami-5678',
+                '--waves', '1', '--health-check', 'operator']
+
+    main.when.called_with().should.throw(AutoScalerException, "Expected module:function")